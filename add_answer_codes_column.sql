@@ -0,0 +1,45 @@
+-- 압축 응답 컬럼 추가
+-- 이 스크립트를 Supabase SQL Editor에서 실행하세요
+-- responses JSONB에 17개 선택지 문구를 그대로 저장하는 대신, 질문 순서대로 선택지 번호를
+-- 한 글자씩 저장합니다 (예: "01101011010110011"). 문구는 question_bank_version의
+-- 질문 세트(question_banks/v<버전>.json)로 필요할 때만 복원합니다.
+
+-- 1. 컬럼 추가
+ALTER TABLE public.responses ADD COLUMN IF NOT EXISTS answer_codes TEXT;
+ALTER TABLE public.responses ADD COLUMN IF NOT EXISTS question_bank_version TEXT;
+
+-- 2. 압축 응답 일괄 반영 함수 (updates: [{"id": 1, "answer_codes": "0110...", "question_bank_version": "v1-..."}, ...])
+CREATE OR REPLACE FUNCTION apply_answer_codes(updates JSONB)
+RETURNS BIGINT
+LANGUAGE plpgsql
+AS $$
+DECLARE
+    v_updated BIGINT;
+BEGIN
+    UPDATE public.responses r
+    SET answer_codes = u.answer_codes,
+        question_bank_version = u.question_bank_version
+    FROM jsonb_to_recordset(updates) AS u(id BIGINT, answer_codes TEXT, question_bank_version TEXT)
+    WHERE r.id = u.id;
+    GET DIAGNOSTICS v_updated = ROW_COUNT;
+    RETURN v_updated;
+END;
+$$;
+
+GRANT EXECUTE ON FUNCTION apply_answer_codes(JSONB) TO anon;
+GRANT EXECUTE ON FUNCTION apply_answer_codes(JSONB) TO authenticated;
+
+-- 3. 기존 행 채우기: 질문 세트는 파이썬 쪽에 있으므로 아래 명령으로 실행합니다.
+--    python mbti_rescore.py --job encode --apply
+
+-- 4. 채우기가 끝난 행의 응답 원문 비우기 (선택사항, 행 크기 절감)
+-- UPDATE public.responses
+-- SET responses = NULL
+-- WHERE answer_codes IS NOT NULL AND answer_codes NOT LIKE '%-%';
+
+-- 5. 진행 상황 확인
+SELECT
+    COUNT(*) AS total_rows,
+    COUNT(answer_codes) AS encoded_rows,
+    COUNT(responses) AS rows_with_text
+FROM public.responses;
@@ -0,0 +1,29 @@
+-- 진단 세션 ID 유니크 제약 추가
+-- 이 스크립트는 add_diagnosis_session_id.sql 실행 후 적용합니다.
+-- 저장은 diagnosis_session_id 기준 upsert(ON CONFLICT DO NOTHING) 한 번으로 처리되므로
+-- 같은 세션이 다시 제출되어도 중복 행이 생기지 않습니다.
+
+-- 1. 기존 중복 세션 ID 확인 (결과가 있으면 먼저 정리하세요)
+SELECT diagnosis_session_id, COUNT(*) AS duplicate_count
+FROM public.responses
+WHERE diagnosis_session_id IS NOT NULL
+GROUP BY diagnosis_session_id
+HAVING COUNT(*) > 1;
+
+-- 2. 중복 세션 중 가장 최근 행만 남기기 (선택사항)
+-- DELETE FROM public.responses r
+-- USING public.responses newer
+-- WHERE r.diagnosis_session_id = newer.diagnosis_session_id
+--   AND r.id < newer.id;
+
+-- 3. 유니크 인덱스 생성 (NULL은 여러 개 허용)
+CREATE UNIQUE INDEX IF NOT EXISTS uq_responses_diagnosis_session_id
+    ON public.responses(diagnosis_session_id);
+
+-- 4. 유니크 인덱스와 중복되는 기존 일반 인덱스 제거
+DROP INDEX IF EXISTS idx_responses_diagnosis_session_id;
+
+-- 5. 인덱스 확인
+SELECT indexname, indexdef
+FROM pg_indexes
+WHERE tablename = 'responses' AND indexname LIKE '%diagnosis_session%';
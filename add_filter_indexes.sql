@@ -0,0 +1,18 @@
+-- 관리자 "전체 데이터" 탭 서버 필터용 인덱스
+-- 이 스크립트를 Supabase SQL Editor에서 실행하세요
+-- 기간(timestamp 범위)과 MBTI(eq) 조건은 create_responses_table.sql의 idx_responses_timestamp,
+-- idx_responses_mbti를 사용합니다. 사용자·로봇 ID 부분 일치(ilike '%검색어%')는 B-tree 인덱스를
+-- 쓸 수 없으므로 trigram GIN 인덱스를 추가합니다.
+
+-- 1. trigram 확장
+CREATE EXTENSION IF NOT EXISTS pg_trgm;
+
+-- 2. 사용자·로봇 ID 부분 일치 검색 인덱스
+CREATE INDEX IF NOT EXISTS idx_responses_user_id_trgm ON public.responses USING gin (user_id gin_trgm_ops);
+CREATE INDEX IF NOT EXISTS idx_responses_robot_id_trgm ON public.responses USING gin (robot_id gin_trgm_ops);
+
+-- 3. 인덱스 확인
+SELECT indexname, indexdef
+FROM pg_indexes
+WHERE tablename = 'responses'
+ORDER BY indexname;
@@ -0,0 +1,32 @@
+-- 행 수정 시각 컬럼 추가
+-- 이 스크립트를 Supabase SQL Editor에서 실행하세요
+-- 앱의 데이터 버전 토큰은 (max(id), 행 수)라서 mbti_rescore.py의 재채점(--apply)이나
+-- 압축 응답 채우기(--job encode)처럼 기존 행을 UPDATE하면 버전이 바뀌지 않습니다.
+-- UPDATE마다 updated_at을 기록하면 토큰에 max(updated_at)이 더해져 로컬 스냅샷·건수 큐브·
+-- 전이 모델과 캐시가 수정된 행을 다시 반영합니다. 새로 저장되는 행은 NULL로 남습니다.
+
+-- 1. 컬럼 추가
+ALTER TABLE public.responses ADD COLUMN IF NOT EXISTS updated_at TIMESTAMPTZ;
+
+-- 2. UPDATE 시각 기록 트리거
+CREATE OR REPLACE FUNCTION set_responses_updated_at()
+RETURNS TRIGGER
+LANGUAGE plpgsql
+AS $$
+BEGIN
+    NEW.updated_at = now();
+    RETURN NEW;
+END;
+$$;
+
+DROP TRIGGER IF EXISTS trg_responses_updated_at ON public.responses;
+CREATE TRIGGER trg_responses_updated_at
+    BEFORE UPDATE ON public.responses
+    FOR EACH ROW EXECUTE FUNCTION set_responses_updated_at();
+
+-- 3. max(updated_at) 조회·수정 행 증분 조회용 인덱스
+CREATE INDEX IF NOT EXISTS idx_responses_updated_at ON public.responses(updated_at);
+
+-- 4. 확인
+SELECT COUNT(*) AS total_rows, COUNT(updated_at) AS updated_rows, MAX(updated_at) AS last_updated
+FROM public.responses;
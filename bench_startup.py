@@ -0,0 +1,130 @@
+"""앱 콜드 스타트 import 시간 측정
+
+모듈마다 새 인터프리터에서 `python -X importtime`으로 import하여
+누적 시간(하위 모듈 포함)을 측정합니다.
+
+사용법:
+    python bench_startup.py                 # 결과 표 출력
+    python bench_startup.py --budget 1.5    # 시작 시 import 합계가 1.5초를 넘으면 종료 코드 1
+    python bench_startup.py > bench_output.txt
+"""
+import argparse
+import statistics
+import subprocess
+import sys
+
+# mbti_16_analysis_250812.py 최상단에서 import하는 모듈 (사용자 ID 입력 화면 전에 로드)
+STARTUP_MODULES = (
+    "streamlit",
+    "pandas",
+    "numpy",
+    "plotly.express",
+    "plotly.graph_objects",
+    "plotly.subplots",
+    "pytz",
+    "dotenv",
+    "supabase",
+    "mbti_db",
+    "mbti_snapshot",
+    "mbti_questions",
+    "mbti_guides",
+    "mbti_types",
+    "mbti_transitions",
+    "mbti_markov",
+    "mbti_cube",
+    "mbti_frame",
+)
+
+# 처음 사용하는 함수 안에서 로드하는 모듈
+DEFERRED_MODULES = (
+    "scipy.stats",      # analyze_statistical_significance
+    "networkx",         # create_mbti_network
+    "pyarrow.parquet",  # sync_snapshot (pandas.read_parquet / to_parquet)
+)
+
+# 더 이상 import하지 않는 모듈 (비교용)
+REMOVED_MODULES = (
+    "sklearn.cluster",
+    "sklearn.decomposition",
+    "sklearn.preprocessing",
+    "seaborn",
+    "matplotlib.pyplot",
+)
+
+
+def measure_import(module, repeat=3):
+    """새 프로세스에서 module을 import한 누적 시간(초)의 중앙값 (미설치면 None)"""
+    samples = []
+    for _ in range(repeat):
+        proc = subprocess.run(
+            [sys.executable, "-X", "importtime", "-c", f"import {module}"],
+            capture_output=True, text=True,
+        )
+        if proc.returncode != 0:
+            return None
+        # 마지막 줄이 최상위 모듈: "import time: self [us] | cumulative | imported package"
+        cumulative = None
+        for line in proc.stderr.splitlines():
+            if not line.startswith("import time:"):
+                continue
+            parts = line.split("|")
+            if parts[-1].strip() == module:
+                cumulative = int(parts[1])
+        if cumulative is None:
+            return None
+        samples.append(cumulative / 1_000_000)
+    return statistics.median(samples)
+
+
+def measure_group(modules, repeat=3):
+    """한 프로세스에서 modules를 모두 import한 벽시계 시간(초, 공유 하위 모듈 중복 제외)"""
+    code = (
+        "import importlib, time\n"
+        "start = time.perf_counter()\n"
+        f"for name in {list(modules)!r}:\n"
+        "    try:\n"
+        "        importlib.import_module(name)\n"
+        "    except ImportError:\n"
+        "        pass\n"
+        "print(time.perf_counter() - start)\n"
+    )
+    samples = []
+    for _ in range(repeat):
+        proc = subprocess.run([sys.executable, "-c", code], capture_output=True, text=True)
+        samples.append(float(proc.stdout.strip()))
+    return statistics.median(samples)
+
+
+def report(title, modules, repeat):
+    print(f"\n[{title}]")
+    print(f"{'module':<28}{'cumulative (s)':>16}")
+    for module in modules:
+        elapsed = measure_import(module, repeat)
+        value = "미설치" if elapsed is None else f"{elapsed:.3f}"
+        print(f"{module:<28}{value:>16}")
+
+
+def main():
+    parser = argparse.ArgumentParser(description="앱 콜드 스타트 import 시간 측정")
+    parser.add_argument("--repeat", type=int, default=3, help="모듈별 측정 반복 횟수 (중앙값 사용)")
+    parser.add_argument("--budget", type=float, default=None, help="시작 시 import 합계 허용 시간(초)")
+    args = parser.parse_args()
+
+    print(f"Python {sys.version.split()[0]}")
+    report("시작 시 import", STARTUP_MODULES, args.repeat)
+    report("지연 import (첫 사용 시)", DEFERRED_MODULES, args.repeat)
+    report("제거된 import", REMOVED_MODULES, args.repeat)
+
+    startup = measure_group(STARTUP_MODULES, args.repeat)
+    eager = measure_group(STARTUP_MODULES + DEFERRED_MODULES + REMOVED_MODULES, args.repeat)
+    print(f"\n시작 시 import 합계: {startup:.3f}s")
+    print(f"모두 즉시 import 했을 때: {eager:.3f}s")
+
+    if args.budget is not None and startup > args.budget:
+        print(f"❌ 콜드 스타트 예산 초과: {startup:.3f}s > {args.budget:.3f}s")
+        return 1
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
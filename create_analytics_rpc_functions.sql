@@ -0,0 +1,84 @@
+-- 분석 대시보드용 서버 집계 RPC 함수 생성
+-- 이 스크립트를 Supabase SQL Editor에서 실행하세요
+-- 날짜·시간은 모두 Asia/Seoul 기준이며, 기간 인자가 NULL이면 전체 기간을 집계합니다.
+-- location 컬럼이 필요하므로 add_location_column.sql을 먼저 실행하세요.
+
+-- 1. 그룹별 MBTI 교차표 (성별/연령대/직업/로봇/장소 × MBTI)
+CREATE OR REPLACE FUNCTION mbti_group_crosstab(
+    group_col TEXT,
+    start_date DATE DEFAULT NULL,
+    end_date DATE DEFAULT NULL
+)
+RETURNS TABLE (group_value TEXT, mbti TEXT, cnt BIGINT)
+LANGUAGE sql
+STABLE
+AS $$
+    SELECT g.group_value, g.mbti, COUNT(*) AS cnt
+    FROM (
+        SELECT
+            -- 허용된 컬럼만 선택 (동적 SQL 미사용)
+            CASE group_col
+                WHEN 'gender' THEN r.gender
+                WHEN 'age_group' THEN r.age_group
+                WHEN 'job' THEN r.job
+                WHEN 'robot_id' THEN r.robot_id
+                WHEN 'location' THEN r.location
+            END AS group_value,
+            r.mbti
+        FROM public.responses r
+        WHERE (start_date IS NULL OR (r."timestamp" AT TIME ZONE 'Asia/Seoul')::date >= start_date)
+          AND (end_date IS NULL OR (r."timestamp" AT TIME ZONE 'Asia/Seoul')::date <= end_date)
+    ) g
+    WHERE g.group_value IS NOT NULL AND g.mbti IS NOT NULL
+    GROUP BY g.group_value, g.mbti;
+$$;
+
+-- 2. 일별 MBTI 진단 수
+CREATE OR REPLACE FUNCTION mbti_daily_counts(
+    start_date DATE DEFAULT NULL,
+    end_date DATE DEFAULT NULL
+)
+RETURNS TABLE (day DATE, mbti TEXT, cnt BIGINT)
+LANGUAGE sql
+STABLE
+AS $$
+    SELECT (r."timestamp" AT TIME ZONE 'Asia/Seoul')::date AS day, r.mbti, COUNT(*) AS cnt
+    FROM public.responses r
+    WHERE r.mbti IS NOT NULL
+      AND (start_date IS NULL OR (r."timestamp" AT TIME ZONE 'Asia/Seoul')::date >= start_date)
+      AND (end_date IS NULL OR (r."timestamp" AT TIME ZONE 'Asia/Seoul')::date <= end_date)
+    GROUP BY 1, 2;
+$$;
+
+-- 3. 시간대 × 요일 진단 수 (weekday: 1=월요일 … 7=일요일)
+CREATE OR REPLACE FUNCTION mbti_hour_weekday_histogram(
+    start_date DATE DEFAULT NULL,
+    end_date DATE DEFAULT NULL
+)
+RETURNS TABLE (hour INT, weekday INT, cnt BIGINT)
+LANGUAGE sql
+STABLE
+AS $$
+    SELECT
+        EXTRACT(HOUR FROM r."timestamp" AT TIME ZONE 'Asia/Seoul')::int AS hour,
+        EXTRACT(ISODOW FROM r."timestamp" AT TIME ZONE 'Asia/Seoul')::int AS weekday,
+        COUNT(*) AS cnt
+    FROM public.responses r
+    WHERE r."timestamp" IS NOT NULL
+      AND (start_date IS NULL OR (r."timestamp" AT TIME ZONE 'Asia/Seoul')::date >= start_date)
+      AND (end_date IS NULL OR (r."timestamp" AT TIME ZONE 'Asia/Seoul')::date <= end_date)
+    GROUP BY 1, 2;
+$$;
+
+-- 4. 함수 실행 권한 부여
+GRANT EXECUTE ON FUNCTION mbti_group_crosstab(TEXT, DATE, DATE) TO anon;
+GRANT EXECUTE ON FUNCTION mbti_group_crosstab(TEXT, DATE, DATE) TO authenticated;
+GRANT EXECUTE ON FUNCTION mbti_daily_counts(DATE, DATE) TO anon;
+GRANT EXECUTE ON FUNCTION mbti_daily_counts(DATE, DATE) TO authenticated;
+GRANT EXECUTE ON FUNCTION mbti_hour_weekday_histogram(DATE, DATE) TO anon;
+GRANT EXECUTE ON FUNCTION mbti_hour_weekday_histogram(DATE, DATE) TO authenticated;
+
+-- 5. 함수 테스트
+SELECT * FROM mbti_group_crosstab('gender') LIMIT 10;
+SELECT * FROM mbti_daily_counts(CURRENT_DATE - 7, CURRENT_DATE) LIMIT 10;
+SELECT * FROM mbti_hour_weekday_histogram() LIMIT 10;
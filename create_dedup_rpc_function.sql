@@ -0,0 +1,52 @@
+-- 중복 진단 정리 RPC 함수 생성
+-- 이 스크립트를 Supabase SQL Editor에서 실행하세요
+-- 같은 사용자-로봇 조합에서 가장 최근 진단만 남기고 나머지를 한 번의 집합 연산으로 삭제합니다.
+
+-- 1. 정리 대상(최신이 아닌 중복 행) 뷰
+--    미리보기(dry-run)와 실제 삭제가 같은 윈도 함수 결과를 사용합니다.
+CREATE OR REPLACE VIEW public.responses_stale_duplicates AS
+SELECT ranked.id, ranked.user_id, ranked.robot_id
+FROM (
+    SELECT
+        r.id,
+        r.user_id,
+        r.robot_id,
+        ROW_NUMBER() OVER (
+            PARTITION BY r.user_id, r.robot_id
+            ORDER BY r."timestamp" DESC NULLS LAST, r.id DESC
+        ) AS rn
+    FROM public.responses r
+) ranked
+WHERE ranked.rn > 1;
+
+-- 2. 중복 정리 함수 (dry_run = TRUE 이면 개수만 반환)
+CREATE OR REPLACE FUNCTION dedup_responses_keep_latest(dry_run BOOLEAN DEFAULT TRUE)
+RETURNS TABLE (duplicate_groups BIGINT, stale_rows BIGINT, deleted_rows BIGINT)
+LANGUAGE plpgsql
+AS $$
+DECLARE
+    v_groups BIGINT;
+    v_rows BIGINT;
+    v_deleted BIGINT := 0;
+BEGIN
+    SELECT COUNT(DISTINCT (d.user_id, d.robot_id)), COUNT(*)
+    INTO v_groups, v_rows
+    FROM public.responses_stale_duplicates d;
+
+    IF NOT dry_run THEN
+        DELETE FROM public.responses r
+        USING public.responses_stale_duplicates d
+        WHERE r.id = d.id;
+        GET DIAGNOSTICS v_deleted = ROW_COUNT;
+    END IF;
+
+    RETURN QUERY SELECT v_groups, v_rows, v_deleted;
+END;
+$$;
+
+-- 3. 함수 실행 권한 부여
+GRANT EXECUTE ON FUNCTION dedup_responses_keep_latest(BOOLEAN) TO anon;
+GRANT EXECUTE ON FUNCTION dedup_responses_keep_latest(BOOLEAN) TO authenticated;
+
+-- 4. 함수 테스트 (미리보기)
+SELECT * FROM dedup_responses_keep_latest(TRUE);
@@ -0,0 +1,28 @@
+-- 재채점 결과 일괄 반영 RPC 함수 생성
+-- 이 스크립트를 Supabase SQL Editor에서 실행하세요
+-- mbti_rescore.py가 청크마다 바뀐 mbti/scores를 JSON 배열 하나로 보내 한 번의 UPDATE로 반영합니다.
+
+-- 1. 일괄 갱신 함수 (updates: [{"id": 1, "mbti": "ENFJ", "scores": {...}}, ...])
+CREATE OR REPLACE FUNCTION apply_rescored_responses(updates JSONB)
+RETURNS BIGINT
+LANGUAGE plpgsql
+AS $$
+DECLARE
+    v_updated BIGINT;
+BEGIN
+    UPDATE public.responses r
+    SET mbti = u.mbti,
+        scores = u.scores
+    FROM jsonb_to_recordset(updates) AS u(id BIGINT, mbti TEXT, scores JSONB)
+    WHERE r.id = u.id;
+    GET DIAGNOSTICS v_updated = ROW_COUNT;
+    RETURN v_updated;
+END;
+$$;
+
+-- 2. 함수 실행 권한 부여
+GRANT EXECUTE ON FUNCTION apply_rescored_responses(JSONB) TO anon;
+GRANT EXECUTE ON FUNCTION apply_rescored_responses(JSONB) TO authenticated;
+
+-- 3. 함수 테스트 (빈 배열 → 0)
+SELECT apply_rescored_responses('[]'::jsonb);
@@ -0,0 +1,23 @@
+-- 관리 화면 통계용 고유 값 개수 RPC 함수 생성
+-- 이 스크립트를 Supabase SQL Editor에서 실행하세요
+-- 전체 행 수는 HEAD + count 요청으로 받고, 고유 사용자·로봇 수만 이 함수로 계산합니다.
+
+-- 1. 고유 사용자 / 로봇 수
+CREATE OR REPLACE FUNCTION mbti_distinct_counts()
+RETURNS TABLE (distinct_users BIGINT, distinct_robots BIGINT)
+LANGUAGE sql
+STABLE
+AS $$
+    SELECT COUNT(DISTINCT r.user_id), COUNT(DISTINCT r.robot_id)
+    FROM public.responses r;
+$$;
+
+-- 2. robot_id 인덱스 생성 (user_id 인덱스는 create_responses_table.sql에 있음)
+CREATE INDEX IF NOT EXISTS idx_responses_robot_id ON public.responses(robot_id);
+
+-- 3. 함수 실행 권한 부여
+GRANT EXECUTE ON FUNCTION mbti_distinct_counts() TO anon;
+GRANT EXECUTE ON FUNCTION mbti_distinct_counts() TO authenticated;
+
+-- 4. 함수 테스트
+SELECT * FROM mbti_distinct_counts();
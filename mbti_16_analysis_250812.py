@@ -4,21 +4,32 @@ import numpy as np
 import plotly.express as px
 import plotly.graph_objects as go
 from plotly.subplots import make_subplots
-import seaborn as sns
-import matplotlib.pyplot as plt
 from datetime import datetime, timedelta
+from functools import partial
 import pytz
 import time
 import io
 import json
 import os
+import uuid
 from dotenv import load_dotenv
-from supabase import create_client
-from scipy.stats import chi2_contingency, ttest_ind, f_oneway, spearmanr, pearsonr
-from sklearn.cluster import KMeans
-from sklearn.decomposition import PCA
-from sklearn.preprocessing import StandardScaler
-import networkx as nx
+from mbti_db import (
+    SCHEMA_PROBES, count_rows, create_compressed_client, delete_responses_by_id, fetch_data_version,
+    fetch_response_page, fetch_table_stats, load_all_responses, probe_schema_capabilities, projection_columns,
+    response_filters, rpc_dedup_responses, unavailable_columns, upsert_response,
+)
+from mbti_snapshot import sync_snapshot
+from mbti_questions import fill_responses_from_codes, load_registry
+from mbti_guides import load_guides
+from mbti_frame import observed_counts, observed_values, prepare_analytics_frame
+from mbti_cube import build_cube, cube_columns, fetch_aggregate, server_cube, sync_cube
+from mbti_markov import build_model, sync_model, transition_probabilities
+from mbti_transitions import FLIP_COLUMNS, build_transition_tables, build_transitions
+from mbti_types import (
+    AXIS_LABELS, SHARED_LETTERS, TEMPERAMENT_MASKS, TEMPERAMENTS, TYPE_CODES, TYPES as MBTI_TYPES, TYPES_WITH,
+    axis_flips, count_matrix, encode_types, pole_ratio, temperament_counts,
+)
+# scipy, networkx 등 분석 전용 의존성은 사용하는 함수 안에서 처음 호출될 때 로드 (bench_startup.py 참고)
 
 # 환경 변수 로드
 load_dotenv()
@@ -39,58 +50,57 @@ MBTI_COLORS = {
     'ISFJ': '#26A69A', 'ISFP': '#66BB6A', 'ISTJ': '#42A5F5', 'ISTP': '#78909C'
 }
 
+# 장소별 질문 세트 레지스트리 (question_banks/v1.json, 프로세스당 1회 로드)
+QUESTION_REGISTRY = load_registry()
+# 장소 × MBTI 가이드·조언 문구 (guides/v1.json, 프로세스당 1회 생성)
+GUIDE_CONTENT = load_guides()
+
 # Supabase 설정
 SUPABASE_URL = os.getenv("SUPABASE_URL")
 SUPABASE_KEY = os.getenv("SUPABASE_KEY")
 
-# 디버깅: 환경 변수 확인
-if not SUPABASE_URL:
-    print("⚠️ SUPABASE_URL이 설정되지 않았습니다.")
-if not SUPABASE_KEY:
-    print("⚠️ SUPABASE_KEY가 설정되지 않았습니다.")
-
-try:
-    supabase = create_client(SUPABASE_URL, SUPABASE_KEY) if SUPABASE_URL and SUPABASE_KEY else None
-    if supabase:
+@st.cache_resource(show_spinner=False)
+def init_supabase():
+    """Supabase 클라이언트 생성 및 스키마 기능 확인 (프로세스당 1회)"""
+    capabilities = {name: False for name in SCHEMA_PROBES}
+    
+    # 디버깅: 환경 변수 확인
+    if not SUPABASE_URL:
+        print("⚠️ SUPABASE_URL이 설정되지 않았습니다.")
+    if not SUPABASE_KEY:
+        print("⚠️ SUPABASE_KEY가 설정되지 않았습니다.")
+    
+    try:
+        client = create_compressed_client(SUPABASE_URL, SUPABASE_KEY) if SUPABASE_URL and SUPABASE_KEY else None
+        if not client:
+            print("❌ Supabase 클라이언트 생성에 실패했습니다.")
+            return None, capabilities
         print("✅ Supabase 클라이언트가 성공적으로 생성되었습니다.")
-        # 테이블 존재 여부 확인 및 생성
-        try:
-            # responses 테이블 확인
-            supabase.table("responses").select("id").limit(1).execute()
-            print("✅ responses 테이블이 존재합니다.")
-            
-            # location 컬럼 확인 및 자동 추가
+        
+        # 테이블·컬럼 존재 여부 확인
+        capabilities = probe_schema_capabilities(client)
+        
+        # location 컬럼 자동 추가
+        if capabilities["responses"] and not capabilities["location"]:
+            print("⚠️ location 컬럼이 없습니다. 자동으로 추가를 시도합니다...")
             try:
-                supabase.table("responses").select("location").limit(1).execute()
-                print("✅ location 컬럼이 존재합니다.")
-            except Exception as location_error:
-                if "location" in str(location_error).lower():
-                    print("⚠️ location 컬럼이 없습니다. 자동으로 추가를 시도합니다...")
-                    try:
-                        # RPC를 통해 컬럼 추가 시도
-                        supabase.rpc('add_location_column').execute()
-                        print("✅ location 컬럼이 성공적으로 추가되었습니다.")
-                    except Exception as add_error:
-                        print(f"❌ 자동 컬럼 추가 실패: {add_error}")
-                        print("수동으로 다음 SQL을 실행해주세요:")
-                        print("ALTER TABLE public.responses ADD COLUMN location TEXT DEFAULT '일반';")
-                else:
-                    print(f"⚠️ location 컬럼 확인 중 오류: {location_error}")
-                    
-        except Exception as e:
-            print(f"⚠️ responses 테이블 확인 중 오류: {e}")
-            
-        try:
-            # user_robots 테이블 확인
-            supabase.table("user_robots").select("id").limit(1).execute()
-            print("✅ user_robots 테이블이 존재합니다.")
-        except Exception as e:
-            print(f"⚠️ user_robots 테이블 확인 중 오류: {e}")
-    else:
-        print("❌ Supabase 클라이언트 생성에 실패했습니다.")
-except Exception as e:
-    print(f"❌ Supabase 클라이언트 생성 중 오류: {e}")
-    supabase = None
+                # RPC를 통해 컬럼 추가 시도
+                client.rpc('add_location_column').execute()
+                capabilities["location"] = True
+                print("✅ location 컬럼이 성공적으로 추가되었습니다.")
+            except Exception as add_error:
+                print(f"❌ 자동 컬럼 추가 실패: {add_error}")
+                print("수동으로 다음 SQL을 실행해주세요:")
+                print("ALTER TABLE public.responses ADD COLUMN location TEXT DEFAULT '일반';")
+        
+        for name, available in capabilities.items():
+            print(f"{'✅' if available else '⚠️'} {name}: {'사용 가능' if available else '사용 불가'}")
+        return client, capabilities
+    except Exception as e:
+        print(f"❌ Supabase 클라이언트 생성 중 오류: {e}")
+        return None, capabilities
+
+supabase, SCHEMA_CAPABILITIES = init_supabase()
 
 # 세션 상태 초기화
 def init_session_state():
@@ -121,7 +131,9 @@ def reset_diagnosis_session():
     st.session_state.saved_result = False
     st.session_state.current_diagnosis_id = None
     st.session_state.responses = {}
+    st.session_state.tie_responses = {}
     st.session_state.force_new_diagnosis = False
+    st.session_state.pop('recent_diagnosis', None)
 
 # CSS 스타일 설정
 def setup_styles():
@@ -489,38 +501,196 @@ def save_response(user_id, responses, mbti, scores, profile, robot_id):
             "timestamp": datetime.now(pytz.timezone("Asia/Seoul")).isoformat()
         }
         
-        # location 컬럼이 있는지 확인하고 추가
-        try:
-            # 먼저 location 컬럼 없이 테스트 쿼리
-            test_record = record.copy()
-            test_record["location"] = st.session_state.get('selected_location', '일반')
-            supabase.table("responses").insert(test_record).execute()
-            return True
-        except Exception as location_error:
-            # location 컬럼이 없는 경우, location 없이 저장 시도
-            if "location" in str(location_error).lower():
-                # location 컬럼이 없는 경우 조용히 처리 (경고 메시지 제거)
-                supabase.table("responses").insert(record).execute()
-                return True
-            else:
-                raise location_error
+        # location 컬럼이 있는 스키마에서만 추가
+        if SCHEMA_CAPABILITIES.get("location"):
+            record["location"] = st.session_state.get('selected_location', '일반')
+        
+        supabase.table("responses").insert(record).execute()
+        invalidate_response_cache()
+        return True
     except Exception as e:
         st.error(f"응답 저장 실패: {e}")
         return False
 
-def load_responses():
-    """모든 응답 데이터 로드"""
+def load_responses(profile="admin-full", filters=None):
+    """응답 데이터 로드 (id 키셋 페이지네이션, 프로필별 컬럼 선택)"""
     try:
         if not supabase:
             st.error("데이터베이스 연결이 없습니다.")
             return pd.DataFrame()
             
-        res = supabase.table("responses").select("*").execute()
-        return pd.DataFrame(res.data) if res.data else pd.DataFrame()
+        columns = projection_columns(profile, unavailable_columns(SCHEMA_CAPABILITIES))
+        return load_all_responses(supabase, columns, filters=filters)
     except Exception as e:
         st.error(f"데이터 로드 실패: {e}")
         return pd.DataFrame()
 
+def load_export_responses(filters=None):
+    """내보내기·백업용 응답 (answer_codes만 저장된 행은 응답 원문으로 복원)"""
+    return fill_responses_from_codes(load_responses("export", filters=filters))
+
+@st.cache_data(show_spinner=False, ttl=5)
+def get_data_version():
+    """응답 데이터 버전 토큰 조회 (max(id), 행 수, 마지막 수정 시각, 5초간 공유)
+
+    updated_at 컬럼(add_updated_at_column.sql)이 있으면 재채점 등 기존 행 UPDATE도 버전 변경으로 감지합니다.
+    """
+    try:
+        if not supabase:
+            return None
+        return fetch_data_version(supabase, track_updates=SCHEMA_CAPABILITIES.get("updated_at", False))
+    except Exception:
+        return None
+
+def load_snapshot_responses(profile="analytics", data_version=None):
+    """로컬 Parquet 스냅샷을 증분 동기화한 뒤 응답 데이터 반환 (data_version의 수정 시각이 바뀌면 수정된 행 교체)"""
+    try:
+        if not supabase:
+            st.error("데이터베이스 연결이 없습니다.")
+            return pd.DataFrame()
+        columns = projection_columns(profile, unavailable_columns(SCHEMA_CAPABILITIES))
+        last_updated = data_version[2] if data_version else None
+        return sync_snapshot(supabase, name=profile, columns=columns, last_updated=last_updated)
+    except Exception as e:
+        # 스냅샷을 쓸 수 없는 환경(읽기 전용 디스크, pyarrow 미설치 등)은 직접 로드로 대체
+        print(f"⚠️ 스냅샷 동기화 실패, 직접 로드로 대체합니다: {e}")
+        return load_responses(profile)
+
+@st.cache_data(show_spinner=False, max_entries=4)
+def _load_responses_for_version(data_version, profile):
+    """데이터 버전·컬럼 프로필별 응답 데이터 캐시 (모든 세션이 공유, analytics는 정규화 프레임)"""
+    if profile == "analytics":
+        return prepare_analytics_frame(load_snapshot_responses(profile, data_version))
+    if profile == "export":
+        return load_export_responses()
+    return load_responses(profile)
+
+def load_shared_responses(profile="analytics"):
+    """데이터 버전이 바뀐 경우에만 다시 로드하는 공유 캐시 로더
+
+    analytics 프로필은 timestamp 파싱·파생 컬럼·category 변환을 마친 프레임(mbti_frame.py)을 반환하며,
+    분석 함수는 이를 읽기 전용으로 사용합니다.
+    """
+    data_version = get_data_version()
+    if data_version is None:
+        if profile == "export":
+            return load_export_responses()
+        df = load_responses(profile)
+        return prepare_analytics_frame(df) if profile == "analytics" else df
+    df = _load_responses_for_version(data_version, profile)
+    if df.empty:
+        # 로드 실패로 빈 결과가 캐시되지 않도록 즉시 무효화
+        invalidate_response_cache()
+    return df
+
+def invalidate_response_cache():
+    """저장·삭제 직후 공유 응답 캐시 무효화"""
+    get_data_version.clear()
+    _load_responses_for_version.clear()
+    _count_cube_for_version.clear()
+    _count_cube_for_frame.clear()
+    _server_aggregate_for_version.clear()
+    _response_page_for_version.clear()
+    _response_count_for_version.clear()
+    _user_export_for_version.clear()
+    _transition_tables_for_version.clear()
+    _transition_model_for_version.clear()
+    get_table_stats.clear()
+
+@st.cache_data(show_spinner=False, max_entries=4)
+def _transition_tables_for_version(data_version, row_count, _df):
+    """데이터 버전·행 수(중복 제거 여부)별 전이 표 캐시 (모든 세션이 공유)"""
+    return build_transition_tables(_df)
+
+def load_transition_tables(df):
+    """전체 조합의 MBTI 전이 목록·16 × 16 전이 행렬·축별 뒤집힘 비율 (mbti_transitions.py)"""
+    data_version = get_data_version()
+    if data_version is None:
+        return build_transition_tables(df)
+    return _transition_tables_for_version(data_version, len(df), df)
+
+@st.cache_data(show_spinner=False, max_entries=8)
+def _transition_model_for_version(data_version, split):
+    """데이터 버전·split별 마르코프 전이 모델 (저장된 모델에 신규 진단만 반영)"""
+    return sync_model(supabase, split, data_version=data_version)
+
+def load_transition_model(df, split=None):
+    """전체 로봇의 MBTI 전이 모델 (mbti_markov.py, DB 연결이 없으면 df로 직접 계산)"""
+    data_version = get_data_version()
+    if data_version is None:
+        return build_model(df, split)
+    try:
+        return _transition_model_for_version(data_version, split)
+    except Exception as e:
+        print(f"⚠️ 전이 모델 동기화 실패, 직접 계산으로 대체합니다: {e}")
+        return build_model(df, split)
+
+@st.cache_data(show_spinner=False, max_entries=32)
+def _response_page_for_version(data_version, filters, after_id, page_size):
+    """데이터 버전·조건·커서별 조회 결과 한 페이지 (조건은 PostgREST 필터로 서버에서 적용)"""
+    columns = projection_columns("analytics", unavailable_columns(SCHEMA_CAPABILITIES))
+    return prepare_analytics_frame(fetch_response_page(supabase, columns, page_size, after_id, filters=list(filters)))
+
+@st.cache_data(show_spinner=False, max_entries=32)
+def _response_count_for_version(data_version, filters):
+    """데이터 버전·조건별 행 수 (HEAD count)"""
+    return count_rows(supabase, filters=list(filters))
+
+@st.cache_data(show_spinner=False, max_entries=16)
+def _user_export_for_version(data_version, user_id):
+    """데이터 버전·사용자별 내보내기용 응답 (응답 원문 포함 export 프로필)"""
+    return load_export_responses(filters=[("eq", "user_id", user_id)])
+
+def load_user_export(user_id):
+    """사용자 데이터 다운로드용 응답 (데이터 버전이 바뀌기 전까지 다시 조회하지 않음)"""
+    data_version = get_data_version()
+    if data_version is None:
+        return load_export_responses(filters=[("eq", "user_id", user_id)])
+    export_df = _user_export_for_version(data_version, user_id)
+    if export_df.empty:
+        # 로드 실패로 빈 결과가 캐시되지 않도록 무효화
+        _user_export_for_version.clear()
+    return export_df
+
+@st.cache_data(ttl=60, show_spinner=False)
+def get_table_stats(count_method="exact"):
+    """테이블 통계 (행 수는 HEAD count, 고유 사용자·로봇 수는 mbti_distinct_counts RPC)"""
+    return fetch_table_stats(supabase, count_method)
+
+@st.cache_data(show_spinner=False, max_entries=4)
+def _count_cube_for_version(data_version):
+    """데이터 버전별 전체 진단 건수 큐브 (저장된 큐브에 신규 진단 건수만 더함)"""
+    return sync_cube(supabase, cube_columns(unavailable_columns(SCHEMA_CAPABILITIES)), data_version=data_version)
+
+@st.cache_data(show_spinner=False, max_entries=64)
+def _server_aggregate_for_version(data_version, kind, start_date=None, end_date=None, group_col=None):
+    """데이터 버전·기간·그룹별 서버 집계 RPC 결과 캐시 (RPC가 없으면 None)"""
+    return fetch_aggregate(supabase, kind, start_date, end_date, group_col)
+
+@st.cache_data(show_spinner=False, max_entries=4)
+def _count_cube_for_frame(data_version, row_count, _df):
+    """필터링된 DataFrame의 건수 큐브 (데이터 버전·행 수별 캐시)"""
+    return build_cube(_df)
+
+def load_count_cube(df, full_data=True):
+    """대시보드 패널이 조회하는 진단 건수 큐브 (mbti_cube.py)
+
+    full_data: df가 전체 데이터(중복 제거 안 함)이면 서버 집계 RPC(create_analytics_rpc_functions.sql)로
+    조회하고, RPC가 없으면 저장된 큐브를 증분 갱신해 사용합니다. 아니면 df로 큐브를 만듭니다.
+    """
+    data_version = get_data_version()
+    if data_version is None:
+        return build_cube(df)
+    if full_data:
+        try:
+            cube = server_cube(partial(_server_aggregate_for_version, data_version))
+            if cube is not None:
+                return cube
+            return _count_cube_for_version(data_version)
+        except Exception as e:
+            print(f"⚠️ 건수 큐브 동기화 실패, 직접 집계로 대체합니다: {e}")
+    return _count_cube_for_frame(data_version, len(df), df)
+
 def reset_all_data():
     """전체 데이터 리셋"""
     try:
@@ -547,6 +717,7 @@ def reset_all_data():
         except Exception as e:
             st.warning(f"user_robots 테이블 삭제 중 오류: {e}")
         
+        invalidate_response_cache()
         return True, f"성공적으로 삭제되었습니다. (진단 데이터: {deleted_responses}건, 로봇 데이터: {deleted_robots}건)"
         
     except Exception as e:
@@ -558,14 +729,11 @@ def get_user_data_summary():
         if not supabase:
             return {"error": "데이터베이스 연결이 없습니다."}
         
-        # responses 테이블에서 데이터 조회
-        users = supabase.table("responses").select("user_id").execute()
-        robots = supabase.table("user_robots").select("*").execute()
-        
+        stats = get_table_stats()
         return {
-            "total_users": len(set([u['user_id'] for u in users.data])) if users.data else 0,
-            "total_responses": len(users.data) if users.data else 0,
-            "total_robots": len(robots.data) if robots.data else 0
+            "total_users": stats["total_users"],
+            "total_responses": stats["total_responses"],
+            "total_robots": stats["total_robots"]
         }
     except Exception as e:
         return {"error": str(e)}
@@ -579,6 +747,7 @@ def delete_user_data(user_id):
         # 사용자의 모든 데이터 삭제
         supabase.table("responses").delete().eq("user_id", user_id).execute()
         supabase.table("user_robots").delete().eq("user_id", user_id).execute()
+        invalidate_response_cache()
         
         return True, f"사용자 {user_id}의 데이터가 삭제되었습니다."
     except Exception as e:
@@ -652,176 +821,32 @@ def save_robot(user_id, robot_name, robot_description=""):
 
 # MBTI 계산 함수들
 def load_questions(location="일반"):
-    """장소별 특화된 질문 데이터 로드"""
-    base_questions = [
-        {"id":"Q1","text":"로봇이 먼저 인사할 때 당신의 반응은?",
-         "choices":["즉시 대화에 참여한다","잠시 상황을 관찰한다"],"axes":("E","I")},
-        {"id":"Q2","text":"여러 사람과 로봇을 사용할 때 선호하는 방식은?",
-         "choices":["모두가 함께 참여한다","개인적으로 1:1 상호작용한다"],"axes":("E","I")},
-        {"id":"Q3","text":"로봇과 대화할 때 당신의 스타일은?",
-         "choices":["적극적으로 질문하고 의견을 표현한다","로봇의 설명을 듣고 생각한 후 반응한다"],"axes":("E","I")},
-        {"id":"Q4","text":"로봇의 안내 방식을 선호하는 스타일은?",
-         "choices":["단계별로 구체적인 세부사항을 제공한다","전체적인 맥락과 의미를 먼저 설명한다"],"axes":("S","N")},
-        {"id":"Q5","text":"새로운 로봇 기능을 배울 때 선호하는 방법은?",
-         "choices":["실제로 직접 조작해보며 학습한다","개념과 원리를 먼저 이해한 후 시도한다"],"axes":("S","N")},
-        {"id":"Q6","text":"로봇에게 작업을 요청할 때 선호하는 방식은?",
-         "choices":["구체적이고 명확한 지시사항을 준다","일반적인 목표와 방향성만 제시한다"],"axes":("S","N")},
-        {"id":"Q7","text":"로봇과 의사결정을 할 때 중시하는 것은?",
-         "choices":["논리적 분석과 객관적 데이터","감정적 공감과 주관적 경험"],"axes":("T","F")},
-        {"id":"Q8","text":"로봇이 실수를 했을 때 당신의 반응은?",
-         "choices":["문제를 분석하고 해결책을 찾는다","로봇의 감정을 고려하여 대화한다"],"axes":("T","F")},
-        {"id":"Q9","text":"로봇에게 피드백을 줄 때 선호하는 스타일은?",
-         "choices":["정확하고 구체적인 개선점을 제시한다","긍정적 격려와 함께 조언한다"],"axes":("T","F")},
-        {"id":"Q10","text":"로봇과의 일정 관리에서 선호하는 방식은?",
-         "choices":["미리 계획하고 체계적으로 진행한다","상황에 따라 유연하게 조정한다"],"axes":("J","P")},
-        {"id":"Q11","text":"로봇과 새로운 활동을 할 때의 접근법은?",
-         "choices":["정해진 규칙과 절차를 따른다","즉흥적이고 창의적으로 시도한다"],"axes":("J","P")},
-        {"id":"Q12","text":"로봇과의 상호작용 결과를 정리할 때 선호하는 방식은?",
-         "choices":["명확한 요약과 결론을 도출한다","다양한 관점과 가능성을 제시한다"],"axes":("J","P")}
-    ]
-    
-    # 장소별 특화 질문
-    location_specific_questions = {
-        "병원": [
-            {"id":"H1","text":"병원에서 로봇이 환자 정보를 확인할 때 당신의 반응은?",
-             "choices":["즉시 필요한 정보를 제공한다","먼저 로봇의 신뢰성을 확인한다"],"axes":("E","I")},
-            {"id":"H2","text":"로봇이 의료진과 함께 있을 때 선호하는 상호작용은?",
-             "choices":["로봇과 의료진이 함께 설명한다","로봇은 보조 역할만 한다"],"axes":("E","I")},
-            {"id":"H3","text":"로봇이 치료 과정을 안내할 때 선호하는 방식은?",
-             "choices":["구체적인 치료 단계와 예상 시간을 알려준다","전체적인 치료 목표와 방향성을 설명한다"],"axes":("S","N")},
-            {"id":"H4","text":"로봇이 환자의 상태를 모니터링할 때 중시하는 것은?",
-             "choices":["정확한 수치와 객관적 데이터","환자의 편안함과 주관적 느낌"],"axes":("T","F")},
-            {"id":"H5","text":"로봇이 응급 상황을 감지했을 때 당신의 반응은?",
-             "choices":["즉시 의료진에게 연락하고 대응한다","상황을 파악한 후 신중하게 대응한다"],"axes":("J","P")}
-        ],
-        "도서관": [
-            {"id":"L1","text":"도서관에서 로봇이 도서 검색을 도와줄 때 선호하는 방식은?",
-             "choices":["구체적인 키워드와 조건을 입력한다","일반적인 주제나 관심사를 말한다"],"axes":("S","N")},
-            {"id":"L2","text":"로봇이 독서 추천을 할 때 중시하는 것은?",
-             "choices":["인기도와 평점 같은 객관적 지표","개인의 취향과 감정적 연결"],"axes":("T","F")},
-            {"id":"L3","text":"도서관에서 로봇과 함께 공부할 때 선호하는 환경은?",
-             "choices":["조용하고 집중할 수 있는 개인 공간","다른 사람들과 함께하는 학습 공간"],"axes":("E","I")},
-            {"id":"L4","text":"로봇이 도서 대출/반납을 도와줄 때 당신의 스타일은?",
-             "choices":["미리 계획하고 한 번에 처리한다","필요할 때마다 개별적으로 처리한다"],"axes":("J","P")},
-            {"id":"L5","text":"로봇이 도서관 이용 규칙을 안내할 때 선호하는 방식은?",
-             "choices":["명확하고 구체적인 규칙을 제시한다","전체적인 이용 문화와 분위기를 설명한다"],"axes":("S","N")}
-        ],
-        "쇼핑몰": [
-            {"id":"M1","text":"쇼핑몰에서 로봇이 상품을 추천할 때 선호하는 방식은?",
-             "choices":["구체적인 상품 정보와 가격을 제공한다","전체적인 스타일과 트렌드를 제안한다"],"axes":("S","N")},
-            {"id":"M2","text":"로봇이 할인 정보를 알려줄 때 중시하는 것은?",
-             "choices":["정확한 할인율과 절약 금액","특별한 기회와 즐거운 경험"],"axes":("T","F")},
-            {"id":"M3","text":"쇼핑몰에서 로봇과 함께 쇼핑할 때 선호하는 방식은?",
-             "choices":["미리 목록을 만들고 계획적으로 쇼핑한다","즉흥적으로 발견한 상품을 구매한다"],"axes":("J","P")},
-            {"id":"M4","text":"로봇이 매장 위치를 안내할 때 선호하는 설명은?",
-             "choices":["구체적인 층수와 위치 번호를 알려준다","전체적인 매장 구조와 분위기를 설명한다"],"axes":("S","N")},
-            {"id":"M5","text":"로봇이 고객 서비스를 제공할 때 당신의 반응은?",
-             "choices":["즉시 필요한 서비스를 요청한다","먼저 로봇의 서비스 범위를 확인한다"],"axes":("E","I")}
-        ],
-        "학교": [
-            {"id":"S1","text":"학교에서 로봇이 수업을 보조할 때 선호하는 방식은?",
-             "choices":["구체적인 학습 목표와 단계를 제시한다","전체적인 학습 흐름과 맥락을 설명한다"],"axes":("S","N")},
-            {"id":"S2","text":"로봇이 학생들의 질문에 답할 때 중시하는 것은?",
-             "choices":["정확하고 객관적인 정보 제공","학생의 이해도와 감정적 상태 고려"],"axes":("T","F")},
-            {"id":"S3","text":"로봇과 함께 그룹 활동을 할 때 선호하는 역할은?",
-             "choices":["활발하게 의견을 제시하고 참여한다","조용히 관찰하고 필요할 때만 참여한다"],"axes":("E","I")},
-            {"id":"S4","text":"로봇이 과제를 관리할 때 선호하는 방식은?",
-             "choices":["명확한 마감일과 체크리스트를 제공한다","유연한 일정과 창의적 접근을 권장한다"],"axes":("J","P")},
-            {"id":"S5","text":"로봇이 학교 생활을 안내할 때 당신의 반응은?",
-             "choices":["즉시 필요한 정보를 요청한다","전체적인 학교 문화를 먼저 이해한다"],"axes":("E","I")}
-        ],
-        "공항": [
-            {"id":"A1","text":"공항에서 로봇이 수하물을 도와줄 때 선호하는 방식은?",
-             "choices":["구체적인 무게와 크기 제한을 확인한다","전체적인 수하물 정책을 이해한다"],"axes":("S","N")},
-            {"id":"A2","text":"로봇이 보안 검사를 안내할 때 중시하는 것은?",
-             "choices":["정확한 절차와 규정 준수","편안하고 스트레스 없는 경험"],"axes":("T","F")},
-            {"id":"A3","text":"로봇이 항공편 정보를 제공할 때 선호하는 설명은?",
-             "choices":["구체적인 시간과 게이트 정보를 제공한다","전체적인 여행 일정과 대안을 제시한다"],"axes":("S","N")},
-            {"id":"A4","text":"로봇과 함께 공항을 이용할 때 당신의 스타일은?",
-             "choices":["미리 계획하고 시간에 맞춰 이동한다","상황에 따라 유연하게 대응한다"],"axes":("J","P")},
-            {"id":"A5","text":"로봇이 긴급 상황을 안내할 때 당신의 반응은?",
-             "choices":["즉시 지시사항을 따르고 대응한다","상황을 파악한 후 신중하게 판단한다"],"axes":("J","P")}
-        ]
-    }
-    
-    # 선택된 장소의 특화 질문 추가
-    if location in location_specific_questions:
-        return base_questions + location_specific_questions[location]
-    else:
-        return base_questions
+    """장소별 특화된 질문 데이터 로드 (question_banks 레지스트리, 불변)"""
+    return QUESTION_REGISTRY[location].questions
 
 def load_tie_questions(location="일반"):
-    """장소별 특화된 타이브레이커 질문 로드"""
-    base_tie_questions = {
-        "EI": {"axes":("E","I"), "text":"로봇과 함께하는 활동에서 선호하는 환경은?", "choices":["사람들과 함께하는 분위기","조용하고 집중할 수 있는 공간"]},
-        "SN": {"axes":("S","N"), "text":"로봇의 미래 기능에 대한 관심은?", "choices":["현재 실용적인 기능에 집중","미래의 혁신적 가능성에 관심"]},
-        "TF": {"axes":("T","F"), "text":"로봇과의 관계에서 중시하는 것은?", "choices":["효율성과 성과","감정적 연결과 이해"]},
-        "JP": {"axes":("J","P"), "text":"로봇과의 목표 달성에서 선호하는 방식은?", "choices":["계획적이고 체계적인 접근","유연하고 적응적인 방법"]}
-    }
-    
-    # 장소별 특화 타이브레이커 질문
-    location_tie_questions = {
-        "병원": {
-            "EI": {"axes":("E","I"), "text":"병원에서 로봇과 상호작용할 때 선호하는 방식은?", "choices":["다른 환자들과 함께 정보를 공유한다","개인적으로 조용히 상담한다"]},
-            "SN": {"axes":("S","N"), "text":"의료 로봇의 정보 제공에서 중시하는 것은?", "choices":["구체적인 검사 결과와 수치","전체적인 건강 상태와 예후"]},
-            "TF": {"axes":("T","F"), "text":"로봇이 의료 서비스를 제공할 때 중시하는 것은?", "choices":["정확한 진단과 치료 효과","환자의 편안함과 심리적 안정"]},
-            "JP": {"axes":("J","P"), "text":"로봇과의 치료 계획에서 선호하는 방식은?", "choices":["명확한 치료 단계와 일정","상황에 따른 유연한 조정"]}
-        },
-        "도서관": {
-            "EI": {"axes":("E","I"), "text":"도서관에서 로봇과 함께할 때 선호하는 환경은?", "choices":["다른 이용자들과 함께하는 공간","개인적으로 집중할 수 있는 공간"]},
-            "SN": {"axes":("S","N"), "text":"로봇의 도서 추천에서 중시하는 것은?", "choices":["구체적인 장르와 저자 정보","전체적인 독서 경험과 감동"]},
-            "TF": {"axes":("T","F"), "text":"로봇이 학습을 도와줄 때 중시하는 것은?", "choices":["정확한 정보와 객관적 사실","개인의 관심과 감정적 연결"]},
-            "JP": {"axes":("J","P"), "text":"로봇과의 학습 계획에서 선호하는 방식은?", "choices":["체계적인 학습 일정과 목표","자유로운 탐구와 발견"]}
-        },
-        "쇼핑몰": {
-            "EI": {"axes":("E","I"), "text":"쇼핑몰에서 로봇과 상호작용할 때 선호하는 방식은?", "choices":["다른 쇼핑객들과 함께 정보를 공유한다","개인적으로 조용히 상담한다"]},
-            "SN": {"axes":("S","N"), "text":"로봇의 상품 추천에서 중시하는 것은?", "choices":["구체적인 상품 정보와 가격","전체적인 스타일과 트렌드"]},
-            "TF": {"axes":("T","F"), "text":"로봇이 쇼핑을 도와줄 때 중시하는 것은?", "choices":["효율적인 구매와 절약","즐거운 쇼핑 경험과 만족"]},
-            "JP": {"axes":("J","P"), "text":"로봇과의 쇼핑 계획에서 선호하는 방식은?", "choices":["미리 계획하고 목적적으로 쇼핑한다","즉흥적으로 발견한 상품을 구매한다"]}
-        },
-        "학교": {
-            "EI": {"axes":("E","I"), "text":"학교에서 로봇과 함께할 때 선호하는 학습 환경은?", "choices":["다른 학생들과 함께하는 그룹 활동","개인적으로 집중할 수 있는 환경"]},
-            "SN": {"axes":("S","N"), "text":"로봇의 학습 안내에서 중시하는 것은?", "choices":["구체적인 학습 목표와 단계","전체적인 학습 흐름과 맥락"]},
-            "TF": {"axes":("T","F"), "text":"로봇이 교육을 도와줄 때 중시하는 것은?", "choices":["정확한 지식과 객관적 평가","학생의 관심과 감정적 성장"]},
-            "JP": {"axes":("J","P"), "text":"로봇과의 학습 계획에서 선호하는 방식은?", "choices":["체계적인 학습 일정과 평가","자유로운 탐구와 창의적 활동"]}
-        },
-        "공항": {
-            "EI": {"axes":("E","I"), "text":"공항에서 로봇과 상호작용할 때 선호하는 방식은?", "choices":["다른 여행객들과 함께 정보를 공유한다","개인적으로 조용히 상담한다"]},
-            "SN": {"axes":("S","N"), "text":"로봇의 여행 안내에서 중시하는 것은?", "choices":["구체적인 시간과 절차 정보","전체적인 여행 경험과 편의"]},
-            "TF": {"axes":("T","F"), "text":"로봇이 여행 서비스를 제공할 때 중시하는 것은?", "choices":["정확한 정보와 효율적인 서비스","편안하고 스트레스 없는 경험"]},
-            "JP": {"axes":("J","P"), "text":"로봇과의 여행 계획에서 선호하는 방식은?", "choices":["미리 계획하고 시간에 맞춰 진행한다","상황에 따라 유연하게 대응한다"]}
-        }
-    }
-    
-    # 선택된 장소의 특화 타이브레이커 질문 사용
-    if location in location_tie_questions:
-        return location_tie_questions[location]
-    else:
-        return base_tie_questions
-
-def compute_scores(responses):
-    """점수 계산"""
-    questions = load_questions(st.session_state.selected_location)
-    scores = {axis: 0 for axis in ['E','I','S','N','T','F','J','P']}
-    for q in questions:
-        choice = responses.get(q['id'])
-        if choice is None:
-            return None
-        pos, neg = q['axes']
-        scores[pos if choice == q['choices'][0] else neg] += 1
-    return scores
-
-def resolve_ties(scores):
-    """동점 해결"""
-    tie_questions = load_tie_questions(st.session_state.selected_location)
+    """장소별 특화된 타이브레이커 질문 로드 (question_banks 레지스트리, 불변)"""
+    return QUESTION_REGISTRY[location].tie_questions
+
+def compute_scores(responses, location=None):
+    """점수 계산 (질문 × 축 행렬 곱으로 채점, 미응답 문항이 있으면 None)"""
+    location = location if location is not None else st.session_state.selected_location
+    return QUESTION_REGISTRY[location].score(responses)
+
+def tie_prone_axes(location="일반"):
+    """문항 수가 짝수여서 동점이 나올 수 있는 축 목록 (설문 폼에 타이브레이커 문항을 미리 포함하기 위함)"""
+    return QUESTION_REGISTRY[location].tie_prone_axes
+
+def resolve_ties(scores, tie_responses, location=None):
+    """동점 해결 (폼에서 함께 제출된 타이브레이커 응답 사용, 필요한 응답이 없으면 None)"""
+    tie_questions = load_tie_questions(location if location is not None else st.session_state.selected_location)
+    scores = dict(scores)
     for axis, cfg in tie_questions.items():
         a, b = cfg['axes']
         if scores[a] == scores[b]:
-            tie_choices = ["- 선택하세요 -"] + list(cfg['choices'])
-            choice = st.radio(cfg["text"], tie_choices, index=0, key=f"tie_{axis}")
-            if choice == "- 선택하세요 -":
-                st.warning("추가 설문 문항 응답을 선택해야 진단이 완성됩니다.")
-                st.stop()
+            choice = tie_responses.get(axis)
+            if choice is None:
+                return None
             scores[a if choice == cfg['choices'][1] else b] += 1
     return scores
 
@@ -851,9 +876,9 @@ def create_score_chart(scores):
     fig.update_layout(height=300)
     return fig
 
-def create_trend_chart(df, chart_type="line"):
-    """트렌드 차트 생성"""
-    if df.empty:
+def create_trend_chart(daily_mbti, chart_type="line"):
+    """트렌드 차트 생성 (daily_mbti: 건수 큐브의 일별 MBTI 진단 수)"""
+    if daily_mbti.empty:
         # 빈 데이터일 때 안내 메시지가 포함된 차트 생성
         fig = go.Figure()
         fig.add_annotation(
@@ -870,10 +895,6 @@ def create_trend_chart(df, chart_type="line"):
         )
         return fig
     
-    # 날짜 형식 개선
-    df['date'] = pd.to_datetime(df['date'])
-    daily_mbti = df.groupby(['date', 'mbti']).size().reset_index(name='count')
-    
     # 날짜를 더 읽기 쉽게 포맷팅
     daily_mbti['date_formatted'] = daily_mbti['date'].dt.strftime('%Y년 %m월 %d일')
     
@@ -927,7 +948,7 @@ def create_trend_chart(df, chart_type="line"):
 
 def create_correlation_heatmap(df):
     """상관관계 히트맵 생성"""
-    mbti_dummies = pd.get_dummies(df['mbti'])
+    mbti_dummies = pd.get_dummies(observed_values(df['mbti']))
     corr = mbti_dummies.corr()
     fig = px.imshow(corr, title="MBTI 유형 간 상관행렬", 
                    aspect="auto", color_continuous_scale="RdBu")
@@ -939,36 +960,25 @@ def analyze_heatmap_patterns(group_df, group_col):
     interpretations = []
     
     try:
-        # 각 그룹별 최고/최저 MBTI 찾기
-        for group in group_df.index:
-            group_data = group_df.loc[group]
-            max_mbti = group_data.idxmax()
-            max_value = group_data.max()
-            min_mbti = group_data.idxmin()
-            min_value = group_data.min()
-            
-            # 비율 계산
-            total = group_data.sum()
-            max_ratio = (max_value / total * 100) if total > 0 else 0
-            
-            if max_ratio > 30:  # 30% 이상이면 주목할 만한 패턴
+        # 그룹 × 16 건수 행렬 (TYPES 순서)
+        counts = count_matrix(group_df)
+        totals = counts.sum(axis=1)
+        top_ratio = np.divide(counts.max(axis=1) * 100.0, totals, out=np.zeros(len(totals)), where=totals > 0)
+        
+        # 각 그룹별 최고 MBTI (30% 이상이면 주목할 만한 패턴)
+        for group, top_code, max_ratio in zip(group_df.index, counts.argmax(axis=1), top_ratio):
+            if max_ratio > 30:
+                max_mbti = MBTI_TYPES[top_code]
                 mbti_desc = get_mbti_description(max_mbti)
                 interpretations.append(f"**{group}**: {max_mbti}({max_ratio:.1f}%)가 우세 → {mbti_desc}")
         
         # 전체적인 패턴 분석
+        groups = list(group_df.index)
         if group_col == "gender":
-            male_data = group_df.loc["남"] if "남" in group_df.index else None
-            female_data = group_df.loc["여"] if "여" in group_df.index else None
-            
-            if male_data is not None and female_data is not None:
+            if "남" in groups and "여" in groups:
                 # T/F 축 비교
-                male_t = male_data[[col for col in male_data.index if 'T' in col]].sum()
-                male_f = male_data[[col for col in male_data.index if 'F' in col]].sum()
-                female_t = female_data[[col for col in female_data.index if 'T' in col]].sum()
-                female_f = female_data[[col for col in female_data.index if 'F' in col]].sum()
-                
-                male_t_ratio = male_t / (male_t + male_f) * 100 if (male_t + male_f) > 0 else 0
-                female_f_ratio = female_f / (female_t + female_f) * 100 if (female_t + female_f) > 0 else 0
+                male_t_ratio = pole_ratio(counts[groups.index("남")], "T")
+                female_f_ratio = pole_ratio(counts[groups.index("여")], "F")
                 
                 if male_t_ratio > 55:
                     interpretations.append(f"**성별 차이**: 남성은 T(사고형) {male_t_ratio:.1f}% → 논리적 접근 선호")
@@ -976,29 +986,18 @@ def analyze_heatmap_patterns(group_df, group_col):
                     interpretations.append(f"**성별 차이**: 여성은 F(감정형) {female_f_ratio:.1f}% → 감정적 배려 중시")
         
         elif group_col == "age_group":
-            # 연령대별 특성 분석
-            age_patterns = {}
-            for age in group_df.index:
-                age_data = group_df.loc[age]
-                # E/I 축 분석
-                e_types = age_data[[col for col in age_data.index if col.startswith('E')]].sum()
-                i_types = age_data[[col for col in age_data.index if col.startswith('I')]].sum()
-                e_ratio = e_types / (e_types + i_types) * 100 if (e_types + i_types) > 0 else 0
-                
+            # 연령대별 E/I 축 분석
+            for age, e_ratio in zip(groups, pole_ratio(counts, "E")):
                 if e_ratio > 60:
                     interpretations.append(f"**{age}**: 외향형(E) {e_ratio:.1f}% → 활발한 로봇 상호작용 선호")
                 elif e_ratio < 40:
                     interpretations.append(f"**{age}**: 내향형(I) {100-e_ratio:.1f}% → 신중한 로봇 상호작용 선호")
         
         elif group_col == "job":
-            # 직업별 특성 분석
-            for job in group_df.index:
-                job_data = group_df.loc[job]
-                # NT 조합 (분석가형) 확인
-                nt_types = job_data[[col for col in job_data.index if 'NT' in col or (col.startswith('N') and 'T' in col) or (col.startswith('E') and 'NT' in col) or (col.startswith('I') and 'NT' in col)]].sum()
-                total = job_data.sum()
-                nt_ratio = nt_types / total * 100 if total > 0 else 0
-                
+            # 직업별 NT 조합 (분석가형) 비율
+            nt_counts = temperament_counts(counts)[:, TEMPERAMENTS.index("NT")]
+            nt_ratios = np.divide(nt_counts * 100.0, totals, out=np.zeros(len(totals)), where=totals > 0)
+            for job, nt_ratio in zip(groups, nt_ratios):
                 if nt_ratio > 40:
                     interpretations.append(f"**{job}**: NT조합 {nt_ratio:.1f}% → 논리적·체계적 로봇 활용 선호")
     
@@ -1101,8 +1100,8 @@ def analyze_mbti_axes_correlation(corr_matrix):
     
     try:
         # E/I 축 분석
-        e_types = [col for col in corr_matrix.columns if col.startswith('E')]
-        i_types = [col for col in corr_matrix.columns if col.startswith('I')]
+        e_types = [col for col in corr_matrix.columns if col in TYPES_WITH['E']]
+        i_types = [col for col in corr_matrix.columns if col in TYPES_WITH['I']]
         
         if e_types and i_types:
             # E타입들 간의 평균 상관관계
@@ -1124,25 +1123,25 @@ def analyze_mbti_axes_correlation(corr_matrix):
     
     return analyses
 
-def analyze_time_patterns(df):
-    """시간대별 진단 패턴 분석 및 해석"""
+@st.cache_data(show_spinner=False, max_entries=32)
+def analyze_time_patterns(hour_weekday, date_range):
+    """시간대별 진단 패턴 분석 및 해석
+
+    hour_weekday: 건수 큐브의 hour_weekday() 결과, date_range: 큐브의 date_range() 결과
+    (캐시 키로 해시할 수 있도록 큐브 대신 조회 결과를 받습니다)
+    """
     interpretations = []
     
     try:
-        # 시간대별 분석을 위해 timestamp를 datetime으로 변환
-        df['datetime'] = pd.to_datetime(df['timestamp'])
-        df['hour'] = df['datetime'].dt.hour
-        df['weekday'] = df['datetime'].dt.day_name()
-        df['is_weekend'] = df['datetime'].dt.weekday >= 5
         
         # 시간대별 분포
-        hourly_counts = df['hour'].value_counts().sort_index()
+        hourly_counts = hour_weekday.groupby('hour')['count'].sum().sort_index()
         peak_hour = hourly_counts.idxmax()
         peak_count = hourly_counts.max()
         low_hour = hourly_counts.idxmin()
         low_count = hourly_counts.min()
         
-        total_diagnoses = len(df)
+        total_diagnoses = int(hour_weekday['count'].sum())
         peak_percentage = (peak_count / total_diagnoses) * 100
         
         interpretations.append("**⏰ 시간대별 진단 패턴:**")
@@ -1150,8 +1149,8 @@ def analyze_time_patterns(df):
         interpretations.append(f"• **최저 시간**: {low_hour}시 ({low_count}건) → {get_time_meaning(low_hour)}")
         
         # 주중 vs 주말 분석
-        weekday_count = len(df[~df['is_weekend']])
-        weekend_count = len(df[df['is_weekend']])
+        weekend_count = int(hour_weekday.loc[hour_weekday['weekday'] >= 6, 'count'].sum())
+        weekday_count = total_diagnoses - weekend_count
         
         if weekday_count > 0 and weekend_count > 0:
             weekday_ratio = weekday_count / total_diagnoses * 100
@@ -1174,14 +1173,12 @@ def analyze_time_patterns(df):
             interpretations.append("• **개선 필요**: 더 많은 사용자 참여를 위한 홍보 필요")
         
         # 트렌드 분석
-        if len(df) > 1:
-            df_sorted = df.sort_values('datetime')
-            first_date = df_sorted['datetime'].iloc[0]
-            last_date = df_sorted['datetime'].iloc[-1]
-            date_range = (last_date - first_date).days
-            
-            if date_range > 0:
-                daily_avg = total_diagnoses / date_range
+        if total_diagnoses > 1:
+            first_date, last_date = date_range
+            days = (last_date - first_date).days
+            
+            if days > 0:
+                daily_avg = total_diagnoses / days
                 interpretations.append(f"• **일평균 진단**: {daily_avg:.1f}건 → {get_trend_meaning(daily_avg)}")
     
     except Exception as e:
@@ -1225,7 +1222,7 @@ def analyze_network_patterns(df):
     
     try:
         # MBTI 유형별 빈도 계산
-        mbti_counts = df['mbti'].value_counts()
+        mbti_counts = observed_counts(df['mbti'])
         
         if len(mbti_counts) < 2:
             interpretations.append("네트워크 분석을 위해서는 더 많은 MBTI 유형 데이터가 필요합니다.")
@@ -1290,40 +1287,38 @@ def get_network_role(mbti, role_type):
         }
         return rare_descriptions.get(mbti, '독특한 관점으로 네트워크에 특별함 제공')
 
+TEMPERAMENT_MEANINGS = {
+    "NT": "논리적·체계적 로봇 활용",
+    "NF": "창의적·감정적 로봇 상호작용",
+    "ST": "실용적·효율적 로봇 사용",
+    "SF": "협력적·배려적 로봇 활용",
+}
+
 def analyze_mbti_clusters(mbti_counts):
     """MBTI 클러스터 분석"""
     clusters = []
     
     try:
-        # 기질별 그룹핑 (Keirsey Temperament)
-        nt_types = [mbti for mbti in mbti_counts.index if 'NT' in mbti or (mbti[1] == 'N' and mbti[2] == 'T')]
-        nf_types = [mbti for mbti in mbti_counts.index if 'NF' in mbti or (mbti[1] == 'N' and mbti[2] == 'F')]
-        st_types = [mbti for mbti in mbti_counts.index if 'ST' in mbti or (mbti[1] == 'S' and mbti[2] == 'T')]
-        sf_types = [mbti for mbti in mbti_counts.index if 'SF' in mbti or (mbti[1] == 'S' and mbti[2] == 'F')]
-        
-        if len(nt_types) >= 2:
-            nt_total = sum(mbti_counts[mbti] for mbti in nt_types)
-            clusters.append(f"  - **NT 그룹** ({len(nt_types)}개 유형, {nt_total}건): 논리적·체계적 로봇 활용")
-        
-        if len(nf_types) >= 2:
-            nf_total = sum(mbti_counts[mbti] for mbti in nf_types)
-            clusters.append(f"  - **NF 그룹** ({len(nf_types)}개 유형, {nf_total}건): 창의적·감정적 로봇 상호작용")
+        # 기질별 그룹핑 (Keirsey Temperament): 기질 마스크 × 유형별 건수
+        counts = mbti_counts.reindex(list(MBTI_TYPES), fill_value=0).to_numpy()
+        type_totals = (TEMPERAMENT_MASKS * (counts > 0)).sum(axis=1)
+        group_totals = temperament_counts(counts)
         
-        if len(st_types) >= 2:
-            st_total = sum(mbti_counts[mbti] for mbti in st_types)
-            clusters.append(f"  - **ST 그룹** ({len(st_types)}개 유형, {st_total}건): 실용적·효율적 로봇 사용")
-        
-        if len(sf_types) >= 2:
-            sf_total = sum(mbti_counts[mbti] for mbti in sf_types)
-            clusters.append(f"  - **SF 그룹** ({len(sf_types)}개 유형, {sf_total}건): 협력적·배려적 로봇 활용")
+        for name, n_types, total in zip(TEMPERAMENTS, type_totals, group_totals):
+            if n_types >= 2:
+                clusters.append(f"  - **{name} 그룹** ({n_types}개 유형, {total}건): {TEMPERAMENT_MEANINGS[name]}")
     
     except Exception as e:
         clusters.append(f"클러스터 분석 오류: {str(e)}")
     
     return clusters
 
-def analyze_mbti_changes(df):
-    """MBTI 변화 패턴 자동 분석 및 해석"""
+def analyze_mbti_changes(df, transitions=None):
+    """MBTI 변화 패턴 자동 분석 및 해석
+
+    transitions: df 범위의 전이 목록 (mbti_transitions.build_transitions 결과를 자른 것).
+    생략하면 df에서 사용자–로봇 조합별로 계산합니다.
+    """
     interpretations = []
     
     try:
@@ -1331,27 +1326,11 @@ def analyze_mbti_changes(df):
             interpretations.append("MBTI 변화 분석을 위해서는 최소 2개의 진단 데이터가 필요합니다.")
             return interpretations
         
-        # 시간순 정렬
-        df_sorted = df.sort_values('timestamp')
-        changes = []
-        
-        # 변화 패턴 추출
-        for i in range(1, len(df_sorted)):
-            prev_mbti = df_sorted.iloc[i-1]['mbti']
-            curr_mbti = df_sorted.iloc[i]['mbti']
-            prev_time = pd.to_datetime(df_sorted.iloc[i-1]['timestamp'])
-            curr_time = pd.to_datetime(df_sorted.iloc[i]['timestamp'])
-            
-            if prev_mbti != curr_mbti:
-                time_diff = (curr_time - prev_time).days
-                changes.append({
-                    'from': prev_mbti,
-                    'to': curr_mbti,
-                    'days_between': time_diff,
-                    'change_type': get_change_type(prev_mbti, curr_mbti)
-                })
-        
-        if not changes:
+        if transitions is None:
+            transitions = build_transitions(df)
+        changes = transitions[transitions['changed']]
+        
+        if changes.empty:
             interpretations.append("**🔄 MBTI 변화 분석:**")
             interpretations.append("• **안정적 패턴**: 모든 진단에서 동일한 MBTI 유형 유지")
             interpretations.append("• **일관성**: 로봇 상호작용 선호도가 일관되게 유지됨")
@@ -1362,22 +1341,15 @@ def analyze_mbti_changes(df):
         interpretations.append("**🔄 MBTI 변화 분석:**")
         interpretations.append(f"• **총 변화 횟수**: {len(changes)}번")
         
-        # 변화 유형 분석
-        change_types = {}
-        for change in changes:
-            change_type = change['change_type']
-            if change_type not in change_types:
-                change_types[change_type] = []
-            change_types[change_type].append(change)
-        
-        # 가장 많은 변화 유형
-        if change_types:
-            most_common_type = max(change_types.keys(), key=lambda x: len(change_types[x]))
-            interpretations.append(f"• **주요 변화 패턴**: {most_common_type} ({len(change_types[most_common_type])}회)")
+        # 변화 유형 분석 (가장 많은 변화 유형, 동률이면 먼저 나온 유형)
+        change_types = pd.Series(
+            CHANGE_TYPE_LABELS[changes['from_code'].to_numpy(dtype=np.int64), changes['to_code'].to_numpy(dtype=np.int64)]
+        ).value_counts(sort=False)
+        most_common_type = change_types.idxmax()
+        interpretations.append(f"• **주요 변화 패턴**: {most_common_type} ({change_types[most_common_type]}회)")
         
         # 변화 간격 분석
-        time_intervals = [change['days_between'] for change in changes]
-        avg_interval = np.mean(time_intervals)
+        avg_interval = changes['interval_days'].mean()
         
         if avg_interval < 7:
             interpretations.append(f"• **변화 주기**: 평균 {avg_interval:.1f}일 → 빠른 적응 및 탐색 성향")
@@ -1409,18 +1381,14 @@ def analyze_mbti_changes(df):
     
     return interpretations
 
+CHANGE_AXIS_NAMES = ("에너지 방향", "정보 처리", "의사결정", "생활 양식")
+
 def get_change_type(from_mbti, to_mbti):
     """MBTI 변화 유형 분류"""
-    differences = []
-    
-    if from_mbti[0] != to_mbti[0]:  # E/I 변화
-        differences.append("에너지 방향")
-    if from_mbti[1] != to_mbti[1]:  # S/N 변화
-        differences.append("정보 처리")
-    if from_mbti[2] != to_mbti[2]:  # T/F 변화
-        differences.append("의사결정")
-    if from_mbti[3] != to_mbti[3]:  # J/P 변화
-        differences.append("생활 양식")
+    from_code, to_code = encode_types([from_mbti, to_mbti])
+    if from_code < 0 or to_code < 0:
+        return "완전 변화"
+    differences = [name for name, flipped in zip(CHANGE_AXIS_NAMES, axis_flips(from_code, to_code)) if flipped]
     
     if len(differences) == 1:
         return f"{differences[0]} 변화"
@@ -1431,26 +1399,23 @@ def get_change_type(from_mbti, to_mbti):
     else:
         return "완전 변화"
 
+# (from 코드 × to 코드) 변화 유형 문구 표
+CHANGE_TYPE_LABELS = np.array([[get_change_type(a, b) for b in MBTI_TYPES] for a in MBTI_TYPES], dtype=object)
+
 def analyze_axis_changes(changes):
-    """축별 변화 패턴 분석"""
+    """축별 변화 패턴 분석 (changes: 전이 목록 DataFrame 또는 from/to 딕셔너리 목록)"""
     analyses = []
     
     try:
-        # 각 축별 변화 횟수 계산
-        axis_counts = {'E/I': 0, 'S/N': 0, 'T/F': 0, 'J/P': 0}
-        
-        for change in changes:
-            from_mbti = change['from']
-            to_mbti = change['to']
-            
-            if from_mbti[0] != to_mbti[0]:
-                axis_counts['E/I'] += 1
-            if from_mbti[1] != to_mbti[1]:
-                axis_counts['S/N'] += 1
-            if from_mbti[2] != to_mbti[2]:
-                axis_counts['T/F'] += 1
-            if from_mbti[3] != to_mbti[3]:
-                axis_counts['J/P'] += 1
+        # 각 축별 변화 횟수 계산 (변화 쌍 × 4 축 뒤집힘 행렬의 열 합)
+        if isinstance(changes, pd.DataFrame):
+            flip_counts = changes[list(FLIP_COLUMNS)].to_numpy(dtype=bool).sum(axis=0)
+        else:
+            from_codes = encode_types([change['from'] for change in changes])
+            to_codes = encode_types([change['to'] for change in changes])
+            valid = (from_codes >= 0) & (to_codes >= 0)
+            flip_counts = axis_flips(from_codes[valid], to_codes[valid]).sum(axis=0)
+        axis_counts = dict(zip(AXIS_LABELS, flip_counts.tolist()))
         
         # 가장 많이 변화한 축
         most_changed_axis = max(axis_counts.keys(), key=lambda x: axis_counts[x])
@@ -1476,24 +1441,24 @@ def analyze_axis_changes(changes):
     
     return analyses
 
-def analyze_statistical_significance(df, group_col):
-    """통계적 유의성 분석 및 해석"""
+@st.cache_data(show_spinner=False, max_entries=32)
+def analyze_statistical_significance(contingency_table):
+    """통계적 유의성 분석 및 해석 (contingency_table: 건수 큐브의 그룹 × MBTI 교차표)"""
     interpretations = []
     
     try:
-        if len(df) < 10:  # 최소 샘플 크기
+        if contingency_table.to_numpy().sum() < 10:  # 최소 샘플 크기
             interpretations.append("통계적 분석을 위해서는 최소 10개의 데이터가 필요합니다.")
             return interpretations
         
-        # 그룹별 MBTI 분포 분석
-        contingency_table = pd.crosstab(df[group_col], df['mbti'])
-        
         if contingency_table.shape[0] < 2 or contingency_table.shape[1] < 2:
             interpretations.append("통계적 검정을 위해서는 최소 2개 그룹과 2개 MBTI 유형이 필요합니다.")
             return interpretations
         
         # 카이제곱 검정
         try:
+            from scipy.stats import chi2_contingency
+            
             chi2, p_value, dof, expected = chi2_contingency(contingency_table)
             
             interpretations.append("**📊 통계적 유의성 분석:**")
@@ -1536,13 +1501,12 @@ def analyze_statistical_significance(df, group_col):
     
     return interpretations
 
-def analyze_diversity_index(df):
-    """다양성 지수 분석 및 해석"""
+def analyze_diversity_index(mbti_counts):
+    """다양성 지수 분석 및 해석 (mbti_counts: 많은 순으로 정렬된 MBTI별 건수)"""
     interpretations = []
     
     try:
-        mbti_counts = df['mbti'].value_counts()
-        total = len(df)
+        total = mbti_counts.sum()
         
         # Shannon 다양성 지수 계산
         shannon_index = -sum((count/total) * np.log(count/total) for count in mbti_counts)
@@ -1584,236 +1548,12 @@ def analyze_diversity_index(df):
     
     return interpretations
 
-# MBTI 가이드 데이터
-def load_guide_data(location="일반"):
-    """장소별 특화된 MBTI 가이드 데이터 로드"""
-    base_guide = {
-        "ENFJ": {
-            "description": "리더십과 공감 능력을 겸비한 타입입니다. 다른 사람의 성장을 돕고, 팀의 조화를 중시합니다.",
-            "hri_style": "공감적 리더십, 격려와 성장 지향, 팀워크 중시",
-            "examples": [
-                "안녕하세요! 오늘 어떤 도움이 필요하신지 편하게 말씀해 주세요.",
-                "함께 이 문제를 해결해보는 건 어떨까요? 당신의 생각이 궁금해요.",
-                "진행 상황을 확인해보니 정말 잘 하고 계시네요! 더 발전할 수 있는 부분도 제안드릴게요.",
-                "혹시 어려운 점이 있으시면 언제든 말씀해 주세요. 함께 찾아보겠습니다.",
-                "팀 전체가 성공할 수 있도록 제가 적극적으로 지원해드리겠습니다."
-            ]
-        },
-        "ENTJ": {
-            "description": "전략적 사고와 효율성을 중시하는 타입입니다. 명확한 목표 설정과 체계적인 접근을 선호합니다.",
-            "hri_style": "전략적 사고, 효율성 중시, 목표 지향적",
-            "examples": [
-                "목표 달성을 위해 체계적으로 안내해 드리겠습니다. 단계별로 진행하시죠.",
-                "현재 상황을 분석한 결과, 이 방법이 가장 효율적일 것 같습니다.",
-                "시간을 절약하기 위해 핵심만 요약해서 알려드릴게요.",
-                "다음 단계로 넘어가기 전에 현재 진행상황을 확인해보시겠어요?",
-                "최적의 결과를 위해 우선순위를 정해서 진행하는 것이 좋겠습니다."
-            ]
-        },
-        "ENTP": {
-            "description": "창의적이고 혁신적인 사고를 가진 타입입니다. 새로운 아이디어와 도전을 즐깁니다.",
-            "hri_style": "혁신적 접근, 창의적 해결책, 도전 지향적",
-            "examples": [
-                "새로운 관점에서 이 문제를 바라보는 건 어떨까요?",
-                "기존 방식을 개선할 수 있는 창의적인 방법을 제안해 드릴게요.",
-                "흥미로운 새로운 접근법을 제안해드릴게요. 어떻게 생각하세요?",
-                "여러 가지 옵션이 있는데, 어떤 것이 가장 흥미로우신가요?",
-                "함께 실험해보면서 새로운 해결책을 찾아보는 건 어떨까요?"
-            ]
-        },
-        "ENFP": {
-            "description": "열정적이고 창의적인 타입입니다. 가능성과 새로운 경험을 추구합니다.",
-            "hri_style": "열정적 소통, 창의적 영감, 가능성 추구",
-            "examples": [
-                "정말 흥미로운 아이디어네요! 더 자세히 들어보고 싶어요.",
-                "새로운 가능성을 함께 탐색해보는 건 어떨까요?",
-                "당신의 아이디어가 정말 흥미롭네요! 함께 발전시켜보는 건 어떨까요?",
-                "정말 잘하고 계시네요! 더 멋진 결과를 만들어보시죠.",
-                "함께 즐겁게 배워가면서 새로운 가능성을 발견해보아요."
-            ]
-        },
-        "ESFJ": {
-            "description": "협력적이고 실용적인 타입입니다. 다른 사람의 필요를 돌보고 조화를 추구합니다.",
-            "hri_style": "협력적 지원, 실용적 도움, 조화 중시",
-            "examples": [
-                "어떤 도움이 필요하신지 말씀해 주세요. 함께 해결해보겠습니다.",
-                "모두가 편안하게 이용할 수 있도록 도와드릴게요.",
-                "도움이 필요하시면 언제든 편하게 말씀해 주세요. 함께 해결해보겠습니다.",
-                "궁금한 점이나 어려운 점이 있으시면 언제든 도와드릴게요.",
-                "함께 협력해서 좋은 결과를 만들어보시죠."
-            ]
-        },
-        "ESFP": {
-            "description": "즉흥적이고 친근한 타입입니다. 현재의 즐거움과 실용적 해결책을 중시합니다.",
-            "hri_style": "즉흥적 상호작용, 친근한 소통, 실용적 해결",
-            "examples": [
-                "지금 당장 도움이 필요하시군요! 바로 해결해드릴게요.",
-                "편하게 말씀해 주세요. 함께 즐겁게 해결해보죠.",
-                "오늘 기분이 어떠세요? 즐거운 하루가 되도록 도와드릴게요!",
-                "실용적이면서도 재미있는 방법으로 진행해보는 건 어떨까요?",
-                "지금 이 순간을 최대한 활용해서 멋진 결과를 만들어보시죠!"
-            ]
-        },
-        "ESTJ": {
-            "description": "체계적이고 책임감 있는 타입입니다. 규칙과 효율성을 중시합니다.",
-            "hri_style": "체계적 관리, 책임감 있는 안내, 효율성 중시",
-            "examples": [
-                "규정에 따라 체계적으로 안내해 드리겠습니다.",
-                "효율적으로 진행할 수 있도록 단계별로 도와드릴게요.",
-                "정해진 절차를 준수하면서 최상의 결과를 보장해드리겠습니다.",
-                "책임감을 가지고 정확하게 처리해드릴 테니 안심하세요.",
-                "체계적인 관리를 통해 모든 것이 원활하게 진행되도록 하겠습니다."
-            ]
-        },
-        "ESTP": {
-            "description": "실용적이고 적응력이 뛰어난 타입입니다. 현재 상황에 맞는 해결책을 찾습니다.",
-            "hri_style": "실용적 해결, 적응적 대응, 즉시 실행",
-            "examples": [
-                "현재 상황에 맞는 실용적인 해결책을 제안해 드릴게요.",
-                "바로 실행할 수 있는 방법을 알려드리겠습니다.",
-                "상황이 변하면 즉시 적응해서 새로운 방법을 찾아보겠습니다.",
-                "실제로 효과가 있는 방법들만 골라서 제안해드릴게요.",
-                "지금 당장 필요한 것부터 해결하고 나머지는 차근차근 진행해보죠."
-            ]
-        },
-        "INFJ": {
-            "description": "직관적이고 이상주의적인 타입입니다. 깊은 통찰력과 창의성을 가집니다.",
-            "hri_style": "직관적 이해, 깊은 통찰, 창의적 접근",
-            "examples": [
-                "더 깊이 있는 이해를 위해 함께 탐색해보는 건 어떨까요?",
-                "본질적인 문제를 찾아 해결해보겠습니다.",
-                "당신의 내면의 목소리에 귀 기울여보세요. 제가 함께 들어보겠습니다.",
-                "직관적으로 느끼시는 부분이 있다면 그것도 중요한 단서가 될 수 있어요.",
-                "장기적인 관점에서 진정으로 의미 있는 해결책을 찾아보겠습니다."
-            ]
-        },
-        "INFP": {
-            "description": "이상주의적이고 창의적인 타입입니다. 개인의 가치와 의미를 중시합니다.",
-            "hri_style": "이상주의적 접근, 창의적 영감, 개인적 가치 중시",
-            "examples": [
-                "당신만의 특별한 관점이 궁금해요. 함께 이야기해보죠.",
-                "의미 있는 경험을 만들어보는 건 어떨까요?",
-                "당신의 가치관과 일치하는 방향으로 진행해보는 것이 중요할 것 같아요.",
-                "창의적인 아이디어를 자유롭게 표현해보세요. 제가 함께 발전시켜보겠습니다.",
-                "진정성 있는 해결책을 찾기 위해 당신의 마음속 이야기를 들려주세요."
-            ]
-        },
-        "INTJ": {
-            "description": "전략적이고 독창적인 사고를 가진 타입입니다. 장기적 비전과 효율성을 추구합니다.",
-            "hri_style": "전략적 계획, 독창적 해결책, 장기적 비전",
-            "examples": [
-                "장기적인 관점에서 최적의 해결책을 제안해 드릴게요.",
-                "전략적으로 접근하여 효율적으로 해결해보겠습니다.",
-                "복잡한 시스템을 분석해서 핵심 개선점을 찾아보겠습니다.",
-                "독창적인 아이디어로 기존 방식을 혁신해보는 건 어떨까요?",
-                "미래를 대비한 체계적인 계획을 함께 세워보시죠."
-            ]
-        },
-        "INTP": {
-            "description": "논리적이고 분석적인 타입입니다. 복잡한 문제를 해결하는 것을 즐깁니다.",
-            "hri_style": "논리적 분석, 복잡한 문제 해결, 정확성 중시",
-            "examples": [
-                "논리적으로 분석해보니 이런 해결책이 가장 적합할 것 같아요.",
-                "복잡한 문제를 단계별로 분석해서 해결해보겠습니다.",
-                "다양한 가능성을 탐구해보면서 최적의 답을 찾아보겠습니다.",
-                "이론적 배경을 바탕으로 체계적으로 접근해보시죠.",
-                "정확한 데이터와 논리적 추론을 통해 검증된 해결책을 제시하겠습니다."
-            ]
-        },
-        "ISFJ": {
-            "description": "신중하고 헌신적인 타입입니다. 실용적이고 안정적인 해결책을 제공합니다.",
-            "hri_style": "신중한 지원, 실용적 해결, 안정적 서비스",
-            "examples": [
-                "신중하게 검토한 후 안전하고 실용적인 방법을 제안해 드릴게요.",
-                "안정적으로 도움을 드릴 수 있도록 체계적으로 진행하겠습니다.",
-                "당신의 편안함을 최우선으로 생각하며 세심하게 도와드리겠습니다.",
-                "검증된 방법으로 안전하게 진행하여 걱정 없이 이용하실 수 있도록 하겠습니다.",
-                "필요하신 것이 있으면 언제든 말씀해 주세요. 헌신적으로 지원해드리겠습니다."
-            ]
-        },
-        "ISFP": {
-            "description": "예술적이고 실용적인 타입입니다. 현재의 경험과 개인의 가치를 중시합니다.",
-            "hri_style": "예술적 접근, 실용적 해결, 개인적 경험 중시",
-            "examples": [
-                "당신만의 특별한 방식으로 해결해보는 건 어떨까요?",
-                "현재의 경험을 최대한 활용해서 도와드릴게요.",
-                "개인적인 가치와 감정을 존중하면서 함께 진행해보겠습니다.",
-                "예술적이고 창의적인 접근으로 아름다운 해결책을 만들어보시죠.",
-                "지금 이 순간의 느낌과 직감을 소중히 여기며 도와드리겠습니다."
-            ]
-        },
-        "ISTJ": {
-            "description": "신뢰할 수 있고 체계적인 타입입니다. 규칙과 정확성을 중시합니다.",
-            "hri_style": "신뢰할 수 있는 안내, 체계적 관리, 정확성 중시",
-            "examples": [
-                "규정에 따라 정확하고 신뢰할 수 있는 정보를 제공해 드릴게요.",
-                "체계적으로 진행하여 안전하게 도와드리겠습니다.",
-                "검증된 절차를 통해 확실하고 정확한 결과를 보장해드리겠습니다.",
-                "전통적이고 검증된 방법으로 안정적인 서비스를 제공하겠습니다.",
-                "세부사항까지 꼼꼼히 확인하여 완벽한 결과를 만들어보겠습니다."
-            ]
-        },
-        "ISTP": {
-            "description": "실용적이고 분석적인 타입입니다. 문제 해결과 효율성을 중시합니다.",
-            "hri_style": "실용적 해결, 분석적 접근, 효율성 중시",
-            "examples": [
-                "문제를 분석해서 실용적인 해결책을 제안해 드릴게요.",
-                "효율적으로 진행할 수 있도록 분석적으로 도와드리겠습니다.",
-                "간단하고 직접적인 방법으로 빠르게 해결해보겠습니다.",
-                "필요한 것만 골라서 효과적으로 처리해드릴게요.",
-                "실제 상황에 맞는 현실적인 해결책을 찾아보시죠."
-            ]
-        }
-    }
-    
-    # 장소별 특화 가이드
-    location_guides = {
-        "병원": {
-            "ENFJ": {"hri_style": "공감적 의료 서비스, 환자 중심적 접근, 치료팀 협력"},
-            "ENTJ": {"hri_style": "전략적 치료 계획, 효율적 의료 관리, 체계적 진료"},
-            "INFJ": {"hri_style": "직관적 진단, 깊은 환자 이해, 개인화된 치료"},
-            "INTJ": {"hri_style": "전략적 의료 계획, 혁신적 치료 방법, 장기적 건강 관리"}
-        },
-        "도서관": {
-            "ENFJ": {"hri_style": "공감적 학습 지원, 독서 문화 조성, 이용자 성장 도움"},
-            "ENTJ": {"hri_style": "전략적 학습 계획, 효율적 정보 관리, 체계적 교육"},
-            "INFJ": {"hri_style": "직관적 독서 추천, 깊은 지식 탐구, 개인화된 학습"},
-            "INTJ": {"hri_style": "전략적 학습 설계, 혁신적 교육 방법, 장기적 지식 구축"}
-        },
-        "쇼핑몰": {
-            "ENFJ": {"hri_style": "공감적 고객 서비스, 쇼핑 경험 향상, 고객 만족 중시"},
-            "ENTJ": {"hri_style": "전략적 쇼핑 안내, 효율적 구매 지원, 체계적 서비스"},
-            "INFJ": {"hri_style": "직관적 상품 추천, 깊은 고객 이해, 개인화된 서비스"},
-            "INTJ": {"hri_style": "전략적 쇼핑 계획, 혁신적 서비스 방법, 장기적 고객 관계"}
-        },
-        "학교": {
-            "ENFJ": {"hri_style": "공감적 교육 지원, 학생 성장 도움, 학습 환경 조성"},
-            "ENTJ": {"hri_style": "전략적 학습 계획, 효율적 교육 관리, 체계적 학습"},
-            "INFJ": {"hri_style": "직관적 학습 안내, 깊은 학생 이해, 개인화된 교육"},
-            "INTJ": {"hri_style": "전략적 교육 설계, 혁신적 학습 방법, 장기적 지식 구축"}
-        },
-        "공항": {
-            "ENFJ": {"hri_style": "공감적 여행 서비스, 편안한 여행 경험, 여행자 안내"},
-            "ENTJ": {"hri_style": "전략적 여행 계획, 효율적 여행 관리, 체계적 서비스"},
-            "INFJ": {"hri_style": "직관적 여행 안내, 깊은 여행자 이해, 개인화된 서비스"},
-            "INTJ": {"hri_style": "전략적 여행 설계, 혁신적 서비스 방법, 장기적 여행 계획"}
-        }
-    }
-    
-    # 선택된 장소의 특화 가이드 적용
-    if location in location_guides:
-        for mbti_type in base_guide:
-            if mbti_type in location_guides[location]:
-                base_guide[mbti_type]["hri_style"] = location_guides[location][mbti_type]["hri_style"]
-    
-    return base_guide
-
 def check_existing_diagnosis(user_id, robot_id):
     """같은 사용자-로봇 조합의 최근 진단 확인"""
     try:
         # 최근 24시간 내 같은 사용자-로봇 조합의 진단 확인
         yesterday = datetime.now(pytz.timezone("Asia/Seoul")) - timedelta(hours=24)
-        res = supabase.table("responses").select("*").eq("user_id", user_id).eq("robot_id", robot_id).gte("timestamp", yesterday.isoformat()).execute()
+        res = supabase.table("responses").select("*").eq("user_id", user_id).eq("robot_id", robot_id).gte("timestamp", yesterday.isoformat()).limit(1).execute()
         
         if res.data:
             return True, res.data[0]  # 최근 진단이 있음
@@ -1822,9 +1562,17 @@ def check_existing_diagnosis(user_id, robot_id):
         st.error(f"진단 확인 중 오류: {e}")
         return False, None
 
+def get_recent_diagnosis(user_id, robot_id):
+    """최근 진단 확인 결과를 세션에 보관 (사용자·로봇이 바뀌거나 저장·초기화될 때만 다시 조회)"""
+    cached = st.session_state.get('recent_diagnosis')
+    if cached is None or cached[0] != (user_id, robot_id):
+        cached = ((user_id, robot_id), check_existing_diagnosis(user_id, robot_id))
+        st.session_state.recent_diagnosis = cached
+    return cached[1]
+
 def generate_diagnosis_id():
-    """고유한 진단 세션 ID 생성"""
-    return f"diagnosis_{int(time.time())}_{st.session_state.user_id}_{st.session_state.robot_id}"
+    """고유한 진단 세션 ID 생성 (여러 키오스크가 같은 초에 시작해도 충돌하지 않도록 UUID 사용)"""
+    return f"diagnosis_{int(time.time())}_{uuid.uuid4().hex}"
 
 def save_response_with_session(diagnosis_data):
     """진단 세션 ID를 포함한 응답 데이터 저장"""
@@ -1849,17 +1597,8 @@ def save_response_with_session(diagnosis_data):
             st.error("데이터베이스 연결이 없습니다.")
             return False
             
-        # diagnosis_session_id가 있으면 중복 확인, 없으면 기본 저장
-        if "diagnosis_session_id" in diagnosis_data:
-            try:
-                # 중복 진단 세션 확인
-                existing = supabase.table("responses").select("diagnosis_session_id").eq("diagnosis_session_id", diagnosis_data["diagnosis_session_id"]).execute()
-                if existing.data:
-                    st.warning("이미 저장된 진단 세션입니다.")
-                    return False
-            except Exception as e:
-                # diagnosis_session_id 컬럼이 없는 경우 무시하고 계속 진행
-                st.info("진단 세션 ID 기능이 비활성화되어 있습니다.")
+        # diagnosis_session_id 컬럼이 있는 스키마에서만 세션 기준 멱등 저장
+        has_session_id = SCHEMA_CAPABILITIES.get("diagnosis_session_id") and "diagnosis_session_id" in diagnosis_data
         
         # 기본 저장 데이터 구성
         save_data = {
@@ -1874,21 +1613,28 @@ def save_response_with_session(diagnosis_data):
             "timestamp": diagnosis_data["timestamp"]
         }
         
-        # location 컬럼이 있는지 확인하고 추가
-        try:
-            # 먼저 location 컬럼 포함해서 저장 시도
-            save_data_with_location = save_data.copy()
-            save_data_with_location["location"] = diagnosis_data.get("location", "일반")
-            supabase.table("responses").insert(save_data_with_location).execute()
-            return True
-        except Exception as location_error:
-            # location 컬럼이 없는 경우, location 없이 저장 시도
-            if "location" in str(location_error).lower():
-                st.warning("데이터베이스에 location 컬럼이 없습니다. location 정보 없이 저장합니다.")
-                supabase.table("responses").insert(save_data).execute()
+        # 스키마에 있는 선택 컬럼만 추가
+        if SCHEMA_CAPABILITIES.get("location"):
+            save_data["location"] = diagnosis_data.get("location", "일반")
+        else:
+            st.warning("데이터베이스에 location 컬럼이 없습니다. location 정보 없이 저장합니다.")
+        
+        # 압축 응답 컬럼이 있으면 선택지 문구 대신 질문 순서별 선택지 번호와 질문 세트 버전만 저장
+        if SCHEMA_CAPABILITIES.get("answer_codes") and SCHEMA_CAPABILITIES.get("question_bank_version"):
+            bank = QUESTION_REGISTRY[diagnosis_data.get("location", "일반")]
+            save_data["answer_codes"] = bank.encode_answers(save_data.pop("responses"))
+            save_data["question_bank_version"] = bank.bank_version
+        
+        if has_session_id:
+            # 세션 ID 기준 upsert 한 번으로 저장 (재실행으로 다시 제출돼도 중복 저장 없음)
+            save_data["diagnosis_session_id"] = diagnosis_data["diagnosis_session_id"]
+            if not upsert_response(supabase, save_data):
+                st.info("이미 저장된 진단 세션입니다.")
                 return True
-            else:
-                raise location_error
+        else:
+            supabase.table("responses").insert(save_data).execute()
+        invalidate_response_cache()
+        return True
     except Exception as e:
         st.error(f"응답 저장 실패: {e}")
         return False
@@ -1896,7 +1642,6 @@ def save_response_with_session(diagnosis_data):
 # 초기화
 init_session_state()
 setup_styles()
-guide_data = load_guide_data(st.session_state.get('selected_location', '일반'))
 
 # 사용자 ID 확인
 if not st.session_state.user_id:
@@ -1997,17 +1742,14 @@ def show_robot_management():
     st.divider()
     st.subheader("🤖 로봇 ID 관리")
     
-    # 데이터베이스 상태 확인
-    db_status = "❌ 알 수 없는 오류"
-    try:
-        # 테이블 존재 여부 확인
-        test_result = supabase.table("user_robots").select("id").limit(1).execute()
+    # 데이터베이스 상태 확인 (프로세스 시작 시 확인한 스키마 기능 사용)
+    if not supabase:
+        db_status = "❌ 연결 오류"
+    elif SCHEMA_CAPABILITIES.get("user_robots"):
         db_status = "✅ 데이터베이스 연결됨"
-    except Exception as e:
-        error_msg = str(e).lower()
-        if "does not exist" in error_msg or "relation" in error_msg:
-            db_status = "⚠️ user_robots 테이블이 존재하지 않습니다"
-            st.warning("""
+    else:
+        db_status = "⚠️ user_robots 테이블이 존재하지 않습니다"
+        st.warning("""
             **user_robots 테이블이 생성되지 않았습니다.**
             
             해결 방법:
@@ -2015,12 +1757,6 @@ def show_robot_management():
             2. `create_user_robots_table.sql` 파일의 내용을 실행
             3. 또는 관리자에게 문의
             """)
-        elif "permission" in error_msg:
-            db_status = "❌ 권한 오류"
-        elif "connection" in error_msg:
-            db_status = "❌ 연결 오류"
-        else:
-            db_status = f"❌ 데이터베이스 오류: {str(e)[:50]}"
     
     st.caption(f"상태: {db_status}")
     
@@ -2143,7 +1879,7 @@ def show_diagnosis_page():
     st.info(f"👤 **사용자**: {st.session_state.user_id} | 🤖 **로봇**: {st.session_state.robot_id}")
     
     # 중복 진단 확인
-    has_recent_diagnosis, recent_diagnosis = check_existing_diagnosis(st.session_state.user_id, st.session_state.robot_id)
+    has_recent_diagnosis, recent_diagnosis = get_recent_diagnosis(st.session_state.user_id, st.session_state.robot_id)
     
     if has_recent_diagnosis and not st.session_state.get('force_new_diagnosis', False):
         st.warning(f"⚠️ 최근 24시간 내에 이미 '{st.session_state.robot_id}'에 대한 진단이 완료되었습니다.")
@@ -2166,7 +1902,7 @@ def show_diagnosis_page():
     
     # 진단 장소 선택
     st.subheader("🏢 진단 장소 선택")
-    location_options = ["일반", "병원", "도서관", "쇼핑몰", "학교", "공항"]
+    location_options = list(QUESTION_REGISTRY.locations)
     selected_location = st.selectbox(
         "진단할 장소를 선택하세요",
         location_options,
@@ -2177,7 +1913,8 @@ def show_diagnosis_page():
     # 선택된 장소를 세션에 저장
     st.session_state.selected_location = selected_location
     
-    st.info(f"📋 {selected_location} 환경 진단 (총 {len(load_questions(selected_location))}개 질문)")
+    current_questions = load_questions(selected_location)
+    st.info(f"📋 {selected_location} 환경 진단 (총 {len(current_questions)}개 질문)")
     
     st.divider()
     
@@ -2186,60 +1923,67 @@ def show_diagnosis_page():
         st.warning("진단 시작엔 동의가 필요합니다!")
         st.stop()
     
-    # 설문 표시
-    responses = show_survey()
-    
-    # 결과 보기 버튼
-    if st.button("🎯 결과 보기", type="primary", use_container_width=True):
-        if len(responses) < len(load_questions(selected_location)):
-            st.warning("모든 문항에 답변해주세요!")
-        else:
-            # 새로운 진단 세션 시작
-            if not st.session_state.current_diagnosis_id:
-                st.session_state.current_diagnosis_id = generate_diagnosis_id()
-            
-            st.session_state.page = 2
-            st.rerun()
-
-def show_survey():
-    """설문 표시"""
-    responses = {}
-    current_questions = load_questions(st.session_state.selected_location)
-    
-    # 2개씩 질문을 표시
-    for i in range(0, len(current_questions), 2):
-        col1, col2 = st.columns(2)
-        
-        # 첫 번째 질문
-        with col1:
-            q1 = current_questions[i]
-            st.write(f"**{i + 1}. {q1['text']}**")
-            selected1 = st.radio(
-                "선택해주세요:",
-                q1['choices'],
-                key=f"radio_{q1['id']}",
-                label_visibility="collapsed"
-            )
-            if selected1:
-                responses[q1['id']] = selected1
+    # 설문 표시 (제출 시에만 응답 반환)
+    if show_survey(current_questions, selected_location):
+        # 새로운 진단 세션 시작
+        if not st.session_state.current_diagnosis_id:
+            st.session_state.current_diagnosis_id = generate_diagnosis_id()
         
-        # 두 번째 질문 (있는 경우)
-        with col2:
-            if i + 1 < len(current_questions):
-                q2 = current_questions[i + 1]
-                st.write(f"**{i + 2}. {q2['text']}**")
-                selected2 = st.radio(
-                    "선택해주세요:",
-                    q2['choices'],
-                    key=f"radio_{q2['id']}",
-                    label_visibility="collapsed"
+        st.session_state.page = 2
+        st.rerun()
+
+def show_survey(current_questions, location):
+    """설문 표시 (st.form으로 모든 응답을 모아 한 번에 제출, 제출 전에는 재실행 없음)"""
+    tie_questions = load_tie_questions(location)
+    tie_axes = tie_prone_axes(location)
+    
+    with st.form("survey_form"):
+        answers = {}
+        # 2개씩 질문을 표시
+        for i in range(0, len(current_questions), 2):
+            cols = st.columns(2)
+            for offset, (col, q) in enumerate(zip(cols, current_questions[i:i + 2])):
+                with col:
+                    st.write(f"**{i + offset + 1}. {q['text']}**")
+                    answers[q['id']] = st.radio(
+                        "선택해주세요:",
+                        q['choices'],
+                        key=f"radio_{q['id']}",
+                        label_visibility="collapsed"
+                    )
+            st.divider()
+        
+        # 동점이 가능한 축의 타이브레이커 문항도 같은 폼에서 함께 제출
+        tie_answers = {}
+        if tie_axes:
+            st.markdown("**➕ 추가 문항** (응답이 동점일 때만 결과에 반영됩니다)")
+            for axis in tie_axes:
+                cfg = tie_questions[axis]
+                tie_answers[axis] = st.radio(
+                    cfg["text"],
+                    cfg['choices'],
+                    index=None,
+                    key=f"tie_{axis}"
                 )
-                if selected2:
-                    responses[q2['id']] = selected2
         
-        st.divider()
+        submitted = st.form_submit_button("🎯 결과 보기", type="primary", use_container_width=True)
+    
+    if not submitted:
+        return None
+    
+    responses = {qid: choice for qid, choice in answers.items() if choice is not None}
+    if len(responses) < len(current_questions):
+        st.warning("모든 문항에 답변해주세요!")
+        return None
+    
+    tie_responses = {axis: choice for axis, choice in tie_answers.items() if choice is not None}
+    scores = compute_scores(responses, location)
+    if resolve_ties(scores, tie_responses, location) is None:
+        st.warning("응답이 동점인 축이 있습니다. 추가 문항에 답변해야 진단이 완성됩니다.")
+        return None
     
     st.session_state['responses'] = responses
+    st.session_state['tie_responses'] = tie_responses
     return responses
 
 def show_results_page():
@@ -2256,7 +2000,7 @@ def show_results_page():
     
     # 응답이 없으면 이전 진단 데이터 확인
     if not responses:
-        has_recent_diagnosis, recent_diagnosis = check_existing_diagnosis(user_id, robot_id)
+        has_recent_diagnosis, recent_diagnosis = get_recent_diagnosis(user_id, robot_id)
         if has_recent_diagnosis:
             st.info("📋 이전 진단 결과를 표시합니다.")
             mbti = recent_diagnosis['mbti']
@@ -2282,7 +2026,12 @@ def show_results_page():
     if scores is None:
         st.warning("모든 문항에 답해주세요.")
     else:
-        scores = resolve_ties(scores)
+        scores = resolve_ties(scores, st.session_state.get('tie_responses', {}))
+        if scores is None:
+            st.warning("추가 설문 문항 응답이 필요합니다. 설문을 다시 제출해주세요.")
+            st.session_state.page = 1
+            st.rerun()
+            return
         mbti = predict_type(scores)
         
         # 중복 저장 방지: 현재 진단 세션에서만 저장
@@ -2308,6 +2057,7 @@ def show_results_page():
             # 저장 성공 시에만 saved_result를 True로 설정
             if save_response_with_session(diagnosis_data):
                 st.session_state['saved_result'] = True
+                st.session_state.pop('recent_diagnosis', None)
                 st.success("✅ 진단 결과가 성공적으로 저장되었습니다!")
             else:
                 st.error("❌ 진단 결과 저장에 실패했습니다.")
@@ -2342,7 +2092,8 @@ def display_results(mbti, scores, robot_id):
         st.plotly_chart(fig, use_container_width=True)
     
     # MBTI 가이드
-    guide = guide_data.get(mbti)
+    location = st.session_state.get('selected_location', '일반')
+    guide = GUIDE_CONTENT.guide(location, mbti)
     if guide:
         st.subheader("📖 MBTI 유형 가이드")
         
@@ -2359,17 +2110,9 @@ def display_results(mbti, scores, robot_id):
                     st.write(f"{i}. {ex}")
     
     # 장소별 특화 조언
-    location = st.session_state.get('selected_location', '일반')
-    if location != '일반':
+    if guide and guide['location_advice']:
         st.subheader(f"🏢 {location} 환경 특화 조언")
-        location_advice = {
-            "병원": f"**{mbti}** 유형으로서 병원 환경에서는 {guide.get('hri_style', '효율적이고 신뢰할 수 있는 서비스')}를 제공하는 것이 좋습니다. 환자의 안전과 편안함을 최우선으로 고려하세요.",
-            "도서관": f"**{mbti}** 유형으로서 도서관 환경에서는 {guide.get('hri_style', '조용하고 집중할 수 있는 학습 지원')}을 제공하는 것이 좋습니다. 지식 탐구와 학습 환경 조성에 중점을 두세요.",
-            "쇼핑몰": f"**{mbti}** 유형으로서 쇼핑몰 환경에서는 {guide.get('hri_style', '친근하고 도움이 되는 고객 서비스')}를 제공하는 것이 좋습니다. 고객의 쇼핑 경험 향상에 집중하세요.",
-            "학교": f"**{mbti}** 유형으로서 학교 환경에서는 {guide.get('hri_style', '교육적이고 성장 지향적인 학습 지원')}을 제공하는 것이 좋습니다. 학생의 학습과 성장을 돕는 데 중점을 두세요.",
-            "공항": f"**{mbti}** 유형으로서 공항 환경에서는 {guide.get('hri_style', '효율적이고 안전한 여행 서비스')}를 제공하는 것이 좋습니다. 여행자의 편의와 안전을 최우선으로 고려하세요."
-        }
-        st.info(location_advice.get(location, ""))
+        st.info(guide['location_advice'])
     
     # 다운로드 및 다음 단계
     st.subheader("💾 결과 저장")
@@ -2400,7 +2143,7 @@ def show_analytics_page():
     with col2:
         st.info(f"현재 시간: {datetime.now().strftime('%H:%M:%S')}")
     
-    df = load_responses()
+    df = load_shared_responses()
     if df.empty:
         st.info("아직 데이터가 없습니다.")
         if st.button("진단 첫화면으로 돌아가기"):
@@ -2418,13 +2161,9 @@ def show_analytics_page():
         st.dataframe(recent_data[['user_id', 'robot_id', 'mbti', 'timestamp']])
         
         st.write("**사용자별 로봇 조합:**")
-        user_robot_combinations = df.groupby(['user_id', 'robot_id']).size().reset_index(name='진단_횟수')
+        user_robot_combinations = df.groupby(['user_id', 'robot_id'], observed=True).size().reset_index(name='진단_횟수')
         st.dataframe(user_robot_combinations)
     
-    # 날짜 컬럼 추가
-    df['date'] = pd.to_datetime(df['timestamp']).dt.date
-    df['datetime'] = pd.to_datetime(df['timestamp'])
-    
     # 중복 제거 옵션 제공
     with st.expander("🔧 데이터 필터링 옵션"):
         remove_duplicates = st.checkbox(
@@ -2443,45 +2182,45 @@ def show_analytics_page():
         else:
             st.info("모든 진단 데이터를 표시합니다 (중복 포함)")
     
-    # 탭으로 구분
-    tab1, tab2, tab3, tab4, tab5, tab6 = st.tabs([
-        "📊 전체 트렌드", "📈 집단별 분석", "🤖 로봇 이력", 
-        "🧠 고급 분석", "📋 데이터 관리", "🔧 관리자 관리"
-    ])
-    
-    with tab1:
-        show_trend_analysis(df)
-    
-    with tab2:
-        show_group_analysis(df)
-    
-    with tab3:
-        show_robot_history(df)
-    
-    with tab4:
-        show_advanced_analysis(df)
-    
-    with tab5:
-        show_data_management(df)
-    
-    with tab6:
-        show_admin_data_management(df)
+    # 트렌드·집단별 패널은 건수 큐브로 조회 (중복 제거 없이 전체 데이터를 볼 때는 저장된 큐브를 증분 갱신)
+    cube = load_count_cube(df, full_data=not remove_duplicates)
+    
+    # 섹션 선택 (st.tabs는 숨겨진 탭 본문도 매번 실행하므로 선택된 섹션만 실행)
+    sections = {
+        "📊 전체 트렌드": lambda: show_trend_analysis(cube),
+        "📈 집단별 분석": lambda: show_group_analysis(cube),
+        "🤖 로봇 이력": lambda: show_robot_history(df),
+        "🧠 고급 분석": lambda: show_advanced_analysis(df),
+        "🔁 유형 전이 모델": lambda: show_transition_model(df),
+        "📋 데이터 관리": lambda: show_data_management(df),
+        "🔧 관리자 관리": lambda: show_admin_data_management(df),
+    }
+    section = st.radio("분석 섹션", list(sections), horizontal=True,
+                       key="analytics_section", label_visibility="collapsed")
+    sections[section]()
     
     if st.button("진단 첫화면으로 돌아가기"):
         st.session_state.page = 1
         st.rerun()
 
-def show_trend_analysis(df):
-    """트렌드 분석 표시"""
+@st.fragment
+def show_trend_analysis(cube):
+    """트렌드 분석 표시 (cube: 진단 건수 큐브)
+
+    fragment로 실행되므로 기간 슬라이더·차트 유형 변경 시 이 패널만 다시 실행됩니다.
+    """
     st.subheader("📊 기간별 MBTI 트렌드")
-    min_date, max_date = df['date'].min(), df['date'].max()
+    if cube.date_range() is None:
+        st.info("아직 데이터가 없습니다.")
+        return
+    min_date, max_date = cube.date_range()
     
     # chart_type 변수를 먼저 초기화
     chart_type = "라인"  # 기본값 설정
     
     if min_date == max_date:
         st.info(f"데이터 날짜: {min_date}")
-        df_period = df[df['date']==min_date]
+        period = (min_date, min_date)
     else:
         col1, col2 = st.columns([3, 1])
         with col1:
@@ -2490,24 +2229,26 @@ def show_trend_analysis(df):
         with col2:
             chart_type = st.selectbox("차트 유형", ["라인", "바", "영역"])
         
-        df_period = df[(df['date']>=date_sel[0])&(df['date']<=date_sel[1])]
+        period = date_sel
     
-    if not df_period.empty:
-        fig = create_trend_chart(df_period, chart_type)
+    period_cube = cube.filter(start_date=period[0], end_date=period[1])
+    if period_cube.total() > 0:
+        fig = create_trend_chart(period_cube.daily_mbti(), chart_type)
         st.plotly_chart(fig, use_container_width=True)
         
         # 요약 통계
+        mbti_counts = period_cube.mbti_counts()
         col1, col2, col3 = st.columns(3)
         with col1:
-            st.metric("총 진단 수", len(df_period))
+            st.metric("총 진단 수", period_cube.total())
         with col2:
-            st.metric("MBTI 유형 수", df_period['mbti'].nunique())
+            st.metric("MBTI 유형 수", len(mbti_counts))
         with col3:
-            st.metric("가장 많은 유형", df_period['mbti'].mode().iloc[0] if not df_period['mbti'].mode().empty else "N/A")
+            st.metric("가장 많은 유형", mbti_counts.index[0] if not mbti_counts.empty else "N/A")
         
         # 시간대별 패턴 자동 해석
         st.subheader("🔍 시간대별 패턴 자동 분석")
-        time_interpretations = analyze_time_patterns(df_period)
+        time_interpretations = analyze_time_patterns(period_cube.hour_weekday(), period_cube.date_range())
         
         if time_interpretations:
             for interpretation in time_interpretations:
@@ -2515,8 +2256,12 @@ def show_trend_analysis(df):
         else:
             st.info("시간 패턴 분석을 위해서는 더 많은 데이터가 필요합니다.")
 
-def show_group_analysis(df):
-    """집단별 분석 표시"""
+@st.fragment
+def show_group_analysis(cube):
+    """집단별 분석 표시 (cube: 진단 건수 큐브)
+
+    fragment로 실행되므로 분석 기준·차트 스타일 변경 시 이 패널만 다시 실행됩니다.
+    """
     st.subheader("📈 집단별 MBTI 분포 분석")
     
     col1, col2 = st.columns([1, 2])
@@ -2525,7 +2270,7 @@ def show_group_analysis(df):
         chart_style = st.selectbox("차트 스타일", ["바 차트", "파이 차트", "히트맵"])
     
     with col2:
-        group_df = df.groupby([group_col, "mbti"]).size().unstack(fill_value=0)
+        group_df = cube.crosstab(group_col)
         
         if chart_style == "바 차트":
             fig = px.bar(group_df, title=f"{group_col}별 MBTI 분포", 
@@ -2637,7 +2382,7 @@ def show_group_analysis(df):
             
             # 통계적 유의성 분석 추가
             st.subheader("🔍 통계적 유의성 분석")
-            statistical_interpretations = analyze_statistical_significance(df, group_col)
+            statistical_interpretations = analyze_statistical_significance(group_df)
             
             if statistical_interpretations:
                 for interpretation in statistical_interpretations:
@@ -2645,7 +2390,7 @@ def show_group_analysis(df):
             
             # 다양성 분석 추가
             st.subheader("🔍 다양성 분석")
-            diversity_interpretations = analyze_diversity_index(df)
+            diversity_interpretations = analyze_diversity_index(cube.mbti_counts())
             
             if diversity_interpretations:
                 for interpretation in diversity_interpretations:
@@ -2659,10 +2404,11 @@ def show_robot_history(df):
     bot_records = df[(df['user_id']==st.session_state.user_id) & (df['robot_id']==st.session_state.robot_id)].sort_values("timestamp")
     
     if not bot_records.empty:
-        # 날짜 형식 개선
-        bot_records['timestamp'] = pd.to_datetime(bot_records['timestamp'])
-        bot_records['date_formatted'] = bot_records['timestamp'].dt.strftime('%Y년 %m월 %d일')
-        bot_records['time_formatted'] = bot_records['timestamp'].dt.strftime('%H:%M')
+        # 날짜 형식 개선 (공유 프레임은 읽기 전용이므로 복사본에 추가)
+        bot_records = bot_records.assign(
+            date_formatted=bot_records['timestamp'].dt.strftime('%Y년 %m월 %d일'),
+            time_formatted=bot_records['timestamp'].dt.strftime('%H:%M'),
+        )
         
         # 타임라인 차트 개선
         fig = px.scatter(
@@ -2752,24 +2498,22 @@ def show_robot_history(df):
         if len(bot_records) > 1:
             st.subheader("🔄 MBTI 변화 분석")
             
-            # 변화 패턴 분석
-            changes = []
-            for i in range(1, len(bot_records)):
-                prev_mbti = bot_records.iloc[i-1]['mbti']
-                curr_mbti = bot_records.iloc[i]['mbti']
-                if prev_mbti != curr_mbti:
-                    changes.append({
-                        'from': prev_mbti,
-                        'to': curr_mbti,
-                        'date': bot_records.iloc[i]['date_formatted']
-                    })
+            # 변화 패턴 분석 (전체 전이 표에서 현재 사용자–로봇 조합만 선택)
+            transitions = load_transition_tables(df)["transitions"]
+            bot_transitions = transitions[(transitions['user_id'] == st.session_state.user_id) &
+                                          (transitions['robot_id'] == st.session_state.robot_id)]
+            changes = bot_transitions[bot_transitions['changed']]
             
-            if changes:
+            if not changes.empty:
                 st.info(f"총 {len(changes)}번의 MBTI 변화가 있었습니다.")
                 
                 # 변화 차트
                 if len(changes) > 0:
-                    change_df = pd.DataFrame(changes)
+                    change_df = pd.DataFrame({
+                        'from': changes['from_mbti'],
+                        'to': changes['to_mbti'],
+                        'date': changes['timestamp'].dt.tz_convert("Asia/Seoul").dt.strftime('%Y년 %m월 %d일'),
+                    })
                     fig_changes = px.scatter(
                         change_df,
                         x='date',
@@ -2783,7 +2527,7 @@ def show_robot_history(df):
                 
                 # MBTI 변화 패턴 자동 해석
                 st.subheader("🔍 MBTI 변화 패턴 자동 분석")
-                change_interpretations = analyze_mbti_changes(bot_records)
+                change_interpretations = analyze_mbti_changes(bot_records, bot_transitions)
                 
                 if change_interpretations:
                     for interpretation in change_interpretations:
@@ -2803,13 +2547,67 @@ def show_robot_history(df):
     else:
         st.info(f"로봇 '{st.session_state.robot_id}'의 진단 이력이 없습니다.")
 
+def show_transition_model(df):
+    """전체 로봇의 MBTI 유형 전이 모델 (정상 분포·기대 체류 시간)"""
+    st.subheader("🔁 MBTI 유형 전이 모델")
+    st.caption("같은 사용자–로봇 조합의 연속 진단을 1차 마르코프 연쇄로 본 전체 로봇 기준 모델입니다. "
+               "필터링 옵션과 관계없이 전체 진단으로 계산합니다.")
+    
+    split_options = {"전체": None, "로봇별": "robot_id"}
+    if SCHEMA_CAPABILITIES.get("location"):
+        split_options = {"전체": None, "장소별": "location", "로봇별": "robot_id"}
+    col1, col2 = st.columns(2)
+    with col1:
+        split_label = st.selectbox("구분", list(split_options), key="markov_split")
+    split = split_options[split_label]
+    model = load_transition_model(df, split)
+    
+    group = None
+    if split and model.groups:
+        with col2:
+            group = st.selectbox(split_label.replace("별", ""), sorted(model.groups), key=f"markov_group_{split}")
+    
+    counts = model.counts_for(group)
+    if counts.sum() == 0:
+        st.info("전이 모델을 만들려면 같은 사용자–로봇 조합의 진단이 2개 이상 필요합니다.")
+        return
+    summary = model.summary(group)
+    
+    col1, col2, col3 = st.columns(3)
+    with col1:
+        st.metric("관측 전이 수", f"{int(counts.sum()):,}")
+    with col2:
+        st.metric("유형 유지 비율", f"{np.trace(counts) / counts.sum():.1%}")
+    with col3:
+        top = summary.sort_values("stationary_share", ascending=False).iloc[0]
+        st.metric("정상 분포 최다 유형", top["mbti"], f"{top['stationary_share']:.1%}")
+    
+    probs_df = pd.DataFrame(transition_probabilities(counts), index=list(MBTI_TYPES), columns=list(MBTI_TYPES))
+    fig = px.imshow(probs_df, title="전이 확률 (행: 이전 유형, 열: 다음 유형)",
+                    aspect="auto", color_continuous_scale="Blues")
+    st.plotly_chart(fig, use_container_width=True)
+    
+    fig_share = px.bar(summary, x="mbti", y="stationary_share", color="mbti", color_discrete_map=MBTI_COLORS,
+                       title="장기 정상 분포", labels={"mbti": "MBTI", "stationary_share": "비율"})
+    fig_share.update_layout(showlegend=False)
+    st.plotly_chart(fig_share, use_container_width=True)
+    
+    table = summary.copy()
+    table.columns = ["MBTI", "관측 전이 수", "유지 확률", "정상 분포", "기대 체류 (진단 수)", "기대 체류 (일)"]
+    st.dataframe(table.round(3), use_container_width=True, hide_index=True)
+    st.caption("기대 체류 진단 수 = 1 / (1 − 유지 확률), 기대 체류 일수 = 체류 진단 수 × 그 유형에서의 평균 진단 간격. "
+               "관측되지 않은 전이에는 작은 의사 건수를 더해 계산합니다.")
+
+@st.cache_data(show_spinner=False, max_entries=16)
 def create_mbti_network(df):
     """MBTI 네트워크 분석 생성"""
     if len(df) < 2:
         return None, "네트워크 분석을 위해서는 최소 2개의 진단 데이터가 필요합니다."
     
+    import networkx as nx
+    
     # MBTI 유형 간 관계 분석
-    mbti_counts = df['mbti'].value_counts()
+    mbti_counts = observed_counts(df['mbti'])
     
     # 네트워크 그래프 생성
     G = nx.Graph()
@@ -2818,27 +2616,12 @@ def create_mbti_network(df):
     for mbti in mbti_counts.index:
         G.add_node(mbti, size=mbti_counts[mbti], color=MBTI_COLORS.get(mbti, '#CCCCCC'))
     
-    # 엣지 추가 (공통 특성 기반)
-    mbti_axes = {
-        'E': ['ENFJ', 'ENTJ', 'ENTP', 'ENFP', 'ESFJ', 'ESFP', 'ESTJ', 'ESTP'],
-        'I': ['INFJ', 'INTJ', 'INTP', 'INFP', 'ISFJ', 'ISFP', 'ISTJ', 'ISTP'],
-        'S': ['ESFJ', 'ESFP', 'ESTJ', 'ESTP', 'ISFJ', 'ISFP', 'ISTJ', 'ISTP'],
-        'N': ['ENFJ', 'ENTJ', 'ENTP', 'ENFP', 'INFJ', 'INTJ', 'INTP', 'INFP'],
-        'T': ['ENTJ', 'ENTP', 'ESTJ', 'ESTP', 'INTJ', 'INTP', 'ISTJ', 'ISTP'],
-        'F': ['ENFJ', 'ENFP', 'ESFJ', 'ESFP', 'INFJ', 'INFP', 'ISFJ', 'ISFP'],
-        'J': ['ENFJ', 'ENTJ', 'ESFJ', 'ESTJ', 'INFJ', 'INTJ', 'ISFJ', 'ISTJ'],
-        'P': ['ENTP', 'ENFP', 'ESFP', 'ESTP', 'INTP', 'INFP', 'ISFP', 'ISTP']
-    }
-    
-    # 공통 특성을 가진 MBTI 유형들 간에 엣지 추가
-    for axis, mbti_types in mbti_axes.items():
-        for i, mbti1 in enumerate(mbti_types):
-            for mbti2 in mbti_types[i+1:]:
-                if mbti1 in G.nodes and mbti2 in G.nodes:
-                    if G.has_edge(mbti1, mbti2):
-                        G[mbti1][mbti2]['weight'] += 1
-                    else:
-                        G.add_edge(mbti1, mbti2, weight=1, axis=axis)
+    # 엣지 추가 (공통 특성 기반): 가중치 = 공유하는 글자 수 (4 - 해밍 거리)
+    nodes = [mbti for mbti in mbti_counts.index if mbti in TYPE_CODES]
+    codes = np.array([TYPE_CODES[mbti] for mbti in nodes], dtype=int)
+    shared = SHARED_LETTERS[np.ix_(codes, codes)]
+    for i, j in zip(*np.nonzero(np.triu(shared, k=1))):
+        G.add_edge(nodes[i], nodes[j], weight=int(shared[i, j]))
     
     # 네트워크 레이아웃 계산
     pos = nx.spring_layout(G, k=1, iterations=50)
@@ -2969,26 +2752,20 @@ def show_advanced_analysis(df):
     if len(user_df) > 1:
         # MBTI 변화 패턴 분석
         st.write("**🔄 MBTI 변화 패턴**")
-        user_df_sorted = user_df.sort_values('timestamp')
-        changes = []
-        for i in range(1, len(user_df_sorted)):
-            prev_mbti = user_df_sorted.iloc[i-1]['mbti']
-            curr_mbti = user_df_sorted.iloc[i]['mbti']
-            if prev_mbti != curr_mbti:
-                changes.append({
-                    'from': prev_mbti,
-                    'to': curr_mbti,
-                    'date': user_df_sorted.iloc[i]['timestamp']
-                })
-        
-        if changes:
+        # 전체 전이 표에서 현재 사용자의 로봇별 전이만 선택
+        transitions = load_transition_tables(df)["transitions"]
+        user_transitions = transitions[transitions['user_id'] == st.session_state.user_id]
+        changes = user_transitions[user_transitions['changed']]
+        
+        if not changes.empty:
             st.info(f"총 {len(changes)}번의 MBTI 변화가 있었습니다.")
-            change_df = pd.DataFrame(changes)
+            change_df = changes[['robot_id', 'from_mbti', 'to_mbti', 'timestamp', 'interval_days']].sort_values('timestamp')
+            change_df.columns = ['robot_id', 'from', 'to', 'date', 'days_between']
             st.dataframe(change_df, use_container_width=True)
             
             # MBTI 변화 패턴 자동 해석
             st.subheader("🔍 MBTI 변화 패턴 자동 분석")
-            change_interpretations = analyze_mbti_changes(user_df_sorted)
+            change_interpretations = analyze_mbti_changes(user_df, user_transitions)
             
             if change_interpretations:
                 for interpretation in change_interpretations:
@@ -3003,10 +2780,23 @@ def show_advanced_analysis(df):
             st.write("• **일관된 선호도**: 모든 진단에서 동일한 MBTI 유형 유지")
             st.write("• **신뢰성**: 진단 결과의 높은 신뢰성과 일관성")
             st.write("• **명확한 성향**: 로봇 상호작용에 대한 명확하고 안정적인 선호도")
-        
+
+        # 전체 사용자–로봇 조합의 전이 행렬 (같은 전이 표에서 계산)
+        with st.expander("🌐 전체 MBTI 전이 행렬"):
+            tables = load_transition_tables(df)
+            if len(tables["transitions"]) > 0:
+                matrix_df = pd.DataFrame(tables["matrix"], index=list(MBTI_TYPES), columns=list(MBTI_TYPES))
+                fig_matrix = px.imshow(matrix_df, title="MBTI 전이 행렬 (행: 이전 유형, 열: 다음 유형)",
+                                       aspect="auto", color_continuous_scale="Blues")
+                st.plotly_chart(fig_matrix, use_container_width=True)
+                flip_rates = tables["axis_flip_rates"].copy()
+                flip_rates.columns = ["축", "뒤집힘 수", "전체 전이 대비", "유형 변화 대비"]
+                st.dataframe(flip_rates, use_container_width=True)
+            else:
+                st.info("전이 분석을 위해서는 같은 사용자–로봇 조합의 진단이 2개 이상 필요합니다.")
+
         # 시간대별 분석
         st.write("**⏰ 시간대별 분석**")
-        user_df['hour'] = pd.to_datetime(user_df['timestamp']).dt.hour
         hour_counts = user_df['hour'].value_counts().sort_index()
         
         fig_hour = px.bar(
@@ -3019,7 +2809,8 @@ def show_advanced_analysis(df):
         
         # 시간대별 패턴 자동 해석
         st.subheader("🔍 시간대별 패턴 자동 분석")
-        time_interpretations = analyze_time_patterns(user_df)
+        user_cube = build_cube(user_df)
+        time_interpretations = analyze_time_patterns(user_cube.hour_weekday(), user_cube.date_range())
         
         if time_interpretations:
             for interpretation in time_interpretations:
@@ -3029,6 +2820,13 @@ def show_advanced_analysis(df):
     else:
         st.info("심화 분석을 위해서는 최소 2개의 진단 데이터가 필요합니다.")
 
+@st.cache_data(show_spinner=False, max_entries=8)
+def dataframe_to_bytes(df, fmt="csv"):
+    """다운로드용 CSV/JSON 바이트 (같은 데이터면 다시 직렬화하지 않음)"""
+    if fmt == "json":
+        return df.to_json(orient="records", force_ascii=False, date_format="iso").encode("utf-8")
+    return df.to_csv(index=False).encode("utf-8")
+
 def show_data_management(df):
     """데이터 관리 표시"""
     st.subheader("📋 데이터 관리")
@@ -3055,18 +2853,55 @@ def show_data_management(df):
     user_df = df[df['user_id'] == st.session_state.user_id]
     
     if not user_df.empty:
+        # 다운로드에는 응답 원문이 필요하므로 내 데이터만 export 프로필로 조회 (데이터 버전별 캐시)
+        export_df = load_user_export(st.session_state.user_id)
+        if not export_df.empty:
+            user_df = export_df
         col1, col2 = st.columns(2)
         with col1:
             st.download_button("내 데이터 CSV", 
-                             user_df.to_csv(index=False).encode("utf-8"), 
+                             dataframe_to_bytes(user_df, "csv"), 
                              f"{st.session_state.user_id}_data.csv", "text/csv")
         with col2:
             st.download_button("내 데이터 JSON", 
-                             user_df.to_json(orient="records", force_ascii=False).encode("utf-8"), 
+                             dataframe_to_bytes(user_df, "json"), 
                              f"{st.session_state.user_id}_data.json", "application/json")
     else:
         st.info("다운로드할 데이터가 없습니다.")
 
+@st.cache_data(show_spinner=False, max_entries=4)
+def find_duplicate_records(df):
+    """같은 사용자-로봇 조합의 중복 진단 요약과 레코드 목록 (is_latest: 최신 진단 여부)
+
+    전체를 (user_id, robot_id, timestamp)로 한 번 정렬한 뒤 duplicated로 중복 조합의 행을 고르고,
+    요약(건수, 첫/마지막 진단일, MBTI 순서)은 조합별 groupby 집계로 만듭니다.
+    """
+    keys = ['user_id', 'robot_id']
+    ordered = df.dropna(subset=keys).sort_values(keys + ['timestamp'], kind='mergesort')
+    records = ordered[ordered.duplicated(keys, keep=False)]
+    
+    # 중복 레코드들 (삭제용, 조합별 마지막 행이 최신)
+    duplicate_records = pd.DataFrame({
+        'index': records.index,
+        'id': records['id'].to_numpy(),
+        'user_id': records['user_id'].to_numpy(),
+        'robot_id': records['robot_id'].to_numpy(),
+        'timestamp': records['timestamp'].to_numpy(),
+        'mbti': records['mbti'].to_numpy(),
+        'is_latest': ~records.duplicated(keys, keep='last').to_numpy(),
+    })
+    
+    # 중복된 조합별 요약 (MBTI 순서는 정렬된 전체 값을 한 번 이어 붙인 뒤 조합 경계에서 분리)
+    duplicates_info = records.groupby(keys, sort=False, observed=True).agg(
+        count=('mbti', 'size'),
+        first_date=('timestamp', 'first'),
+        last_date=('timestamp', 'last'),
+    ).reset_index()
+    group_start = ~records.duplicated(keys).to_numpy()
+    parts = np.where(group_start, "\n", " → ").astype(object) + records['mbti'].astype(str).to_numpy(dtype=object)
+    duplicates_info['mbti_changes'] = "".join(parts).split("\n")[1:]
+    return duplicates_info, duplicate_records
+
 def show_admin_data_management(df):
     """관리자 전용 데이터 관리"""
     st.subheader("🔧 관리자 데이터 관리")
@@ -3086,84 +2921,99 @@ def show_admin_data_management(df):
     with col4:
         st.metric("MBTI 유형 수", df['mbti'].nunique())
     
-    # 데이터 관리 탭
-    admin_tab1, admin_tab2, admin_tab3, admin_tab4 = st.tabs([
-        "📊 전체 데이터", "🗑️ 중복 데이터 정리", "📥 데이터 내보내기", "⚙️ 시스템 관리"
-    ])
+    # 데이터 관리 섹션 (선택된 섹션만 실행)
+    admin_section = st.radio("관리 섹션", ["📊 전체 데이터", "🗑️ 중복 데이터 정리", "📥 데이터 내보내기", "⚙️ 시스템 관리"],
+                             horizontal=True, key="admin_data_section", label_visibility="collapsed")
     
-    with admin_tab1:
+    if admin_section == "📊 전체 데이터":
         st.subheader("📊 전체 진단 데이터")
         
-        # 필터링 옵션
-        col1, col2, col3 = st.columns(3)
+        # 필터링 옵션 (DB 연결이 있으면 PostgREST 조건으로 서버에서 필터링하고 페이지 단위로 조회)
+        col1, col2, col3, col4 = st.columns(4)
         with col1:
             user_filter = st.text_input("사용자 ID 필터", placeholder="특정 사용자 검색")
         with col2:
             robot_filter = st.text_input("로봇 ID 필터", placeholder="특정 로봇 검색")
         with col3:
-            mbti_filter = st.selectbox("MBTI 유형 필터", ["전체"] + list(df['mbti'].unique()))
-        
-        # 필터링 적용
-        filtered_df = df.copy()
-        if user_filter:
-            filtered_df = filtered_df[filtered_df['user_id'].str.contains(user_filter, case=False, na=False)]
-        if robot_filter:
-            filtered_df = filtered_df[filtered_df['robot_id'].str.contains(robot_filter, case=False, na=False)]
-        if mbti_filter != "전체":
-            filtered_df = filtered_df[filtered_df['mbti'] == mbti_filter]
-        
-        st.dataframe(filtered_df, use_container_width=True)
-        st.info(f"필터링된 결과: {len(filtered_df)}건")
-    
-    with admin_tab2:
+            mbti_filter = st.selectbox("MBTI 유형 필터", ["전체"] + sorted(MBTI_TYPES))
+        with col4:
+            first_date, last_date = df['date'].min().date(), df['date'].max().date()
+            period = st.date_input("기간", value=(first_date, last_date))
+        start_date, end_date = (period[0], period[-1]) if period else (None, None)
+        
+        data_version = get_data_version()
+        if data_version is not None:
+            filters = tuple(response_filters(start_date, end_date, user_filter.strip(), robot_filter.strip(),
+                                             None if mbti_filter == "전체" else mbti_filter))
+            # 조건이 바뀌면 첫 페이지부터 (cursors: 각 페이지 시작 직전 id)
+            paging = st.session_state.get("admin_paging")
+            if paging is None or paging["filters"] != filters:
+                paging = st.session_state.admin_paging = {"filters": filters, "cursors": [0]}
+            page_size = st.selectbox("페이지 크기", [100, 500, 1000], index=1, key="admin_page_size")
+            
+            page_df = _response_page_for_version(data_version, filters, paging["cursors"][-1], page_size)
+            total = _response_count_for_version(data_version, filters)
+            st.dataframe(page_df, use_container_width=True)
+            st.info(f"필터링된 결과: {total}건 (페이지 {len(paging['cursors'])}, {len(page_df)}건 표시)")
+            
+            col1, col2 = st.columns(2)
+            with col1:
+                if st.button("◀ 이전 페이지", disabled=len(paging["cursors"]) == 1):
+                    paging["cursors"].pop()
+                    st.rerun()
+            with col2:
+                if st.button("다음 페이지 ▶", disabled=len(page_df) < page_size):
+                    paging["cursors"].append(int(page_df['id'].max()))
+                    st.rerun()
+        else:
+            # DB 연결이 없으면 불러온 데이터에서 필터링
+            filtered_df = df
+            if user_filter:
+                filtered_df = filtered_df[filtered_df['user_id'].str.contains(user_filter, case=False, na=False, regex=False)]
+            if robot_filter:
+                filtered_df = filtered_df[filtered_df['robot_id'].str.contains(robot_filter, case=False, na=False, regex=False)]
+            if mbti_filter != "전체":
+                filtered_df = filtered_df[filtered_df['mbti'] == mbti_filter]
+            if start_date is not None:
+                local_dates = filtered_df['date'].dt.date
+                filtered_df = filtered_df[(local_dates >= start_date) & (local_dates <= end_date)]
+            
+            st.dataframe(filtered_df, use_container_width=True)
+            st.info(f"필터링된 결과: {len(filtered_df)}건")
+    
+    if admin_section == "🗑️ 중복 데이터 정리":
         st.subheader("🗑️ 중복 데이터 정리")
         
         # 중복 진단 확인 - 더 상세한 분석
-        duplicates_info = []
-        duplicate_records = []
-        
-        for (user_id, robot_id), group in df.groupby(['user_id', 'robot_id']):
-            if len(group) > 1:
-                # 중복된 그룹의 상세 정보
-                group_sorted = group.sort_values('timestamp')
-                duplicates_info.append({
-                    'user_id': user_id,
-                    'robot_id': robot_id,
-                    'count': len(group),
-                    'first_date': group_sorted.iloc[0]['timestamp'],
-                    'last_date': group_sorted.iloc[-1]['timestamp'],
-                    'mbti_changes': ' → '.join(group_sorted['mbti'].tolist())
-                })
-                
-                # 중복 레코드들 저장 (삭제용)
-                for idx, record in group_sorted.iterrows():
-                    duplicate_records.append({
-                        'index': idx,
-                        'user_id': user_id,
-                        'robot_id': robot_id,
-                        'timestamp': record['timestamp'],
-                        'mbti': record['mbti'],
-                        'is_latest': idx == group_sorted.index[-1]  # 최신 데이터 여부
-                    })
+        duplicates_info, duplicate_records = find_duplicate_records(df)
         
-        if duplicates_info:
+        if not duplicates_info.empty:
             st.warning(f"🔍 중복 진단 발견: {len(duplicates_info)}개 사용자-로봇 조합")
             
             # 중복 데이터 요약 표시
-            duplicates_df = pd.DataFrame(duplicates_info)
+            duplicates_df = duplicates_info.copy()
             duplicates_df.columns = ['사용자 ID', '로봇 ID', '중복 수', '첫 진단일', '마지막 진단일', 'MBTI 변화']
             st.dataframe(duplicates_df, use_container_width=True)
             
             # 상세 중복 레코드 표시
             st.subheader("📋 상세 중복 레코드")
-            detailed_df = pd.DataFrame(duplicate_records)
-            detailed_df['상태'] = detailed_df['is_latest'].apply(lambda x: '✅ 최신' if x else '🗑️ 중복')
+            detailed_df = duplicate_records.copy()
+            detailed_df['상태'] = np.where(detailed_df['is_latest'], '✅ 최신', '🗑️ 중복')
             
             # 표시용 데이터프레임 정리
             display_df = detailed_df[['user_id', 'robot_id', 'timestamp', 'mbti', '상태']].copy()
             display_df.columns = ['사용자 ID', '로봇 ID', '진단 시간', 'MBTI', '상태']
             st.dataframe(display_df, use_container_width=True)
             
+            # 정리 대상 미리보기 (서버 dry-run, 실제 삭제와 같은 쿼리)
+            if st.button("🔍 정리 대상 미리보기 (dry-run)"):
+                preview = rpc_dedup_responses(supabase, dry_run=True) if supabase else None
+                if preview:
+                    st.info(f"정리 대상: {preview['duplicate_groups']}개 사용자-로봇 조합, {preview['stale_rows']}건 삭제 예정")
+                else:
+                    stale_count = int((~duplicate_records['is_latest']).sum())
+                    st.info(f"정리 대상 (로컬 계산): {len(duplicates_info)}개 사용자-로봇 조합, {stale_count}건 삭제 예정")
+            
             # 중복 데이터 관리 버튼들
             col1, col2, col3 = st.columns(3)
             
@@ -3172,17 +3022,17 @@ def show_admin_data_management(df):
                     try:
                         # 실제 데이터베이스에서 중복 제거
                         if supabase:
-                            deleted_count = 0
-                            for record in duplicate_records:
-                                if not record['is_latest']:  # 최신이 아닌 데이터만 삭제
-                                    # 실제 삭제 로직 (주의: 실제 환경에서는 더 안전한 방법 사용)
-                                    try:
-                                        supabase.table("responses").delete().eq("user_id", record['user_id']).eq("robot_id", record['robot_id']).eq("timestamp", record['timestamp']).execute()
-                                        deleted_count += 1
-                                    except Exception as e:
-                                        st.error(f"삭제 실패: {e}")
+                            # 서버에서 윈도 함수 기반 DELETE 한 번으로 정리 (create_dedup_rpc_function.sql)
+                            result = rpc_dedup_responses(supabase, dry_run=False)
+                            if result is not None:
+                                deleted_count = result['deleted_rows']
+                            else:
+                                # RPC가 없는 경우 최신이 아닌 행을 id 묶음으로 삭제
+                                stale_ids = duplicate_records.loc[~duplicate_records['is_latest'], 'id'].tolist()
+                                deleted_count = delete_responses_by_id(supabase, stale_ids)
                             
                             if deleted_count > 0:
+                                invalidate_response_cache()
                                 st.success(f"✅ {deleted_count}개의 중복 데이터가 정리되었습니다!")
                                 st.balloons()
                                 time.sleep(1)
@@ -3202,8 +3052,7 @@ def show_admin_data_management(df):
             with col3:
                 if st.button("📥 중복 데이터 내보내기", use_container_width=True):
                     # 중복 데이터만 CSV로 내보내기
-                    duplicate_data_df = pd.DataFrame(duplicate_records)
-                    csv_data = duplicate_data_df.to_csv(index=False).encode('utf-8')
+                    csv_data = duplicate_records.to_csv(index=False).encode('utf-8')
                     
                     st.download_button(
                         "📥 중복 데이터 CSV 다운로드",
@@ -3220,17 +3069,24 @@ def show_admin_data_management(df):
             st.success("✅ 중복 데이터가 없습니다.")
             st.info("모든 사용자-로봇 조합이 고유한 진단 데이터를 가지고 있습니다.")
     
-    with admin_tab3:
+    # 내보내기·백업은 응답 원문을 포함한 export 프로필 사용 (해당 섹션에서만 로드)
+    export_df = df
+    if admin_section in ("📥 데이터 내보내기", "⚙️ 시스템 관리"):
+        export_df = load_shared_responses("export")
+        if export_df.empty:
+            export_df = df
+    
+    if admin_section == "📥 데이터 내보내기":
         st.subheader("📥 데이터 내보내기")
         
         col1, col2 = st.columns(2)
         with col1:
             st.download_button("전체 데이터 CSV", 
-                             df.to_csv(index=False).encode("utf-8"), 
+                             dataframe_to_bytes(export_df, "csv"), 
                              "all_diagnosis_data.csv", "text/csv")
         with col2:
             st.download_button("전체 데이터 JSON", 
-                             df.to_json(orient="records", force_ascii=False).encode("utf-8"), 
+                             dataframe_to_bytes(export_df, "json"), 
                              "all_diagnosis_data.json", "application/json")
         
         # 통계 리포트 생성
@@ -3241,14 +3097,14 @@ def show_admin_data_management(df):
             "고유 로봇 수": df['robot_id'].nunique(),
             "가장 많은 MBTI": df['mbti'].mode().iloc[0] if not df['mbti'].mode().empty else "N/A",
             "평균 연령대": df['age_group'].mode().iloc[0] if not df['age_group'].mode().empty else "N/A",
-            "성별 분포": df['gender'].value_counts().to_dict()
+            "성별 분포": observed_counts(df['gender']).to_dict()
         }
         
         st.download_button("통계 리포트 JSON", 
                          str(report_data).encode("utf-8"), 
                          "diagnosis_report.json", "application/json")
     
-    with admin_tab4:
+    if admin_section == "⚙️ 시스템 관리":
         st.subheader("⚙️ 시스템 관리")
         
         col1, col2 = st.columns(2)
@@ -3260,13 +3116,15 @@ def show_admin_data_management(df):
                 st.success("✅ 데이터베이스 연결 정상")
                 st.info(f"총 레코드 수: {len(df)}")
                 
-                # 테이블별 데이터 현황
+                # 테이블별 데이터 현황 (행을 내려받지 않고 개수만 조회)
                 try:
-                    responses_count = len(supabase.table("responses").select("id").execute().data)
-                    robots_count = len(supabase.table("user_robots").select("id").execute().data)
+                    use_estimate = st.checkbox("추정 행 수 사용 (대용량 테이블)", value=False,
+                                               help="PostgreSQL 통계 기반 추정치로, 전체 스캔 없이 즉시 조회됩니다.")
+                    stats = get_table_stats("estimated" if use_estimate else "exact")
                     
-                    st.metric("진단 데이터", f"{responses_count}건")
-                    st.metric("등록된 로봇", f"{robots_count}개")
+                    st.metric("진단 데이터", f"{stats['total_responses']}건")
+                    st.metric("진단 참여 사용자", f"{stats['total_users']}명")
+                    st.metric("등록된 로봇", f"{stats['total_robots']}개")
                 except:
                     st.info("상세 통계를 가져올 수 없습니다.")
                     
@@ -3354,7 +3212,7 @@ def show_admin_data_management(df):
             if st.button("📊 CSV 백업 다운로드", use_container_width=True):
                 try:
                     # CSV는 날짜 직렬화 문제가 없음
-                    csv_data = df.to_csv(index=False).encode('utf-8')
+                    csv_data = dataframe_to_bytes(export_df, "csv")
                     
                     st.download_button(
                         "📥 CSV 백업 파일 다운로드",
@@ -3370,7 +3228,7 @@ def show_admin_data_management(df):
             if st.button("💾 전체 백업 다운로드", use_container_width=True):
                 try:
                     # 백업 데이터 생성 - JSON 직렬화 가능하도록 변환
-                    df_backup = df.copy()
+                    df_backup = export_df.copy()
                     
                     # 날짜/시간 컬럼을 문자열로 변환
                     for col in df_backup.columns:
@@ -3421,6 +3279,8 @@ def show_admin_data_management(df):
             
             # 시스템 상태 체크
             if st.button("🔄 시스템 상태 새로고침", use_container_width=True):
+                # 스키마 변경(마이그레이션 실행 등)을 반영하도록 기능 확인을 다시 수행
+                init_supabase.clear()
                 st.success("시스템 상태가 새로고침되었습니다.")
                 st.rerun()
 
@@ -3438,6 +3298,28 @@ def init_local_storage():
         st.session_state.local_user_robots = {}
 
 # 데이터베이스 함수들
+def build_question_rows(user_id, robot_id, mbti_result, responses, location, user_profile, diagnosis_session_id):
+    """진단 한 건의 문항별 저장 행 목록 생성"""
+    created_at = datetime.now(pytz.UTC).isoformat()
+    return [
+        {
+            'user_id': sanitize_input(user_id),
+            'robot_id': sanitize_input(robot_id),
+            'question_id': question_id,
+            'question_text': response_data['question'],
+            'response_score': response_data['score'],
+            'mbti_dimension': response_data['dimension'],
+            'mbti_result': mbti_result,
+            'location': location,
+            'gender': user_profile.get('gender', ''),
+            'age_group': user_profile.get('age_group', ''),
+            'job': user_profile.get('job', ''),
+            'diagnosis_session_id': diagnosis_session_id,
+            'created_at': created_at
+        }
+        for question_id, response_data in responses.items()
+    ]
+
 def save_to_database(user_id, robot_id, mbti_result, responses, location, user_profile):
     """진단 결과를 데이터베이스 또는 로컬 저장소에 저장"""
     # 진단 세션 ID 생성
@@ -3445,26 +3327,11 @@ def save_to_database(user_id, robot_id, mbti_result, responses, location, user_p
     
     if supabase:
         try:
-            # 응답 데이터 저장
-            for question_id, response_data in responses.items():
-                data = {
-                    'user_id': sanitize_input(user_id),
-                    'robot_id': sanitize_input(robot_id),
-                    'question_id': question_id,
-                    'question_text': response_data['question'],
-                    'response_score': response_data['score'],
-                    'mbti_dimension': response_data['dimension'],
-                    'mbti_result': mbti_result,
-                    'location': location,
-                    'gender': user_profile.get('gender', ''),
-                    'age_group': user_profile.get('age_group', ''),
-                    'job': user_profile.get('job', ''),
-                    'diagnosis_session_id': diagnosis_session_id,
-                    'created_at': datetime.now(pytz.UTC).isoformat()
-                }
-                
-                result = supabase.table('responses').insert(data).execute()
-                
+            # 모든 문항 행을 한 번의 bulk insert로 저장 (단일 INSERT 문이므로 전부 저장되거나 전부 실패)
+            rows = build_question_rows(user_id, robot_id, mbti_result, responses, location, user_profile, diagnosis_session_id)
+            supabase.table('responses').insert(rows).execute()
+            invalidate_response_cache()
+            
             st.session_state.current_diagnosis_id = diagnosis_session_id
             return True, "진단 결과가 성공적으로 저장되었습니다."
             
@@ -3475,25 +3342,9 @@ def save_to_database(user_id, robot_id, mbti_result, responses, location, user_p
         try:
             init_local_storage()
             
-            # 응답 데이터를 로컬에 저장
-            for question_id, response_data in responses.items():
-                data = {
-                    'user_id': sanitize_input(user_id),
-                    'robot_id': sanitize_input(robot_id),
-                    'question_id': question_id,
-                    'question_text': response_data['question'],
-                    'response_score': response_data['score'],
-                    'mbti_dimension': response_data['dimension'],
-                    'mbti_result': mbti_result,
-                    'location': location,
-                    'gender': user_profile.get('gender', ''),
-                    'age_group': user_profile.get('age_group', ''),
-                    'job': user_profile.get('job', ''),
-                    'diagnosis_session_id': diagnosis_session_id,
-                    'created_at': datetime.now(pytz.UTC).isoformat()
-                }
-                
-                st.session_state.local_data.append(data)
+            # 행을 모두 만든 뒤 한 번에 추가 (중간 오류 시 일부만 저장되지 않도록)
+            rows = build_question_rows(user_id, robot_id, mbti_result, responses, location, user_profile, diagnosis_session_id)
+            st.session_state.local_data.extend(rows)
             
             st.session_state.current_diagnosis_id = diagnosis_session_id
             return True, "진단 결과가 로컬에 저장되었습니다. (데이터베이스 미연결)"
@@ -3535,12 +3386,10 @@ def load_data_from_database():
     """데이터베이스 또는 로컬 저장소에서 데이터 로드"""
     if supabase:
         try:
-            result = supabase.table('responses').select('*').execute()
-            if result.data:
-                df = pd.DataFrame(result.data)
+            df = load_all_responses(supabase)
+            if not df.empty:
                 df['created_at'] = pd.to_datetime(df['created_at'])
-                return df
-            return pd.DataFrame()
+            return df
         except Exception as e:
             st.error(f"데이터 로드 중 오류: {str(e)}")
             return pd.DataFrame()
@@ -0,0 +1,355 @@
+"""대시보드 패널용 사전 집계 진단 건수 큐브 (Streamlit 비의존)
+
+(date, hour, weekday, location, gender, age_group, job, robot_id, mbti) 조합별 진단 건수를
+MultiIndex Series 하나로 보관합니다. MultiIndex가 차원마다 값 사전(levels)과 정수 코드(codes)를
+가지므로 원본 행 대신 고유 조합 수만큼만 메모리를 쓰고, 모든 패널 조회(기간 필터, 그룹별 합계,
+교차표)는 고유 조합 수에 비례하는 시간에 끝납니다.
+
+날짜·시간·요일은 Asia/Seoul 기준이며 weekday는 1=월요일 … 7=일요일입니다.
+큐브는 .snapshot/cube.npz에 저장되고 새 진단(id > last_id)의 건수만 더해 갱신합니다.
+삭제가 감지되거나(행 수 불일치) 기존 진단이 수정되면(데이터 버전의 마지막 수정 시각 변경) 전체를 다시 집계합니다.
+
+서버 집계 RPC(create_analytics_rpc_functions.sql)가 있으면 전체 데이터 패널은 ServerCube로 조회하여
+원본 행 대신 일별·시간대별·그룹별 집계 행만 받습니다. RPC가 없을 때 위의 로컬 큐브로 대체합니다.
+"""
+import os
+import threading
+from datetime import date, timedelta
+
+import numpy as np
+import pandas as pd
+
+from mbti_db import (
+    fetch_data_version, iter_response_chunks, load_all_responses, rpc_daily_counts, rpc_group_crosstab,
+    rpc_hour_weekday_histogram,
+)
+from mbti_snapshot import SNAPSHOT_DIR
+
+DIMENSIONS = ("date", "hour", "weekday", "location", "gender", "age_group", "job", "robot_id", "mbti")
+# 정수로 보관하는 차원 (나머지는 문자열 값 사전)
+INTEGER_DIMENSIONS = ("date", "hour", "weekday")
+TIMEZONE = "Asia/Seoul"
+# date 차원은 1970-01-01부터의 일수로 보관
+EPOCH = date(1970, 1, 1)
+# mbti_group_crosstab RPC가 집계할 수 있는 그룹 차원
+SERVER_GROUP_DIMENSIONS = ("location", "gender", "age_group", "job", "robot_id")
+
+_sync_lock = threading.Lock()
+
+
+def cube_columns(unavailable=()):
+    """큐브 갱신에 필요한 select 컬럼 (스키마에 없는 컬럼 제외, 해당 차원은 결측으로 집계)"""
+    return ",".join(["id", "timestamp"] + [d for d in DIMENSIONS
+                                           if d not in INTEGER_DIMENSIONS and d not in unavailable])
+
+
+def to_day_number(value):
+    return (value - EPOCH).days
+
+
+def from_day_number(day):
+    return EPOCH + timedelta(days=int(day))
+
+
+def _empty_cells():
+    index = pd.MultiIndex(levels=[[]] * len(DIMENSIONS), codes=[[]] * len(DIMENSIONS), names=list(DIMENSIONS))
+    return pd.Series(np.zeros(0, dtype=np.int64), index=index, name="count")
+
+
+def _canonical(cells):
+    """결측 값을 level이 아닌 코드 -1로 표현하도록 MultiIndex 재구성 (groupby(dropna=False)는 NaN을 level에 넣음)"""
+    index = cells.index
+    cells.index = pd.MultiIndex.from_arrays([index.get_level_values(i) for i in range(index.nlevels)],
+                                            names=index.names)
+    return cells
+
+
+def aggregate_rows(rows):
+    """진단 행을 조합별 건수 Series로 집계 (timestamp가 없는 행은 제외, 없는 차원 컬럼은 결측)"""
+    local = pd.to_datetime(rows["timestamp"], utc=True, errors="coerce").dt.tz_convert(TIMEZONE)
+    valid = local.notna().to_numpy()
+    local = local[valid]
+    keys = {
+        "date": ((local.dt.tz_localize(None).dt.normalize() - pd.Timestamp(EPOCH)).dt.days).astype(np.int32),
+        "hour": local.dt.hour.astype(np.int8),
+        "weekday": (local.dt.weekday + 1).astype(np.int8),
+    }
+    for dim in DIMENSIONS[3:]:
+        keys[dim] = rows[dim][valid] if dim in rows.columns else pd.Series(None, index=local.index, dtype=object)
+    frame = pd.DataFrame({dim: np.asarray(values) for dim, values in keys.items()})
+    if frame.empty:
+        return _empty_cells()
+    return _canonical(frame.groupby(list(DIMENSIONS), dropna=False).size().rename("count").astype(np.int64))
+
+
+class CountCube:
+    """차원 조합별 진단 건수 (조회 결과는 모두 고유 조합 수에 비례하는 비용으로 계산)"""
+
+    __slots__ = ("cells", "last_id", "row_count", "last_updated")
+
+    def __init__(self, cells=None, last_id=0, row_count=0, last_updated=None):
+        self.cells = _empty_cells() if cells is None else cells
+        self.last_id = last_id
+        self.row_count = row_count
+        # 집계에 반영된 데이터 버전의 마지막 수정 시각 (updated_at 미사용이면 None)
+        self.last_updated = last_updated
+
+    def __len__(self):
+        return len(self.cells)
+
+    def __repr__(self):
+        return f"CountCube({len(self)} cells, total={self.total()}, last_id={self.last_id})"
+
+    def update(self, rows):
+        """id > last_id 인 신규 진단 행의 건수를 더함"""
+        if rows is None or rows.empty:
+            return
+        new_cells = aggregate_rows(rows)
+        if len(self.cells):
+            new_cells = _canonical(pd.concat([self.cells, new_cells])
+                                   .groupby(level=list(DIMENSIONS), dropna=False).sum())
+        self.cells = new_cells
+        if "id" in rows.columns:
+            self.last_id = max(self.last_id, int(rows["id"].max()))
+        self.row_count += len(rows)
+
+    def filter(self, start_date=None, end_date=None, **equals):
+        """기간(양 끝 포함)과 차원 값이 일치하는 조합만 남긴 큐브"""
+        mask = np.ones(len(self.cells), dtype=bool)
+        index = self.cells.index
+        if start_date is not None or end_date is not None:
+            days = index.get_level_values("date").to_numpy()
+            if start_date is not None:
+                mask &= days >= to_day_number(start_date)
+            if end_date is not None:
+                mask &= days <= to_day_number(end_date)
+        for dim, value in equals.items():
+            mask &= (index.get_level_values(dim) == value)
+        return CountCube(self.cells[mask], self.last_id, self.row_count, self.last_updated)
+
+    def total(self):
+        return int(self.cells.sum())
+
+    def counts(self, by):
+        """차원별 건수 Series (결측 값 그룹은 제외, pandas groupby와 동일)"""
+        by = [by] if isinstance(by, str) else list(by)
+        counts = self.cells.groupby(level=by).sum()
+        counts = counts[counts > 0]
+        if "date" in by:
+            counts = counts.rename(index=from_day_number, level="date" if len(by) > 1 else None)
+        return counts
+
+    def crosstab(self, row, column="mbti"):
+        """row × column 교차표 (pd.crosstab과 같은 형태)"""
+        return self.counts([row, column]).unstack(fill_value=0)
+
+    def mbti_counts(self):
+        """MBTI별 건수 (많은 순)"""
+        return self.counts("mbti").sort_values(ascending=False, kind="mergesort")
+
+    def date_range(self):
+        """(첫 날짜, 마지막 날짜) (비어 있으면 None)"""
+        if not len(self.cells):
+            return None
+        days = self.cells.index.get_level_values("date")
+        return from_day_number(days.min()), from_day_number(days.max())
+
+    def daily_mbti(self):
+        """일별 MBTI 진단 수 (date, mbti, count 열, date는 datetime64)"""
+        daily = self.counts(["date", "mbti"]).reset_index()
+        daily["date"] = pd.to_datetime(daily["date"])
+        return daily
+
+    def hour_weekday(self):
+        """시간대 × 요일 진단 수 (hour, weekday, count 열)"""
+        return self.counts(["hour", "weekday"]).reset_index()
+
+    def to_arrays(self):
+        index = self.cells.index
+        arrays = {"counts": self.cells.to_numpy(dtype=np.int64),
+                  "watermark": np.array([self.last_id, self.row_count], dtype=np.int64),
+                  "last_updated": np.array(self.last_updated or "")}
+        for dim, level, codes in zip(DIMENSIONS, index.levels, index.codes):
+            arrays[f"{dim}_codes"] = np.asarray(codes, dtype=np.int32)
+            arrays[f"{dim}_levels"] = level.to_numpy(dtype=np.int64 if dim in INTEGER_DIMENSIONS else str)
+        return arrays
+
+    @classmethod
+    def from_arrays(cls, arrays):
+        index = pd.MultiIndex(levels=[arrays[f"{dim}_levels"] for dim in DIMENSIONS],
+                              codes=[arrays[f"{dim}_codes"] for dim in DIMENSIONS], names=list(DIMENSIONS))
+        last_id, row_count = (int(v) for v in arrays["watermark"])
+        last_updated = str(arrays["last_updated"]) if "last_updated" in arrays else ""
+        return cls(pd.Series(arrays["counts"], index=index, name="count"), last_id, row_count, last_updated or None)
+
+
+def fetch_aggregate(client, kind, start_date=None, end_date=None, group_col=None):
+    """서버 집계 RPC 결과 (kind: "daily", "hour_weekday", "crosstab", RPC가 없으면 None)"""
+    if kind == "daily":
+        return rpc_daily_counts(client, start_date, end_date)
+    if kind == "hour_weekday":
+        return rpc_hour_weekday_histogram(client, start_date, end_date)
+    if kind == "crosstab":
+        return rpc_group_crosstab(client, group_col, start_date, end_date)
+    raise ValueError(f"지원하지 않는 집계: {kind}")
+
+
+class ServerCube:
+    """서버 집계 RPC로 조회하는 큐브 (CountCube와 같은 조회 메서드, 기간 필터만 지원)
+
+    aggregates(kind, start_date, end_date, group_col)는 fetch_aggregate와 같은 결과를 돌려주는 함수로,
+    앱은 데이터 버전별로 캐시한 조회 함수를 넘깁니다. 일별 MBTI 건수는 전체 기간을 한 번 받아
+    기간 필터·합계·MBTI별 건수를 계산하고, 시간대 × 요일과 그룹별 교차표는 기간을 넘겨 서버에서 집계합니다.
+    mbti가 없는 진단은 서버 집계에서 제외됩니다.
+    """
+
+    __slots__ = ("aggregates", "start_date", "end_date")
+
+    def __init__(self, aggregates, start_date=None, end_date=None):
+        self.aggregates = aggregates
+        self.start_date = start_date
+        self.end_date = end_date
+
+    def __repr__(self):
+        return f"ServerCube({self.start_date}~{self.end_date}, total={self.total()})"
+
+    def _daily(self):
+        daily = self.aggregates("daily", None, None, None)
+        days = daily["date"].dt.date
+        mask = np.ones(len(daily), dtype=bool)
+        if self.start_date is not None:
+            mask &= (days >= self.start_date).to_numpy()
+        if self.end_date is not None:
+            mask &= (days <= self.end_date).to_numpy()
+        return daily[mask]
+
+    def filter(self, start_date=None, end_date=None, **equals):
+        """기간(양 끝 포함)으로 좁힌 큐브 (차원 값 조건은 서버 집계에 없으므로 지원하지 않음)"""
+        if equals:
+            raise NotImplementedError(f"서버 집계는 기간 필터만 지원합니다: {sorted(equals)}")
+        if start_date is not None and self.start_date is not None:
+            start_date = max(start_date, self.start_date)
+        if end_date is not None and self.end_date is not None:
+            end_date = min(end_date, self.end_date)
+        return ServerCube(self.aggregates, start_date if start_date is not None else self.start_date,
+                          end_date if end_date is not None else self.end_date)
+
+    def total(self):
+        return int(self._daily()["count"].sum())
+
+    def counts(self, by):
+        """차원별 건수 Series (date·mbti는 일별 집계, hour·weekday는 시간대 집계, 그룹 차원은 교차표)"""
+        by = [by] if isinstance(by, str) else list(by)
+        if set(by) <= {"date", "mbti"}:
+            daily = self._daily().assign(date=lambda d: d["date"].dt.date)
+            counts = daily.groupby(by)["count"].sum()
+        elif set(by) <= {"hour", "weekday"}:
+            counts = self.hour_weekday().groupby(by)["count"].sum()
+        elif by[0] in SERVER_GROUP_DIMENSIONS and by[1:] in ([], ["mbti"]):
+            table = self.aggregates("crosstab", self.start_date, self.end_date, by[0])
+            counts = table.stack() if len(by) == 2 else table.sum(axis=1)
+        else:
+            raise ValueError(f"서버 집계로 계산할 수 없는 차원: {by}")
+        counts = counts.astype(np.int64).rename("count")
+        return counts[counts > 0]
+
+    def crosstab(self, row, column="mbti"):
+        """row × column 교차표 (pd.crosstab과 같은 형태)"""
+        if column == "mbti" and row in SERVER_GROUP_DIMENSIONS:
+            table = self.aggregates("crosstab", self.start_date, self.end_date, row)
+            table = table.loc[:, table.sum() > 0]
+            table.columns.name = "mbti"
+            return table.astype(np.int64)
+        return self.counts([row, column]).unstack(fill_value=0)
+
+    def mbti_counts(self):
+        """MBTI별 건수 (많은 순)"""
+        return self.counts("mbti").sort_values(ascending=False, kind="mergesort")
+
+    def date_range(self):
+        """(첫 날짜, 마지막 날짜) (비어 있으면 None)"""
+        days = self._daily()["date"]
+        if days.empty:
+            return None
+        return days.min().date(), days.max().date()
+
+    def daily_mbti(self):
+        """일별 MBTI 진단 수 (date, mbti, count 열, date는 datetime64)"""
+        return self._daily().reset_index(drop=True)
+
+    def hour_weekday(self):
+        """시간대 × 요일 진단 수 (hour, weekday, count 열)"""
+        hourly = self.aggregates("hour_weekday", self.start_date, self.end_date, None)
+        return hourly[hourly["count"] > 0].sort_values(["hour", "weekday"]).reset_index(drop=True)
+
+
+def server_cube(aggregates):
+    """서버 집계 RPC가 있으면 ServerCube, 없으면 None (호출 측이 로컬 큐브로 대체)"""
+    if aggregates("daily", None, None, None) is None:
+        return None
+    return ServerCube(aggregates)
+
+
+def build_cube(df):
+    """진단 DataFrame으로 큐브 생성"""
+    cube = CountCube()
+    cube.update(df)
+    return cube
+
+
+def _cube_path(snapshot_dir):
+    return os.path.join(snapshot_dir, "cube.npz")
+
+
+def read_cube(snapshot_dir=SNAPSHOT_DIR):
+    """저장된 큐브 로드 (없거나 읽을 수 없으면 빈 큐브)"""
+    path = _cube_path(snapshot_dir)
+    if not os.path.exists(path):
+        return CountCube()
+    try:
+        with np.load(path) as arrays:
+            return CountCube.from_arrays(arrays)
+    except Exception as e:
+        print(f"⚠️ 건수 큐브 파일을 읽지 못해 다시 집계합니다: {e}")
+        return CountCube()
+
+
+def write_cube(cube, snapshot_dir=SNAPSHOT_DIR):
+    """큐브를 임시 파일에 쓴 뒤 원자적으로 교체"""
+    os.makedirs(snapshot_dir, exist_ok=True)
+    path = _cube_path(snapshot_dir)
+    with open(path + ".tmp", "wb") as f:
+        np.savez(f, **cube.to_arrays())
+    os.replace(path + ".tmp", path)
+
+
+def sync_cube(client, columns=None, snapshot_dir=SNAPSHOT_DIR, data_version=None):
+    """저장된 큐브에 last_id 이후 진단 건수만 더함
+
+    data_version(max(id), 행 수, 마지막 수정 시각)이 큐브와 같으면 조회 없이 반환하고,
+    마지막 수정 시각이 바뀌었거나(재채점 등 UPDATE) 신규 행을 더한 행 수가 서버 행 수와 다르면(삭제)
+    전체를 다시 집계합니다.
+    """
+    columns = columns or cube_columns()
+    with _sync_lock:
+        cube = read_cube(snapshot_dir)
+        max_id, row_count, last_updated = data_version or fetch_data_version(client)
+        if (cube.last_id, cube.row_count, cube.last_updated) == (max_id, row_count, last_updated):
+            return cube
+
+        rebuild = cube.last_updated != last_updated
+        if not rebuild:
+            new_rows = list(iter_response_chunks(client, columns, after_id=cube.last_id))
+            new_rows = pd.concat(new_rows, ignore_index=True) if new_rows else pd.DataFrame()
+            rebuild = cube.row_count + len(new_rows) != row_count
+            if not rebuild:
+                cube.update(new_rows)
+        if rebuild:
+            cube = build_cube(load_all_responses(client, columns))
+        cube.last_updated = last_updated
+
+        try:
+            write_cube(cube, snapshot_dir)
+        except OSError as e:
+            print(f"⚠️ 건수 큐브 저장 실패 (다음 실행에서 다시 집계): {e}")
+        return cube
@@ -0,0 +1,381 @@
+"""Supabase 데이터 접근 함수 (Streamlit 비의존)"""
+import pandas as pd
+from supabase import ClientOptions, create_client
+
+# PostgREST 기본 max-rows(1000)를 넘지 않는 페이지 크기
+DEFAULT_PAGE_SIZE = 1000
+# 날짜 조건의 기준 시간대 (앱 화면의 날짜와 동일)
+LOCAL_TIMEZONE = "Asia/Seoul"
+# updated_at이 NULL(한 번도 수정되지 않은 행)인 행을 제외하는 하한
+UPDATED_AT_EPOCH = "1970-01-01T00:00:00+00:00"
+
+# 용도별 select 컬럼 프로필
+PROJECTIONS = {
+    # 분석 탭: 긴 한글 응답이 담긴 responses/scores JSONB 제외
+    "analytics": ("id", "user_id", "robot_id", "mbti", "gender", "age_group", "job", "location", "timestamp"),
+    # 관리자 전체 조회
+    "admin-full": ("*",),
+    # 데이터 내보내기·백업: 응답 원문 포함 (answer_codes만 있는 행은 불러온 뒤 원문 복원)
+    "export": ("id", "user_id", "robot_id", "mbti", "gender", "age_group", "job", "location", "timestamp",
+               "responses", "answer_codes", "question_bank_version", "scores", "diagnosis_session_id"),
+}
+
+
+def projection_columns(profile, unavailable=()):
+    """프로필의 select 문자열 (스키마에 없는 컬럼 제외)"""
+    return ",".join(c for c in PROJECTIONS[profile] if c not in unavailable)
+
+
+def create_compressed_client(url, key):
+    """gzip 전송을 요청하는 Supabase 클라이언트 생성"""
+    return create_client(url, key, options=ClientOptions(headers={"Accept-Encoding": "gzip"}))
+
+
+def _apply_filters(query, filters):
+    """(연산자, 컬럼, 값) 목록을 PostgREST 조건으로 적용"""
+    for op, column, value in filters or ():
+        query = getattr(query, op)(column, value)
+    return query
+
+
+def _with_id(columns):
+    """키셋 페이지네이션을 위해 select 컬럼에 id 포함"""
+    if columns == "*":
+        return columns
+    cols = [c.strip() for c in columns.split(",") if c.strip()]
+    if "id" not in cols:
+        cols.insert(0, "id")
+    return ",".join(cols)
+
+
+def iter_response_pages(client, columns="*", page_size=DEFAULT_PAGE_SIZE, after_id=0, table="responses",
+                        filters=None):
+    """id 기준 키셋 페이지네이션으로 행 목록을 페이지 단위로 반환
+
+    OFFSET 대신 `id > 마지막 id` 조건을 사용하므로 페이지가 깊어져도
+    인덱스 범위 스캔만 수행하고, 서버 max-rows 제한에 잘리지 않습니다.
+    """
+    columns = _with_id(columns)
+    last_id = after_id
+    while True:
+        query = _apply_filters(client.table(table).select(columns), filters)
+        res = query.gt("id", last_id).order("id").limit(page_size).execute()
+        rows = res.data or []
+        if not rows:
+            return
+        yield rows
+        # 서버 max-rows가 page_size보다 작을 수 있으므로 빈 페이지가 나올 때까지 진행
+        last_id = rows[-1]["id"]
+
+
+def iter_response_chunks(client, columns="*", page_size=DEFAULT_PAGE_SIZE, after_id=0, table="responses",
+                         filters=None):
+    """키셋 페이지를 DataFrame 청크로 반환하는 제너레이터"""
+    for rows in iter_response_pages(client, columns, page_size, after_id, table, filters):
+        yield pd.DataFrame(rows)
+
+
+def fetch_response_page(client, columns="*", page_size=DEFAULT_PAGE_SIZE, after_id=0, table="responses",
+                        filters=None):
+    """필터 조건에 맞는 id > after_id 행 한 페이지 (없으면 빈 DataFrame)"""
+    return next(iter_response_chunks(client, columns, page_size, after_id, table, filters), pd.DataFrame())
+
+
+def ilike_pattern(text):
+    """부분 일치 ilike 패턴 (입력의 %, _, \\ 는 문자 그대로 검색)"""
+    escaped = text.replace("\\", "\\\\").replace("%", "\\%").replace("_", "\\_")
+    return f"%{escaped}%"
+
+
+def response_filters(start_date=None, end_date=None, user_id=None, robot_id=None, mbti=None,
+                     timezone=LOCAL_TIMEZONE):
+    """조회 조건을 _apply_filters용 (연산자, 컬럼, 값) 목록으로 변환
+
+    날짜는 현지 자정 기준이며 양 끝을 포함합니다 (timestamp >= 시작일 00:00, < 종료일 다음 날 00:00).
+    user_id/robot_id는 대소문자 무시 부분 일치(ilike), mbti는 일치(eq)입니다.
+    """
+    filters = []
+    if start_date is not None:
+        filters.append(("gte", "timestamp", pd.Timestamp(start_date).tz_localize(timezone).isoformat()))
+    if end_date is not None:
+        end = pd.Timestamp(end_date).tz_localize(timezone) + pd.Timedelta(days=1)
+        filters.append(("lt", "timestamp", end.isoformat()))
+    if user_id:
+        filters.append(("ilike", "user_id", ilike_pattern(user_id)))
+    if robot_id:
+        filters.append(("ilike", "robot_id", ilike_pattern(robot_id)))
+    if mbti:
+        filters.append(("eq", "mbti", mbti))
+    return filters
+
+
+def load_all_responses(client, columns="*", page_size=DEFAULT_PAGE_SIZE, table="responses", filters=None):
+    """전체 행을 청크 단위로 받아 하나의 DataFrame으로 결합"""
+    chunks = list(iter_response_chunks(client, columns, page_size, table=table, filters=filters))
+    if not chunks:
+        return pd.DataFrame()
+    return pd.concat(chunks, ignore_index=True)
+
+
+def fetch_data_version(client, table="responses", track_updates=False):
+    """데이터 버전 토큰 (max(id), 행 수, 마지막 수정 시각)을 조회
+
+    본문은 id 한 건만 받고 행 수는 Content-Range 헤더로 받으므로
+    테이블 크기와 무관하게 가볍습니다.
+    track_updates=True이면 updated_at(add_updated_at_column.sql)의 최댓값을 한 번 더 조회해
+    재채점처럼 기존 행을 UPDATE한 경우도 버전 변경으로 감지합니다 (아니면 마지막 수정 시각은 None).
+    """
+    res = (
+        client.table(table)
+        .select("id", count="exact")
+        .order("id", desc=True)
+        .limit(1)
+        .execute()
+    )
+    max_id = res.data[0]["id"] if res.data else 0
+    last_updated = None
+    if track_updates:
+        updated = (
+            client.table(table)
+            .select("updated_at")
+            .gt("updated_at", UPDATED_AT_EPOCH)
+            .order("updated_at", desc=True)
+            .limit(1)
+            .execute()
+        )
+        last_updated = updated.data[0]["updated_at"] if updated.data else None
+    return max_id, res.count or 0, last_updated
+
+
+# 존재하지 않는 것으로 확인된 RPC (프로세스 내에서 재호출 생략)
+_missing_rpcs = set()
+
+
+def call_rpc(client, name, params=None):
+    """RPC 호출 결과 행 목록 (실패 시 None을 반환해 호출 측이 pandas로 대체)"""
+    if name in _missing_rpcs:
+        return None
+    try:
+        return client.rpc(name, params or {}).execute().data or []
+    except Exception as e:
+        message = str(e).lower()
+        if "pgrst202" in message or "could not find the function" in message:
+            _missing_rpcs.add(name)
+        else:
+            print(f"⚠️ RPC {name} 호출 실패: {e}")
+        return None
+
+
+def _date_param(value):
+    return value.isoformat() if hasattr(value, "isoformat") else value
+
+
+def rpc_group_crosstab(client, group_col, start_date=None, end_date=None):
+    """그룹 × MBTI 교차표 (index=그룹 값, columns=MBTI)"""
+    rows = call_rpc(client, "mbti_group_crosstab", {
+        "group_col": group_col,
+        "start_date": _date_param(start_date),
+        "end_date": _date_param(end_date),
+    })
+    if rows is None:
+        return None
+    table = pd.DataFrame(rows, columns=["group_value", "mbti", "cnt"])
+    table = table.pivot_table(index="group_value", columns="mbti", values="cnt", aggfunc="sum", fill_value=0)
+    table.index.name = group_col
+    return table
+
+
+def rpc_daily_counts(client, start_date=None, end_date=None):
+    """일별 MBTI 진단 수 (date, mbti, count)"""
+    rows = call_rpc(client, "mbti_daily_counts", {
+        "start_date": _date_param(start_date),
+        "end_date": _date_param(end_date),
+    })
+    if rows is None:
+        return None
+    daily = pd.DataFrame(rows, columns=["day", "mbti", "cnt"]).rename(columns={"day": "date", "cnt": "count"})
+    daily["date"] = pd.to_datetime(daily["date"])
+    return daily.sort_values(["date", "mbti"]).reset_index(drop=True)
+
+
+def rpc_hour_weekday_histogram(client, start_date=None, end_date=None):
+    """시간대 × 요일 진단 수 (hour, weekday(1=월~7=일), count)"""
+    rows = call_rpc(client, "mbti_hour_weekday_histogram", {
+        "start_date": _date_param(start_date),
+        "end_date": _date_param(end_date),
+    })
+    if rows is None:
+        return None
+    return pd.DataFrame(rows, columns=["hour", "weekday", "cnt"]).rename(columns={"cnt": "count"})
+
+
+# 스키마 기능 → (테이블, 확인할 컬럼)
+SCHEMA_PROBES = {
+    "responses": ("responses", "id"),
+    "location": ("responses", "location"),
+    "diagnosis_session_id": ("responses", "diagnosis_session_id"),
+    "answer_codes": ("responses", "answer_codes"),
+    "question_bank_version": ("responses", "question_bank_version"),
+    "updated_at": ("responses", "updated_at"),
+    "user_robots": ("user_robots", "id"),
+}
+
+# 구 스키마에 없을 수 있는 responses 컬럼
+OPTIONAL_RESPONSE_COLUMNS = ("location", "diagnosis_session_id", "answer_codes", "question_bank_version", "updated_at")
+
+
+def probe_schema_capabilities(client):
+    """스키마 기능별 사용 가능 여부 확인 (기능 이름 → bool)"""
+    capabilities = {}
+    for name, (table, column) in SCHEMA_PROBES.items():
+        try:
+            client.table(table).select(column).limit(1).execute()
+            capabilities[name] = True
+        except Exception:
+            capabilities[name] = False
+    return capabilities
+
+
+def unavailable_columns(capabilities):
+    """스키마에 없는 responses 컬럼 목록"""
+    return tuple(c for c in OPTIONAL_RESPONSE_COLUMNS if not capabilities.get(c, False))
+
+
+# diagnosis_session_id 유니크 제약(add_diagnosis_session_unique.sql) 존재 여부 (최초 저장 시 확인)
+_session_upsert_supported = True
+
+
+def upsert_response(client, record):
+    """diagnosis_session_id 기준 멱등 저장 (새로 저장되면 True, 이미 있으면 False)
+
+    ON CONFLICT DO NOTHING + return=representation 이므로 충돌한 행은 응답에서 빠지고,
+    한 번의 요청으로 저장 여부까지 알 수 있습니다.
+    """
+    global _session_upsert_supported
+    if _session_upsert_supported:
+        try:
+            res = (
+                client.table("responses")
+                .upsert(record, on_conflict="diagnosis_session_id", ignore_duplicates=True)
+                .execute()
+            )
+            return bool(res.data)
+        except Exception as e:
+            # 42P10: ON CONFLICT 대상 유니크 제약 없음
+            if "42p10" not in str(e).lower():
+                raise
+            _session_upsert_supported = False
+            print("⚠️ diagnosis_session_id 유니크 제약이 없어 조회 후 저장합니다. add_diagnosis_session_unique.sql을 실행하세요.")
+
+    existing = (
+        client.table("responses")
+        .select("id")
+        .eq("diagnosis_session_id", record["diagnosis_session_id"])
+        .limit(1)
+        .execute()
+    )
+    if existing.data:
+        return False
+    client.table("responses").insert(record).execute()
+    return True
+
+
+def rpc_dedup_responses(client, dry_run=True):
+    """최신 진단만 남기는 서버 중복 정리 (RPC가 없으면 None)
+
+    반환값: {"duplicate_groups", "stale_rows", "deleted_rows"}
+    """
+    rows = call_rpc(client, "dedup_responses_keep_latest", {"dry_run": dry_run})
+    if not rows:
+        return None
+    return rows[0]
+
+
+def delete_responses_by_id(client, ids, batch_size=500):
+    """id 목록을 묶음 단위 DELETE ... WHERE id IN (...)로 삭제하고 삭제 수 반환"""
+    deleted = 0
+    ids = list(ids)
+    for start in range(0, len(ids), batch_size):
+        batch = ids[start:start + batch_size]
+        res = client.table("responses").delete().in_("id", batch).execute()
+        deleted += len(res.data or [])
+    return deleted
+
+
+def _apply_bulk_update(client, rpc_name, updates, columns, sql_file, batch_size):
+    """[{"id", 컬럼...}, ...]를 묶음마다 rpc_name 한 번으로 UPDATE하고 갱신 수 반환
+
+    RPC가 없으면 행 단위 UPDATE로 대체합니다.
+    """
+    if not updates:
+        return 0
+    if rpc_name not in _missing_rpcs:
+        try:
+            updated = 0
+            for start in range(0, len(updates), batch_size):
+                batch = updates[start:start + batch_size]
+                updated += client.rpc(rpc_name, {"updates": batch}).execute().data or 0
+            return updated
+        except Exception as e:
+            message = str(e).lower()
+            if "pgrst202" not in message and "could not find the function" not in message:
+                raise
+            _missing_rpcs.add(rpc_name)
+            print(f"⚠️ {rpc_name} RPC가 없어 행 단위로 갱신합니다. {sql_file}을 실행하세요.")
+    updated = 0
+    for row in updates:
+        res = client.table("responses").update({c: row[c] for c in columns}).eq("id", row["id"]).execute()
+        updated += len(res.data or [])
+    return updated
+
+
+def apply_rescored_responses(client, updates, batch_size=1000):
+    """재채점 결과 [{"id", "mbti", "scores"}, ...]를 묶음마다 한 번의 UPDATE로 반영 (create_rescore_rpc_function.sql)"""
+    return _apply_bulk_update(client, "apply_rescored_responses", updates, ("mbti", "scores"),
+                              "create_rescore_rpc_function.sql", batch_size)
+
+
+def apply_answer_codes(client, updates, batch_size=1000):
+    """압축 응답 [{"id", "answer_codes", "question_bank_version"}, ...]를 묶음마다 한 번의 UPDATE로 반영
+    (add_answer_codes_column.sql)"""
+    return _apply_bulk_update(client, "apply_answer_codes", updates, ("answer_codes", "question_bank_version"),
+                              "add_answer_codes_column.sql", batch_size)
+
+
+def count_rows(client, table="responses", method="exact", filters=None):
+    """행 수만 조회 (HEAD 요청, 본문 없이 Content-Range 헤더로 받음)
+
+    method="estimated"이면 PostgREST가 max-rows를 넘는 테이블에서
+    플래너 추정치를 사용하므로 대용량 테이블에서도 전체 스캔이 없습니다.
+    """
+    query = _apply_filters(client.table(table).select("id", count=method, head=True), filters)
+    return query.execute().count or 0
+
+
+def rpc_distinct_counts(client):
+    """responses의 고유 사용자·로봇 수 (RPC가 없으면 None)"""
+    rows = call_rpc(client, "mbti_distinct_counts")
+    if not rows:
+        return None
+    return rows[0]
+
+
+def fetch_table_stats(client, method="exact"):
+    """관리 화면용 테이블 통계 (진단 수, 고유 사용자·로봇 수, 등록 로봇 수)"""
+    stats = {
+        "total_responses": count_rows(client, "responses", method),
+        "total_robots": count_rows(client, "user_robots", method),
+    }
+    distinct = rpc_distinct_counts(client)
+    if distinct is None:
+        # RPC 미설치: user_id/robot_id 두 컬럼만 키셋 페이지로 받아 계산
+        users, robots = set(), set()
+        for rows in iter_response_pages(client, columns="user_id,robot_id"):
+            users.update(r["user_id"] for r in rows)
+            robots.update(r["robot_id"] for r in rows)
+        users.discard(None)
+        robots.discard(None)
+        distinct = {"distinct_users": len(users), "distinct_robots": len(robots)}
+    stats["total_users"] = distinct["distinct_users"]
+    stats["distinct_robots"] = distinct["distinct_robots"]
+    return stats
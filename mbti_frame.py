@@ -0,0 +1,69 @@
+"""분석용 응답 DataFrame 정규화 (Streamlit 비의존)
+
+데이터 버전마다 한 번만 호출해 timestamp/created_at을 ISO 8601 형식으로 한 번 파싱하고
+(Asia/Seoul tz-aware), date/hour/weekday와 MBTI 축 컬럼을 미리 만들며,
+반복 값이 많은 문자열 컬럼은 category로 바꿉니다.
+
+분석 함수는 이 프레임을 읽기 전용으로 받습니다. 컬럼을 더하거나 바꿔야 하면 assign으로 복사본을 만드세요.
+category 컬럼의 value_counts/get_dummies는 부분 집합에서도 전체 범주를 포함하므로
+관측된 값만 필요하면 observed_counts/observed_values를 사용합니다.
+"""
+import numpy as np
+import pandas as pd
+
+from mbti_types import AXES, AXIS_BITS_MATRIX, encode_types
+
+TIMEZONE = "Asia/Seoul"
+TIMESTAMP_COLUMNS = ("timestamp", "created_at")
+CATEGORICAL_COLUMNS = ("mbti", "gender", "age_group", "job", "robot_id", "location")
+AXIS_COLUMNS = tuple(f"axis_{axis}" for axis in AXES)
+
+
+def parse_timestamps(values):
+    """ISO 8601 문자열을 Asia/Seoul tz-aware datetime으로 변환 (형식이 다른 값은 NaT)"""
+    return pd.to_datetime(values, format="ISO8601", utc=True, errors="coerce").dt.tz_convert(TIMEZONE)
+
+
+def prepare_analytics_frame(df):
+    """분석 탭에서 공유하는 정규화 프레임 생성 (원본은 변경하지 않음)
+
+    추가 컬럼: date(현지 자정, tz-aware), hour, weekday(1=월요일 … 7=일요일), mbti_code(알 수 없는 유형 -1),
+    axis_EI/axis_SN/axis_TF/axis_JP(해당 축의 글자, category).
+    """
+    frame = df.copy()
+    if frame.empty:
+        return frame
+    for col in TIMESTAMP_COLUMNS:
+        if col in frame.columns:
+            frame[col] = parse_timestamps(frame[col])
+
+    if "timestamp" in frame.columns:
+        local = frame["timestamp"]
+        frame["date"] = local.dt.normalize()
+        frame["hour"] = local.dt.hour.astype("Int8")
+        frame["weekday"] = (local.dt.weekday + 1).astype("Int8")
+
+    if "mbti" in frame.columns:
+        codes = encode_types(frame["mbti"].to_numpy())
+        frame["mbti_code"] = codes
+        valid = codes >= 0
+        for k, (axis, column) in enumerate(zip(AXES, AXIS_COLUMNS)):
+            letters = np.where(valid, AXIS_BITS_MATRIX[k][np.where(valid, codes, 0)], -1)
+            frame[column] = pd.Categorical.from_codes(letters, categories=list(axis))
+
+    for col in CATEGORICAL_COLUMNS:
+        if col in frame.columns:
+            frame[col] = frame[col].astype("category")
+    return frame
+
+
+def observed_values(series):
+    """category 시리즈의 사용되지 않는 범주 제거 (부분 집합의 get_dummies 등에 사용)"""
+    if isinstance(series.dtype, pd.CategoricalDtype):
+        return series.cat.remove_unused_categories()
+    return series
+
+
+def observed_counts(series):
+    """관측된 값만의 value_counts (많은 순)"""
+    return observed_values(series).value_counts()
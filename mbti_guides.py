@@ -0,0 +1,192 @@
+"""장소별 MBTI 가이드·HRI 스타일 콘텐츠 (Streamlit 비의존)
+
+guides/v<버전>.json을 프로세스당 한 번 읽어 모든 (장소, MBTI) 조합의 가이드와
+장소별 조언 문구를 미리 만들어 두고, 딕셔너리 조회 한 번으로 제공합니다.
+content_version("v1-<해시 12자리>")으로 캐시와 클라이언트가 콘텐츠 버전을 구분합니다.
+
+로봇이 Streamlit 없이 HRI 스타일을 받아갈 수 있도록 읽기 전용 HTTP API도 제공합니다.
+
+사용법:
+    python mbti_guides.py 병원 ENFJ            # 가이드 한 건을 JSON으로 출력
+    python mbti_guides.py --serve --port 8600  # GET /guides, /guides/<장소>, /guides/<장소>/<MBTI>
+
+앱 화면은 등록되지 않은 장소에 기본 장소의 가이드를 보여 주지만, API와 명령행은 클라이언트가 대체 여부를
+알 수 있도록 등록되지 않은 장소를 404(명령행은 종료 코드 1)로 거절합니다.
+"""
+import argparse
+import json
+import os
+import sys
+from functools import lru_cache
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+from types import MappingProxyType
+from urllib.parse import unquote, urlparse
+
+from mbti_questions import content_hash
+
+GUIDE_DIR = os.getenv("MBTI_GUIDE_DIR", os.path.join(os.path.dirname(os.path.abspath(__file__)), "guides"))
+CURRENT_GUIDE_VERSION = 1
+
+
+class GuideContent:
+    """가이드 콘텐츠 버전 하나의 (장소, MBTI)별 가이드 (불변)
+
+    각 가이드는 description, hri_style, examples, location_advice를 갖습니다.
+    location_advice는 기본 장소에서는 빈 문자열입니다.
+    """
+
+    __slots__ = ("version", "content_hash", "content_version", "default_location", "locations", "types",
+                 "_by_location")
+
+    def __init__(self, data):
+        self.version = data["version"]
+        self.content_hash = content_hash(data)
+        self.content_version = f"v{self.version}-{self.content_hash[:12]}"
+        self.default_location = data["default_location"]
+        self.types = tuple(data["types"])
+        self.locations = (self.default_location,) + tuple(data["location_hri_styles"])
+
+        by_location = {}
+        for location in self.locations:
+            styles = data["location_hri_styles"].get(location, {})
+            advice = data["location_advice"].get(location)
+            guides = {}
+            for mbti, base in data["types"].items():
+                hri_style = styles.get(mbti, base.get("hri_style"))
+                guides[mbti] = MappingProxyType({
+                    "description": base["description"],
+                    "hri_style": hri_style,
+                    "examples": tuple(base["examples"]),
+                    "location_advice": advice["template"].format(
+                        mbti=mbti, hri_style=hri_style or advice["default_style"]) if advice else "",
+                })
+            by_location[location] = MappingProxyType(guides)
+        self._by_location = MappingProxyType(by_location)
+
+    def guides_for(self, location):
+        """장소의 MBTI별 가이드 (등록되지 않은 장소는 기본 장소)"""
+        return self._by_location.get(location, self._by_location[self.default_location])
+
+    def guide(self, location, mbti):
+        """(장소, MBTI) 가이드 (없는 유형이면 None)"""
+        return self.guides_for(location).get(mbti)
+
+    def __repr__(self):
+        return f"GuideContent({self.content_version}, locations={self.locations})"
+
+
+def guide_path(version=CURRENT_GUIDE_VERSION, guide_dir=None):
+    return os.path.join(guide_dir or GUIDE_DIR, f"v{version}.json")
+
+
+@lru_cache(maxsize=4)
+def load_guides(version=CURRENT_GUIDE_VERSION, guide_dir=None):
+    """가이드 데이터 파일을 읽어 모든 장소의 가이드 생성 (버전별로 프로세스당 한 번)"""
+    with open(guide_path(version, guide_dir), encoding="utf-8") as f:
+        data = json.load(f)
+    if data["version"] != version:
+        raise ValueError(f"가이드 파일 버전 불일치: 요청 v{version}, 파일 v{data['version']}")
+    return GuideContent(data)
+
+
+def guide_payload(content, location, mbti):
+    """API 응답용 가이드 딕셔너리 (등록되지 않은 장소나 없는 유형이면 None)"""
+    if location not in content.locations:
+        return None
+    guide = content.guide(location, mbti)
+    if guide is None:
+        return None
+    return {"content_version": content.content_version, "location": location, "mbti": mbti,
+            **{key: list(value) if isinstance(value, tuple) else value for key, value in guide.items()}}
+
+
+class GuideRequestHandler(BaseHTTPRequestHandler):
+    """가이드 조회 API (GET 전용, content_version을 ETag로 사용)"""
+
+    def _send_json(self, status, body, etag=None):
+        payload = json.dumps(body, ensure_ascii=False).encode("utf-8")
+        self.send_response(status)
+        self.send_header("Content-Type", "application/json; charset=utf-8")
+        self.send_header("Content-Length", str(len(payload)))
+        if etag:
+            self.send_header("ETag", f'"{etag}"')
+            self.send_header("Cache-Control", "public, max-age=3600")
+        self.end_headers()
+        self.wfile.write(payload)
+
+    def do_GET(self):
+        content = load_guides()
+        parts = [unquote(p) for p in urlparse(self.path).path.split("/") if p]
+        if not parts or parts[0] != "guides" or len(parts) > 3:
+            self._send_json(404, {"error": "not found"})
+            return
+
+        if len(parts) > 1 and parts[1] not in content.locations:
+            self._send_json(404, {"error": f"unknown location: {parts[1]}", "locations": list(content.locations)})
+            return
+
+        if len(parts) == 1:
+            body = {"content_version": content.content_version, "locations": list(content.locations),
+                    "types": list(content.types)}
+        elif len(parts) == 2:
+            body = {"content_version": content.content_version, "location": parts[1],
+                    "hri_styles": {mbti: g["hri_style"] for mbti, g in content.guides_for(parts[1]).items()}}
+        else:
+            body = guide_payload(content, parts[1], parts[2].upper())
+            if body is None:
+                self._send_json(404, {"error": f"unknown MBTI type: {parts[2]}"})
+                return
+        # 존재하는 경로만 재검증 (없는 장소·유형은 ETag가 같아도 404)
+        if self.headers.get("If-None-Match") == f'"{content.content_version}"':
+            self.send_response(304)
+            self.end_headers()
+            return
+        self._send_json(200, body, etag=content.content_version)
+
+    def log_message(self, format, *args):
+        pass
+
+
+def serve(host="0.0.0.0", port=8600):
+    """가이드 API 서버 실행 (콘텐츠는 시작 시 한 번 로드)"""
+    content = load_guides()
+    server = ThreadingHTTPServer((host, port), GuideRequestHandler)
+    print(f"가이드 API {content.content_version}: http://{host}:{port}/guides")
+    try:
+        server.serve_forever()
+    except KeyboardInterrupt:
+        pass
+    finally:
+        server.server_close()
+
+
+def main():
+    parser = argparse.ArgumentParser(description="장소별 MBTI 가이드·HRI 스타일 조회")
+    parser.add_argument("location", nargs="?", default="일반", help="장소 (기본: 일반)")
+    parser.add_argument("mbti", nargs="?", help="MBTI 유형 (생략하면 장소의 HRI 스타일 목록)")
+    parser.add_argument("--serve", action="store_true", help="HTTP API 서버 실행")
+    parser.add_argument("--host", default="0.0.0.0")
+    parser.add_argument("--port", type=int, default=8600)
+    args = parser.parse_args()
+
+    if args.serve:
+        serve(args.host, args.port)
+        return 0
+
+    content = load_guides()
+    if args.location not in content.locations:
+        print(f"❌ 등록되지 않은 장소: {args.location} (사용 가능: {', '.join(content.locations)})")
+        return 1
+    if args.mbti:
+        body = guide_payload(content, args.location, args.mbti.upper())
+        if body is None:
+            print(f"❌ 알 수 없는 MBTI 유형: {args.mbti}")
+            return 1
+    else:
+        body = {mbti: g["hri_style"] for mbti, g in content.guides_for(args.location).items()}
+    print(json.dumps(body, ensure_ascii=False, indent=2))
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
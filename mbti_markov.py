@@ -0,0 +1,257 @@
+"""전체 로봇의 MBTI 유형 1차 마르코프 전이 모델 (Streamlit 비의존)
+
+(그룹 × from 유형 × to 유형) 전이 건수 텐서와 from 유형별 진단 간격 합을 충분통계량으로 두고,
+새 진단(id > last_id)이 들어오면 조합별 마지막 진단에 이어 붙여 그 전이만 더합니다.
+그룹은 split 컬럼(location 또는 robot_id)의 도착 진단 값이며, split이 없으면 "전체" 하나입니다.
+정상 분포·유형별 기대 체류 시간은 16 × 16 건수 행렬에서만 계산하므로 진단 수와 무관하게 일정한 시간이 걸립니다.
+
+모델은 .snapshot/markov_<split>.npz에 저장되며 삭제가 감지되거나(행 수 불일치), 기존 진단이
+수정되었거나(데이터 버전의 마지막 수정 시각 변경), 이미 반영된 진단보다 이전 시각의 진단이
+뒤늦게 들어오면 전체를 다시 계산합니다.
+"""
+import os
+import threading
+
+import numpy as np
+import pandas as pd
+
+from mbti_db import fetch_data_version, iter_response_chunks, load_all_responses
+from mbti_snapshot import SNAPSHOT_DIR
+from mbti_transitions import PAIR_KEYS, build_transitions
+from mbti_types import TYPES
+
+SPLITS = (None, "location", "robot_id")
+ALL_GROUP = "전체"
+# 관측되지 않은 전이에 더하는 의사 건수 (정상 분포가 유일하도록)
+DEFAULT_SMOOTHING = 0.1
+
+_STATE_COLUMNS = list(PAIR_KEYS) + ["mbti", "timestamp"]
+_sync_lock = threading.Lock()
+
+
+def model_columns(split=None):
+    """모델 갱신에 필요한 select 컬럼"""
+    return ",".join(["id"] + _STATE_COLUMNS + ([split] if split else []))
+
+
+class TransitionModel:
+    """split 그룹별 MBTI 전이 건수 텐서와 조합별 마지막 진단 상태"""
+
+    __slots__ = ("split", "groups", "counts", "interval_sums", "last_id", "row_count", "last_updated", "states")
+
+    def __init__(self, split=None):
+        if split not in SPLITS:
+            raise ValueError(f"지원하지 않는 split: {split}")
+        self.split = split
+        self.groups = ()
+        self.counts = np.zeros((0, 16, 16), dtype=np.int64)
+        # (그룹 × from 유형) 전이 간격(일) 합
+        self.interval_sums = np.zeros((0, 16), dtype=np.float64)
+        self.last_id = 0
+        self.row_count = 0
+        # 반영된 데이터 버전의 마지막 수정 시각 (updated_at 미사용이면 None)
+        self.last_updated = None
+        self.states = pd.DataFrame(columns=_STATE_COLUMNS)
+
+    def __repr__(self):
+        return (f"TransitionModel(split={self.split!r}, groups={len(self.groups)}, "
+                f"transitions={int(self.counts.sum())}, last_id={self.last_id})")
+
+    def _group_indices(self, labels):
+        """그룹 라벨 배열을 텐서 인덱스로 변환 (새 그룹은 텐서에 추가)"""
+        new_groups = [g for g in pd.unique(labels) if g not in self.groups]
+        if new_groups:
+            self.groups = self.groups + tuple(new_groups)
+            self.counts = np.concatenate([self.counts, np.zeros((len(new_groups), 16, 16), dtype=np.int64)])
+            self.interval_sums = np.concatenate([self.interval_sums, np.zeros((len(new_groups), 16))])
+        index = {g: i for i, g in enumerate(self.groups)}
+        return np.array([index[g] for g in labels], dtype=np.int64)
+
+    def update(self, rows):
+        """id > last_id 인 신규 진단 행을 반영 (이전 시각의 진단이 섞여 있으면 False → 전체 재계산 필요)"""
+        if rows is None or rows.empty:
+            return True
+        rows = rows.copy()
+        rows["timestamp"] = pd.to_datetime(rows["timestamp"], utc=True, errors="coerce")
+        group_col = self.split or "_group"
+        if self.split:
+            # 분석 프레임의 category 컬럼은 없는 범주("")로 채울 수 없으므로 object로 바꾼 뒤 채움
+            rows[group_col] = rows[group_col].astype(object).fillna("").astype(str)
+        else:
+            rows[group_col] = ALL_GROUP
+
+        # 기존 조합은 마지막 진단 뒤에 이어 붙임 (마지막 진단보다 이전 시각이면 순서가 깨지므로 재계산)
+        previous = self.states.merge(rows[list(PAIR_KEYS)].drop_duplicates(), on=list(PAIR_KEYS))
+        if not previous.empty:
+            first_new = rows.groupby(list(PAIR_KEYS), sort=False, observed=True)["timestamp"].min().rename("first_new")
+            joined = previous.join(first_new, on=list(PAIR_KEYS))
+            if (joined["first_new"] < joined["timestamp"]).any():
+                return False
+        combined = pd.concat([previous, rows], ignore_index=True) if not previous.empty else rows
+        transitions = build_transitions(combined, columns=(group_col,))
+
+        if not transitions.empty:
+            groups = self._group_indices(transitions[group_col].to_numpy())
+            from_codes = transitions["from_code"].to_numpy(dtype=np.int64)
+            to_codes = transitions["to_code"].to_numpy(dtype=np.int64)
+            n_groups = len(self.groups)
+            self.counts += np.bincount((groups * 16 + from_codes) * 16 + to_codes,
+                                       minlength=n_groups * 256).reshape(n_groups, 16, 16)
+            intervals = transitions["interval_days"].to_numpy(dtype=np.float64)
+            self.interval_sums += np.bincount(groups * 16 + from_codes, weights=np.nan_to_num(intervals),
+                                              minlength=n_groups * 16).reshape(n_groups, 16)
+
+        latest = (rows.sort_values("timestamp", kind="mergesort")
+                  .drop_duplicates(list(PAIR_KEYS), keep="last")[_STATE_COLUMNS])
+        if not self.states.empty:
+            latest = (pd.concat([self.states, latest], ignore_index=True)
+                      .drop_duplicates(list(PAIR_KEYS), keep="last"))
+        self.states = latest.reset_index(drop=True)
+        self.last_id = max(self.last_id, int(rows["id"].max()))
+        self.row_count += len(rows)
+        return True
+
+    def counts_for(self, group=None):
+        """그룹의 16 × 16 전이 건수 (group=None이면 모든 그룹 합계)"""
+        if group is None:
+            return self.counts.sum(axis=0) if len(self.groups) else np.zeros((16, 16), dtype=np.int64)
+        return self.counts[self.groups.index(group)]
+
+    def interval_sums_for(self, group=None):
+        if group is None:
+            return self.interval_sums.sum(axis=0) if len(self.groups) else np.zeros(16)
+        return self.interval_sums[self.groups.index(group)]
+
+    def summary(self, group=None, alpha=DEFAULT_SMOOTHING):
+        """유형별 전이 요약 (관측 전이 수, 유지 확률, 정상 분포, 기대 체류 진단 수·일수)"""
+        return transition_summary(self.counts_for(group), self.interval_sums_for(group), alpha)
+
+    def to_arrays(self):
+        states = self.states
+        return {
+            "split": np.array(self.split or ""),
+            "groups": np.array(self.groups, dtype=str),
+            "counts": self.counts,
+            "interval_sums": self.interval_sums,
+            "watermark": np.array([self.last_id, self.row_count], dtype=np.int64),
+            "last_updated": np.array(self.last_updated or ""),
+            "state_user_id": states["user_id"].astype(str).to_numpy(dtype=str),
+            "state_robot_id": states["robot_id"].astype(str).to_numpy(dtype=str),
+            "state_mbti": states["mbti"].astype(str).to_numpy(dtype=str),
+            "state_timestamp": pd.to_datetime(states["timestamp"], utc=True).to_numpy(dtype="datetime64[ns]"),
+        }
+
+    @classmethod
+    def from_arrays(cls, arrays):
+        model = cls(str(arrays["split"]) or None)
+        model.groups = tuple(arrays["groups"].tolist())
+        model.counts = arrays["counts"].astype(np.int64)
+        model.interval_sums = arrays["interval_sums"].astype(np.float64)
+        model.last_id, model.row_count = (int(v) for v in arrays["watermark"])
+        model.last_updated = (str(arrays["last_updated"]) if "last_updated" in arrays else "") or None
+        model.states = pd.DataFrame({
+            "user_id": arrays["state_user_id"],
+            "robot_id": arrays["state_robot_id"],
+            "mbti": arrays["state_mbti"],
+            "timestamp": pd.to_datetime(arrays["state_timestamp"], utc=True),
+        })
+        return model
+
+
+def build_model(df, split=None):
+    """진단 DataFrame 전체로 전이 모델 생성"""
+    model = TransitionModel(split)
+    model.update(df)
+    return model
+
+
+def transition_probabilities(counts, alpha=DEFAULT_SMOOTHING):
+    """16 × 16 건수 행렬의 행 정규화 전이 확률 (alpha 의사 건수 평활)"""
+    smoothed = np.asarray(counts, dtype=np.float64) + alpha
+    totals = smoothed.sum(axis=1, keepdims=True)
+    return np.divide(smoothed, totals, out=np.full_like(smoothed, 1.0 / 16), where=totals > 0)
+
+
+def stationary_distribution(probs):
+    """전이 확률 행렬의 정상 분포 (고윳값 1의 왼쪽 고유벡터, 합 1)"""
+    values, vectors = np.linalg.eig(np.asarray(probs).T)
+    vector = np.abs(np.real(vectors[:, np.argmin(np.abs(values - 1.0))]))
+    return vector / vector.sum()
+
+
+def transition_summary(counts, interval_sums, alpha=DEFAULT_SMOOTHING):
+    """유형별 요약 DataFrame (TYPES 순서)
+
+    기대 체류 진단 수는 1 / (1 - 유지 확률), 기대 체류 일수는 여기에 그 유형에서 나가는
+    전이의 평균 진단 간격을 곱한 값입니다 (관측된 전이가 없으면 NaN).
+    """
+    counts = np.asarray(counts)
+    probs = transition_probabilities(counts, alpha)
+    stay = np.diag(probs)
+    outgoing = counts.sum(axis=1)
+    mean_interval = np.divide(interval_sums, outgoing, out=np.full(16, np.nan), where=outgoing > 0)
+    dwell_steps = 1.0 / (1.0 - stay)
+    return pd.DataFrame({
+        "mbti": TYPES,
+        "transitions": outgoing,
+        "stay_probability": stay,
+        "stationary_share": stationary_distribution(probs),
+        "dwell_diagnoses": dwell_steps,
+        "dwell_days": dwell_steps * mean_interval,
+    })
+
+
+def _model_path(snapshot_dir, split):
+    return os.path.join(snapshot_dir, f"markov_{split or 'all'}.npz")
+
+
+def read_model(snapshot_dir=SNAPSHOT_DIR, split=None):
+    """저장된 전이 모델 로드 (없거나 읽을 수 없으면 빈 모델)"""
+    path = _model_path(snapshot_dir, split)
+    if not os.path.exists(path):
+        return TransitionModel(split)
+    try:
+        with np.load(path) as arrays:
+            return TransitionModel.from_arrays(arrays)
+    except Exception as e:
+        print(f"⚠️ 전이 모델 파일을 읽지 못해 다시 계산합니다: {e}")
+        return TransitionModel(split)
+
+
+def write_model(model, snapshot_dir=SNAPSHOT_DIR):
+    """전이 모델을 임시 파일에 쓴 뒤 원자적으로 교체"""
+    os.makedirs(snapshot_dir, exist_ok=True)
+    path = _model_path(snapshot_dir, model.split)
+    with open(path + ".tmp", "wb") as f:
+        np.savez(f, **model.to_arrays())
+    os.replace(path + ".tmp", path)
+
+
+def sync_model(client, split=None, snapshot_dir=SNAPSHOT_DIR, data_version=None):
+    """저장된 전이 모델에 last_id 이후 진단만 반영
+
+    data_version(max(id), 행 수, 마지막 수정 시각)이 모델과 같으면 조회 없이 반환하고,
+    마지막 수정 시각이 바뀌었거나(재채점 등 UPDATE), 신규 행을 더한 행 수가 서버 행 수와 다르거나(삭제),
+    순서가 어긋난 진단이 있으면 전체를 다시 계산합니다.
+    """
+    with _sync_lock:
+        model = read_model(snapshot_dir, split)
+        max_id, row_count, last_updated = data_version or fetch_data_version(client)
+        if (model.last_id, model.row_count, model.last_updated) == (max_id, row_count, last_updated):
+            return model
+
+        columns = model_columns(split)
+        rebuild = model.last_updated != last_updated
+        if not rebuild:
+            new_rows = list(iter_response_chunks(client, columns, after_id=model.last_id))
+            new_rows = pd.concat(new_rows, ignore_index=True) if new_rows else pd.DataFrame()
+            rebuild = model.row_count + len(new_rows) != row_count or not model.update(new_rows)
+        if rebuild:
+            model = build_model(load_all_responses(client, columns), split)
+        model.last_updated = last_updated
+
+        try:
+            write_model(model, snapshot_dir)
+        except OSError as e:
+            print(f"⚠️ 전이 모델 저장 실패 (다음 실행에서 다시 계산): {e}")
+        return model
@@ -0,0 +1,221 @@
+"""장소별 질문 세트 레지스트리와 벡터화 채점 (Streamlit 비의존)
+
+question_banks/v<버전>.json을 한 번만 읽어 장소별 질문 세트를 불변 객체로 만들고,
+질문 × 축 부호 행렬로 응답 한 건 또는 응답 행렬 전체를 한 번의 행렬 곱으로 채점합니다.
+데이터 파일 내용의 해시(bank_version)로 캐시와 저장된 결과가 어느 질문 세트로
+계산되었는지 구분할 수 있습니다.
+"""
+import hashlib
+import json
+import os
+from functools import lru_cache
+from types import MappingProxyType
+
+import numpy as np
+
+BANK_DIR = os.getenv("MBTI_QUESTION_BANK_DIR", os.path.join(os.path.dirname(os.path.abspath(__file__)), "question_banks"))
+CURRENT_BANK_VERSION = 1
+
+# 점수 딕셔너리의 축 순서 (compute_scores와 동일)
+AXES = ("E", "I", "S", "N", "T", "F", "J", "P")
+AXIS_PAIRS = ("EI", "SN", "TF", "JP")
+
+# 응답 코드: 첫 번째 선택지 0, 두 번째 선택지 1, 미응답·알 수 없는 선택지 -1
+MISSING = -1
+# answer_codes 컬럼의 미응답 문자 (응답 코드는 질문 순서대로 한 글자씩: "0110...")
+MISSING_CODE_CHAR = "-"
+
+
+def content_hash(data):
+    """키 순서·공백과 무관한 질문 세트 내용 해시 (sha256)"""
+    canonical = json.dumps(data, ensure_ascii=False, sort_keys=True, separators=(",", ":"))
+    return hashlib.sha256(canonical.encode("utf-8")).hexdigest()
+
+
+def _freeze_question(q):
+    return MappingProxyType({"id": q["id"], "text": q["text"], "choices": tuple(q["choices"]),
+                             "axes": tuple(q["axes"])})
+
+
+def _freeze_tie_questions(ties):
+    return MappingProxyType({axis: MappingProxyType({"axes": tuple(axis), "text": cfg["text"],
+                                                     "choices": tuple(cfg["choices"])})
+                             for axis, cfg in ties.items()})
+
+
+class QuestionBank:
+    """한 장소의 질문 세트 (불변)
+
+    axis_matrix는 (질문 수 × 4) 행렬로, 질문이 속한 축 쌍(EI/SN/TF/JP) 열에 1을 갖습니다.
+    응답 코드 행렬 C(0=첫 번째 선택지, 1=두 번째 선택지)에 대해
+    첫 번째 극 점수는 (C == 0) @ axis_matrix, 두 번째 극 점수는 (C == 1) @ axis_matrix입니다.
+    """
+
+    __slots__ = ("location", "bank_version", "questions", "question_ids", "by_id", "tie_questions",
+                 "axis_matrix", "tie_prone_axes", "_choice_codes")
+
+    def __init__(self, location, bank_version, questions, tie_questions):
+        self.location = location
+        self.bank_version = bank_version
+        self.questions = tuple(_freeze_question(q) for q in questions)
+        self.question_ids = tuple(q["id"] for q in self.questions)
+        self.by_id = MappingProxyType({q["id"]: q for q in self.questions})
+        self.tie_questions = _freeze_tie_questions(tie_questions)
+
+        matrix = np.zeros((len(self.questions), len(AXIS_PAIRS)), dtype=np.int16)
+        for i, q in enumerate(self.questions):
+            matrix[i, AXIS_PAIRS.index("".join(q["axes"]))] = 1
+        matrix.setflags(write=False)
+        self.axis_matrix = matrix
+        # 문항 수가 짝수인 축만 동점이 될 수 있음
+        self.tie_prone_axes = tuple(axis for axis, n in zip(AXIS_PAIRS, matrix.sum(axis=0))
+                                    if n % 2 == 0 and axis in self.tie_questions)
+        self._choice_codes = tuple({choice: code for code, choice in enumerate(q["choices"])}
+                                   for q in self.questions)
+
+    def __len__(self):
+        return len(self.questions)
+
+    def __repr__(self):
+        return f"QuestionBank({self.location!r}, {len(self)} questions, {self.bank_version})"
+
+    def encode(self, responses):
+        """응답 딕셔너리({질문 id: 선택지 문구})를 질문 순서의 응답 코드 배열로 변환"""
+        responses = responses or {}
+        return np.array([codes.get(responses.get(qid), MISSING)
+                         for qid, codes in zip(self.question_ids, self._choice_codes)], dtype=np.int8)
+
+    def encode_many(self, responses_list):
+        """응답 딕셔너리 목록을 (행 수 × 질문 수) 응답 코드 행렬로 변환"""
+        codes = np.full((len(responses_list), len(self)), MISSING, dtype=np.int8)
+        for row, responses in enumerate(responses_list):
+            codes[row] = self.encode(responses)
+        return codes
+
+    def encode_answers(self, responses):
+        """응답 딕셔너리를 answer_codes 문자열로 압축 (질문 순서대로 선택지 번호 한 글자)"""
+        return "".join(MISSING_CODE_CHAR if code == MISSING else str(code) for code in self.encode(responses))
+
+    def codes_from_answers(self, answer_codes):
+        """answer_codes 문자열을 응답 코드 배열로 변환 (선택지 문구를 거치지 않음)
+
+        선택지 번호가 아닌 글자(손상된 값, 선택지 수를 넘는 숫자)는 미응답(MISSING)으로 처리합니다.
+        """
+        codes = np.full(len(self), MISSING, dtype=np.int8)
+        if not isinstance(answer_codes, str):
+            return codes
+        for i, (char, q) in enumerate(zip(answer_codes, self.questions)):
+            code = ord(char) - ord("0")
+            if 0 <= code < len(q["choices"]):
+                codes[i] = code
+        return codes
+
+    def decode_answers(self, answer_codes):
+        """answer_codes 문자열을 응답 딕셔너리({질문 id: 선택지 문구})로 복원"""
+        return {q["id"]: q["choices"][code]
+                for q, code in zip(self.questions, self.codes_from_answers(answer_codes)) if code != MISSING}
+
+    def score_matrix(self, codes):
+        """응답 코드 행렬을 (행 수 × 8) 점수 행렬(AXES 순서)로 채점 (미응답 문항은 0점)"""
+        codes = np.atleast_2d(np.asarray(codes))
+        first = (codes == 0).astype(np.int16) @ self.axis_matrix
+        second = (codes == 1).astype(np.int16) @ self.axis_matrix
+        # [E, S, T, J] / [I, N, F, P]를 E, I, S, N, ... 순서로 교차 배치
+        return np.stack([first, second], axis=2).reshape(len(codes), len(AXES))
+
+    def score(self, responses):
+        """응답 딕셔너리 한 건 채점 (미응답 문항이 있으면 None)"""
+        codes = self.encode(responses)
+        if (codes == MISSING).any():
+            return None
+        return dict(zip(AXES, self.score_matrix(codes)[0].tolist()))
+
+
+class QuestionRegistry:
+    """질문 세트 버전 하나의 모든 장소별 QuestionBank (불변)"""
+
+    __slots__ = ("version", "content_hash", "bank_version", "default_location", "banks")
+
+    def __init__(self, data):
+        self.version = data["version"]
+        self.content_hash = content_hash(data)
+        self.bank_version = f"v{self.version}-{self.content_hash[:12]}"
+        self.default_location = data["default_location"]
+        base = data["base_questions"]
+        banks = {self.default_location: QuestionBank(self.default_location, self.bank_version, base,
+                                                     data["base_tie_questions"])}
+        for location, extra in data["location_questions"].items():
+            ties = data["location_tie_questions"].get(location, data["base_tie_questions"])
+            banks[location] = QuestionBank(location, self.bank_version, base + extra, ties)
+        self.banks = MappingProxyType(banks)
+
+    @property
+    def locations(self):
+        return tuple(self.banks)
+
+    def __getitem__(self, location):
+        """장소별 질문 세트 (등록되지 않은 장소는 기본 세트)"""
+        return self.banks.get(location, self.banks[self.default_location])
+
+    def __repr__(self):
+        return f"QuestionRegistry({self.bank_version}, locations={self.locations})"
+
+
+def bank_path(version=CURRENT_BANK_VERSION, bank_dir=None):
+    return os.path.join(bank_dir or BANK_DIR, f"v{version}.json")
+
+
+def load_registry(version=CURRENT_BANK_VERSION, bank_dir=None):
+    """질문 세트 데이터 파일을 읽어 레지스트리 생성 (버전별로 프로세스당 한 번)"""
+    # load_registry()와 load_registry(1)이 같은 캐시 항목을 쓰도록 인자를 위치 인자로 정규화
+    return _load_registry(int(version), bank_dir)
+
+
+@lru_cache(maxsize=8)
+def _load_registry(version, bank_dir):
+    with open(bank_path(version, bank_dir), encoding="utf-8") as f:
+        data = json.load(f)
+    if data["version"] != version:
+        raise ValueError(f"질문 세트 파일 버전 불일치: 요청 v{version}, 파일 v{data['version']}")
+    return QuestionRegistry(data)
+
+
+@lru_cache(maxsize=32)
+def registry_for(bank_version):
+    """저장된 question_bank_version("v1-<해시 12자리>")의 레지스트리 (해시가 다르면 경고 후 같은 버전 사용)"""
+    registry = load_registry(int(str(bank_version).split("-", 1)[0].lstrip("v")))
+    if registry.bank_version != bank_version:
+        print(f"⚠️ 질문 세트 {bank_version} 파일이 변경되었습니다. 현재 {registry.bank_version} 내용으로 해석합니다.")
+    return registry
+
+
+def fill_responses_from_codes(df, default_location="일반"):
+    """responses가 비어 있고 answer_codes가 있는 행의 응답 원문을 복원한 DataFrame 반환
+
+    응답 원문이 필요한 내보내기·백업에서만 호출합니다.
+    """
+    if "answer_codes" not in df.columns or df.empty:
+        return df
+    df = df.copy()
+    if "responses" not in df.columns:
+        df["responses"] = None
+    missing = df["responses"].isna() & df["answer_codes"].notna()
+    if not missing.any():
+        return df
+    df["responses"] = df["responses"].astype(object)
+    for idx in df.index[missing]:
+        # 빈 값은 None 또는 NaN(pandas 3의 문자열 dtype)이므로 문자열인지로 확인
+        version = df.at[idx, "question_bank_version"] if "question_bank_version" in df.columns else None
+        registry = registry_for(version) if isinstance(version, str) and version else load_registry()
+        location = df.at[idx, "location"] if "location" in df.columns else None
+        location = location if isinstance(location, str) and location else default_location
+        df.at[idx, "responses"] = registry[location].decode_answers(df.at[idx, "answer_codes"])
+    return df
+
+
+def predict_types(scores):
+    """(행 수 × 8) 점수 행렬에서 MBTI 유형 배열 계산 (동점이면 첫 번째 극, predict_type과 동일)"""
+    scores = np.atleast_2d(np.asarray(scores))
+    letters = np.where(scores[:, 0::2] >= scores[:, 1::2],
+                       np.array(["E", "S", "T", "J"]), np.array(["I", "N", "F", "P"]))
+    return np.char.add(np.char.add(letters[:, 0], letters[:, 1]), np.char.add(letters[:, 2], letters[:, 3]))
@@ -0,0 +1,276 @@
+"""저장된 진단의 일괄 재채점 (Streamlit 비의존)
+
+질문 세트를 고치거나 장소별 문항을 바꾸면 responses 테이블에 저장된 mbti/scores가
+현재 질문 세트와 어긋납니다. 이 스크립트는 id 범위별 청크로 responses JSONB를 읽어
+mbti_questions의 행렬 채점으로 다시 계산하고, 저장값과 다른 행만 청크마다 한 번의
+UPDATE(apply_rescored_responses RPC)로 반영합니다.
+
+- 청크는 id 구간 단위이며 프로세스 풀의 워커가 각자 키셋 페이지로 읽고 채점·반영합니다.
+- 끝난 구간은 체크포인트 파일에 기록되므로 중단 후 다시 실행하면 남은 구간만 처리합니다.
+- 저장된 응답에는 타이브레이커 응답이 없으므로, 동점인 축은 저장된 mbti의 해당 글자를 유지합니다.
+- --job encode는 같은 방식으로 answer_codes가 비어 있는 행의 압축 응답을 채웁니다
+  (add_answer_codes_column.sql 실행 후).
+- 반영한 행은 updated_at 트리거(add_updated_at_column.sql)로 데이터 버전에 잡혀 앱의 스냅샷·건수 큐브·
+  전이 모델·캐시가 다시 반영합니다. updated_at 컬럼이 없으면 이 프로세스의 스냅샷 디렉터리 파일을 지웁니다.
+
+사용법:
+    python mbti_rescore.py                      # 변경 대상만 집계 (dry-run)
+    python mbti_rescore.py --apply --workers 8  # 변경 반영
+    python mbti_rescore.py --apply --restart    # 체크포인트를 무시하고 처음부터
+    python mbti_rescore.py --job encode --apply # 기존 행의 answer_codes 채우기
+"""
+import argparse
+import json
+import os
+import sys
+import time
+from concurrent.futures import ProcessPoolExecutor, as_completed
+
+import numpy as np
+from dotenv import load_dotenv
+
+from mbti_db import (
+    apply_answer_codes, apply_rescored_responses, create_compressed_client, fetch_data_version, iter_response_pages,
+    probe_schema_capabilities, unavailable_columns,
+)
+from mbti_questions import (
+    AXES, CURRENT_BANK_VERSION, MISSING, MISSING_CODE_CHAR, load_registry, predict_types, registry_for,
+)
+from mbti_snapshot import SNAPSHOT_DIR, remove_snapshots
+
+DEFAULT_CHUNK_SIZE = 20000
+# 작업별 체크포인트 파일 ({job}은 작업 이름으로 대체)
+CHECKPOINT_PATH = os.getenv("MBTI_RESCORE_CHECKPOINT", ".snapshot/{job}_checkpoint.json")
+RESCORE_COLUMNS = ("id", "location", "responses", "answer_codes", "question_bank_version", "scores", "mbti")
+
+STAT_KEYS = ("rows", "changed", "updated", "incomplete")
+
+
+def _location_for(row, registry, banks_by_ids):
+    """행의 질문 세트 장소 (location 컬럼이 없거나 비어 있으면 응답 문항 id로 추정)"""
+    location = row.get("location")
+    if location in registry.banks:
+        return location
+    return banks_by_ids.get(frozenset(row.get("responses") or {}), registry.default_location)
+
+
+def _row_codes(row, bank):
+    """행의 응답 코드 배열 (answer_codes가 현재 질문 세트 것이면 문구 비교 없이 바로 사용)"""
+    answer_codes = row.get("answer_codes")
+    if answer_codes:
+        version = row.get("question_bank_version")
+        if version == bank.bank_version:
+            return bank.codes_from_answers(answer_codes)
+        if version:
+            # 다른 질문 세트로 저장된 코드는 문구로 복원한 뒤 현재 세트 기준으로 다시 인코딩
+            return bank.encode(registry_for(version)[bank.location].decode_answers(answer_codes))
+    return bank.encode(row.get("responses"))
+
+
+def _stored_scores(rows):
+    """저장된 scores JSONB를 (행 수 × 8) 배열로 (값이 없으면 -1)"""
+    stored = np.full((len(rows), len(AXES)), -1, dtype=np.int16)
+    for i, row in enumerate(rows):
+        scores = row.get("scores") or {}
+        if isinstance(scores, str):
+            scores = json.loads(scores)
+        stored[i] = [scores.get(axis, -1) for axis in AXES]
+    return stored
+
+
+def _apply_stored_tie_breaks(scores, stored_mbti, tie_prone):
+    """동점 축에 저장된 mbti 글자 쪽 +1 (resolve_ties가 저장 시 더한 점수 복원)"""
+    scores = scores.copy()
+    for k, axis in enumerate(("EI", "SN", "TF", "JP")):
+        if axis not in tie_prone:
+            continue
+        tied = scores[:, 2 * k] == scores[:, 2 * k + 1]
+        second = np.array([len(m) == 4 and m[k] == axis[1] for m in stored_mbti], dtype=bool)
+        scores[tied & ~second, 2 * k] += 1
+        scores[tied & second, 2 * k + 1] += 1
+    return scores
+
+
+def rescore_rows(rows, registry):
+    """행 목록을 장소별로 묶어 벡터 채점하고 (변경 목록, 통계) 반환
+
+    변경 목록은 apply_rescored_responses에 그대로 넘길 수 있는 {"id", "mbti", "scores"} 딕셔너리입니다.
+    미응답 문항이 있는 행은 채점하지 않고 incomplete로 집계합니다.
+    """
+    banks_by_ids = {frozenset(bank.question_ids): location for location, bank in registry.banks.items()}
+    by_location = {}
+    for row in rows:
+        by_location.setdefault(_location_for(row, registry, banks_by_ids), []).append(row)
+
+    changes = []
+    stats = dict.fromkeys(STAT_KEYS, 0)
+    stats["rows"] = len(rows)
+    for location, group in by_location.items():
+        bank = registry[location]
+        codes = np.array([_row_codes(row, bank) for row in group], dtype=np.int8).reshape(len(group), len(bank))
+        complete = ~(codes == MISSING).any(axis=1)
+        stats["incomplete"] += int((~complete).sum())
+        if not complete.any():
+            continue
+        group = [row for row, ok in zip(group, complete) if ok]
+        stored_mbti = [row.get("mbti") or "" for row in group]
+        scores = _apply_stored_tie_breaks(bank.score_matrix(codes[complete]), stored_mbti, bank.tie_prone_axes)
+        mbti = predict_types(scores)
+        differs = (scores != _stored_scores(group)).any(axis=1) | (mbti != np.array(stored_mbti))
+        for i in np.flatnonzero(differs):
+            changes.append({
+                "id": group[i]["id"],
+                "mbti": str(mbti[i]),
+                "scores": dict(zip(AXES, scores[i].tolist())),
+            })
+    stats["changed"] = len(changes)
+    return changes, stats
+
+
+def encode_rows(rows, registry):
+    """answer_codes가 비어 있는 행의 압축 응답을 계산하고 (변경 목록, 통계) 반환"""
+    banks_by_ids = {frozenset(bank.question_ids): location for location, bank in registry.banks.items()}
+    changes = []
+    stats = dict.fromkeys(STAT_KEYS, 0)
+    stats["rows"] = len(rows)
+    for row in rows:
+        if row.get("answer_codes") or not row.get("responses"):
+            continue
+        bank = registry[_location_for(row, registry, banks_by_ids)]
+        answer_codes = bank.encode_answers(row["responses"])
+        stats["incomplete"] += MISSING_CODE_CHAR in answer_codes
+        changes.append({"id": row["id"], "answer_codes": answer_codes, "question_bank_version": bank.bank_version})
+    stats["changed"] = len(changes)
+    return changes, stats
+
+
+# 작업 이름 → (행 처리 함수, 일괄 반영 함수)
+JOBS = {
+    "rescore": (rescore_rows, apply_rescored_responses),
+    "encode": (encode_rows, apply_answer_codes),
+}
+
+
+# 워커 프로세스 전역 (initializer에서 한 번 생성)
+_worker_client = None
+_worker_registry = None
+_worker_columns = None
+
+
+def _init_worker(url, key, bank_version, columns):
+    global _worker_client, _worker_registry, _worker_columns
+    _worker_client = create_compressed_client(url, key)
+    _worker_registry = load_registry(bank_version)
+    _worker_columns = columns
+
+
+def rescore_range(lo, hi, apply=False, job="rescore"):
+    """id 구간 (lo, hi]를 읽어 처리하고 apply=True이면 변경을 반영 (워커에서 실행)"""
+    process_rows, apply_changes = JOBS[job]
+    stats = dict.fromkeys(STAT_KEYS, 0)
+    pending = []
+    for rows in iter_response_pages(_worker_client, _worker_columns, after_id=lo, filters=[("lte", "id", hi)]):
+        changes, page_stats = process_rows(rows, _worker_registry)
+        for key in STAT_KEYS:
+            stats[key] += page_stats[key]
+        pending.extend(changes)
+    if apply:
+        stats["updated"] = apply_changes(_worker_client, pending)
+    return lo, stats
+
+
+def new_checkpoint(job, bank_version, chunk_size):
+    return {"job": job, "bank_version": bank_version, "chunk_size": chunk_size, "done": [],
+            "stats": dict.fromkeys(STAT_KEYS, 0)}
+
+
+def load_checkpoint(path, job, bank_version, chunk_size):
+    """같은 작업·질문 세트 버전·청크 크기의 체크포인트만 이어서 사용"""
+    if os.path.exists(path):
+        with open(path, encoding="utf-8") as f:
+            checkpoint = json.load(f)
+        if (checkpoint.get("job", "rescore") == job and checkpoint.get("bank_version") == bank_version
+                and checkpoint.get("chunk_size") == chunk_size):
+            return checkpoint
+    return new_checkpoint(job, bank_version, chunk_size)
+
+
+def save_checkpoint(path, checkpoint):
+    """체크포인트를 임시 파일에 쓴 뒤 원자적으로 교체"""
+    os.makedirs(os.path.dirname(path) or ".", exist_ok=True)
+    with open(path + ".tmp", "w", encoding="utf-8") as f:
+        json.dump(checkpoint, f)
+    os.replace(path + ".tmp", path)
+
+
+def run(url, key, bank_version=CURRENT_BANK_VERSION, chunk_size=DEFAULT_CHUNK_SIZE, workers=None,
+        apply=False, checkpoint_path=CHECKPOINT_PATH, restart=False, job="rescore", snapshot_dir=SNAPSHOT_DIR):
+    """전체 id 범위를 청크로 나눠 프로세스 풀에서 재채점(또는 압축 응답 채우기)하고 누적 통계 반환"""
+    registry = load_registry(bank_version)
+    client = create_compressed_client(url, key)
+    max_id, _, _ = fetch_data_version(client)
+    unavailable = unavailable_columns(probe_schema_capabilities(client))
+    if job == "encode" and "answer_codes" in unavailable:
+        raise RuntimeError("answer_codes 컬럼이 없습니다. add_answer_codes_column.sql을 먼저 실행하세요.")
+    columns = ",".join(c for c in RESCORE_COLUMNS if c not in unavailable)
+    checkpoint_path = checkpoint_path.format(job=job)
+    if restart or not apply:
+        # dry-run은 반영하지 않으므로 체크포인트를 이어 쓰지 않음
+        checkpoint = new_checkpoint(job, registry.bank_version, chunk_size)
+    else:
+        checkpoint = load_checkpoint(checkpoint_path, job, registry.bank_version, chunk_size)
+    done = set(checkpoint["done"])
+    ranges = [lo for lo in range(0, max_id, chunk_size) if lo not in done]
+    print(f"[{job}] 질문 세트 {registry.bank_version} | max(id)={max_id} | 청크 {len(ranges)}개 남음 "
+          f"({len(done)}개 완료) | {'반영' if apply else 'dry-run'}")
+
+    started = time.perf_counter()
+    with ProcessPoolExecutor(max_workers=workers, initializer=_init_worker,
+                             initargs=(url, key, bank_version, columns)) as pool:
+        futures = [pool.submit(rescore_range, lo, lo + chunk_size, apply, job) for lo in ranges]
+        for future in as_completed(futures):
+            lo, stats = future.result()
+            for key_name in STAT_KEYS:
+                checkpoint["stats"][key_name] += stats[key_name]
+            checkpoint["done"].append(lo)
+            if apply:
+                save_checkpoint(checkpoint_path, checkpoint)
+            total = checkpoint["stats"]
+            print(f"  id ({lo}, {lo + chunk_size}] 완료: 행 {stats['rows']} / 변경 {stats['changed']} "
+                  f"| 누적 행 {total['rows']} ({total['rows'] / (time.perf_counter() - started):.0f}행/s)")
+
+    if apply and checkpoint["stats"]["updated"] and "updated_at" in unavailable:
+        # 데이터 버전(max(id), 행 수)이 그대로라 앱이 수정된 행을 감지하지 못하므로 로컬 파생 파일을 지움
+        removed = remove_snapshots(snapshot_dir)
+        print(f"⚠️ updated_at 컬럼이 없어 스냅샷 파일 {len(removed)}개를 삭제했습니다. "
+              "다른 서버의 스냅샷과 실행 중인 앱의 캐시는 갱신되지 않으므로 add_updated_at_column.sql을 실행하세요.")
+    return checkpoint["stats"]
+
+
+def main():
+    parser = argparse.ArgumentParser(description="저장된 진단의 mbti/scores 일괄 재채점·압축 응답 채우기")
+    parser.add_argument("--job", choices=sorted(JOBS), default="rescore",
+                        help="rescore: mbti/scores 재채점, encode: answer_codes 채우기")
+    parser.add_argument("--apply", action="store_true", help="변경된 행을 데이터베이스에 반영 (기본: dry-run)")
+    parser.add_argument("--bank-version", type=int, default=CURRENT_BANK_VERSION, help="사용할 질문 세트 버전")
+    parser.add_argument("--chunk-size", type=int, default=DEFAULT_CHUNK_SIZE, help="청크당 id 구간 크기")
+    parser.add_argument("--workers", type=int, default=None, help="워커 프로세스 수 (기본: CPU 수)")
+    parser.add_argument("--checkpoint", default=CHECKPOINT_PATH, help="재개용 체크포인트 파일 경로")
+    parser.add_argument("--restart", action="store_true", help="체크포인트를 무시하고 처음부터 실행")
+    args = parser.parse_args()
+
+    load_dotenv()
+    url, key = os.getenv("SUPABASE_URL"), os.getenv("SUPABASE_KEY")
+    if not url or not key:
+        print("❌ SUPABASE_URL, SUPABASE_KEY 환경 변수가 필요합니다.")
+        return 1
+
+    stats = run(url, key, args.bank_version, args.chunk_size, args.workers, args.apply,
+                args.checkpoint, args.restart, args.job)
+    print(f"\n행 {stats['rows']} | 변경 대상 {stats['changed']} | 반영 {stats['updated']} "
+          f"| 미응답 문항 있음 {stats['incomplete']}")
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
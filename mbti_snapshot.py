@@ -0,0 +1,142 @@
+"""responses 테이블의 로컬 Parquet 스냅샷 증분 동기화"""
+import json
+import os
+import threading
+from datetime import datetime
+
+import pandas as pd
+
+from mbti_db import UPDATED_AT_EPOCH, iter_response_chunks, iter_response_pages
+
+SNAPSHOT_DIR = os.getenv("MBTI_SNAPSHOT_DIR", ".snapshot")
+
+# Parquet에 그대로 넣으면 질문 세트마다 키가 달라 struct 스키마가 흔들리므로 JSON 문자열로 보관
+JSON_COLUMNS = ("responses", "scores")
+
+_sync_lock = threading.Lock()
+
+
+def _paths(snapshot_dir, name):
+    return os.path.join(snapshot_dir, f"{name}.parquet"), os.path.join(snapshot_dir, f"{name}_meta.json")
+
+
+def read_snapshot(snapshot_dir=SNAPSHOT_DIR, name="responses"):
+    """로컬 스냅샷과 메타데이터 로드 (없으면 빈 DataFrame)"""
+    data_path, meta_path = _paths(snapshot_dir, name)
+    if not (os.path.exists(data_path) and os.path.exists(meta_path)):
+        return pd.DataFrame(), {"last_id": 0, "row_count": 0}
+    with open(meta_path, encoding="utf-8") as f:
+        meta = json.load(f)
+    df = pd.read_parquet(data_path)
+    for col in JSON_COLUMNS:
+        if col in df.columns:
+            # 빈 값은 None으로 (pandas 3의 문자열 dtype은 결측을 NaN으로 읽음)
+            df[col] = df[col].map(lambda v: json.loads(v) if isinstance(v, str) else None).astype(object)
+    return df, meta
+
+
+def write_snapshot(df, snapshot_dir=SNAPSHOT_DIR, name="responses", columns="*", last_updated=None):
+    """스냅샷을 임시 파일에 쓴 뒤 원자적으로 교체"""
+    os.makedirs(snapshot_dir, exist_ok=True)
+    data_path, meta_path = _paths(snapshot_dir, name)
+    out = df.copy()
+    for col in JSON_COLUMNS:
+        if col in out.columns:
+            out[col] = out[col].map(lambda v: None if v is None else json.dumps(v, ensure_ascii=False))
+    meta = {
+        "last_id": int(df["id"].max()) if not df.empty else 0,
+        "row_count": len(df),
+        "columns": columns,
+        "updated_at": last_updated,
+        "synced_at": datetime.now().isoformat(),
+    }
+    out.to_parquet(data_path + ".tmp", index=False)
+    os.replace(data_path + ".tmp", data_path)
+    with open(meta_path + ".tmp", "w", encoding="utf-8") as f:
+        json.dump(meta, f)
+    os.replace(meta_path + ".tmp", meta_path)
+    return meta
+
+
+def remove_snapshots(snapshot_dir=SNAPSHOT_DIR):
+    """응답에서 만든 로컬 파일(Parquet 스냅샷, 건수 큐브, 전이 모델)을 삭제하고 삭제한 경로 반환
+
+    데이터 버전으로 감지할 수 없는 변경(updated_at 없이 기존 행 UPDATE) 후에 호출하면
+    다음 동기화에서 전체를 다시 만듭니다. 재채점 체크포인트는 남깁니다.
+    """
+    if not os.path.isdir(snapshot_dir):
+        return []
+    removed = []
+    for file_name in sorted(os.listdir(snapshot_dir)):
+        if file_name.endswith((".parquet", "_meta.json", ".npz")):
+            os.remove(os.path.join(snapshot_dir, file_name))
+            removed.append(os.path.join(snapshot_dir, file_name))
+    return removed
+
+
+def _count_up_to(client, last_id):
+    """서버에 남아 있는 id <= last_id 행 수"""
+    res = client.table("responses").select("id", count="exact").lte("id", last_id).limit(1).execute()
+    return res.count or 0
+
+
+def _live_ids(client, last_id):
+    """서버에 남아 있는 id <= last_id 목록 (id 컬럼만 키셋 페이지로 조회)"""
+    ids = []
+    for rows in iter_response_pages(client, columns="id"):
+        ids.extend(r["id"] for r in rows if r["id"] <= last_id)
+        if rows[-1]["id"] >= last_id:
+            break
+    return ids
+
+
+def sync_snapshot(client, snapshot_dir=SNAPSHOT_DIR, full=False, name="responses", columns="*",
+                  last_updated=None):
+    """마지막 동기화 id 이후 행만 받아 스냅샷을 갱신
+
+    1. 삭제 확인(tombstone) 단계: 서버의 id <= last_id 행 수가 스냅샷과 다를 때만
+       남아 있는 id 목록을 받아 삭제된 행을 제거
+    2. 수정 확인 단계: last_updated(데이터 버전 토큰의 max(updated_at))가 스냅샷과 다를 때만
+       마지막 동기화 이후 updated_at이 바뀐 행을 받아 교체
+    3. id > last_id 인 신규 행을 키셋 페이지로 가져와 추가
+    delete_user_data(), reset_all_data(), 중복 정리 등으로 지워진 행이 1단계에서,
+    mbti_rescore.py의 재채점 등으로 수정된 행이 2단계에서 반영됩니다.
+    name별로 파일을 따로 두며, 저장된 select 컬럼이 달라지면 전체를 다시 받습니다.
+    """
+    with _sync_lock:
+        df, meta = pd.DataFrame(), {"last_id": 0, "row_count": 0}
+        if not full:
+            df, meta = read_snapshot(snapshot_dir, name)
+            if meta.get("columns", columns) != columns:
+                df, meta, full = pd.DataFrame(), {"last_id": 0, "row_count": 0}, True
+        last_id = meta.get("last_id", 0)
+        changed = False
+
+        # 삭제 확인: 행 수가 같으면 id 목록을 받지 않음
+        if not df.empty and _count_up_to(client, last_id) != len(df):
+            live = set(_live_ids(client, last_id))
+            df = df[df["id"].isin(live)].reset_index(drop=True)
+            changed = True
+
+        # 수정 확인: 마지막 수정 시각이 같으면 조회하지 않음
+        synced_updated = meta.get("updated_at")
+        if not df.empty and last_updated is not None and last_updated != synced_updated:
+            filters = [("gt", "updated_at", synced_updated or UPDATED_AT_EPOCH), ("lte", "id", last_id)]
+            updated = list(iter_response_chunks(client, columns, filters=filters))
+            if updated:
+                updated = pd.concat(updated, ignore_index=True)
+                df = pd.concat([df[~df["id"].isin(updated["id"])], updated]).sort_values("id", kind="mergesort")
+                df = df.reset_index(drop=True)
+            changed = True
+
+        # 신규 행 증분 수집
+        new_chunks = list(iter_response_chunks(client, columns, after_id=last_id))
+        if new_chunks:
+            df = pd.concat(([df] if not df.empty else []) + new_chunks, ignore_index=True)
+            changed = True
+
+        if changed or full:
+            if last_updated is None:
+                last_updated = synced_updated
+            write_snapshot(df, snapshot_dir, name, columns, last_updated)
+        return df
@@ -0,0 +1,93 @@
+"""사용자–로봇 조합별 MBTI 전이 계산 (Streamlit 비의존)
+
+전체 진단 표를 (user_id, robot_id, timestamp) 순으로 한 번 정렬하고, 바로 앞 행과
+같은 조합인지 비교하는 벡터 연산으로 모든 조합의 연속 진단 쌍(전이)을 한꺼번에 만듭니다.
+같은 결과에서 전체 16 × 16 전이 행렬과 축별 뒤집힘 비율 표도 계산하므로,
+로봇별·사용자별 화면은 이 결과를 잘라서 쓰기만 하면 됩니다.
+"""
+import numpy as np
+import pandas as pd
+
+from mbti_types import AXES, AXIS_LABELS, TYPES, axis_flips, encode_types
+
+PAIR_KEYS = ("user_id", "robot_id")
+FLIP_COLUMNS = tuple(f"flip_{axis}" for axis in AXES)
+
+
+def build_transitions(df, keys=PAIR_KEYS, columns=()):
+    """모든 조합의 연속 진단 쌍을 한 번의 정렬과 이동 비교로 계산
+
+    반환값 transitions 열: keys, columns(도착 진단 행의 값), from_mbti, to_mbti, from_code, to_code,
+    from_timestamp, timestamp, interval_days(정수 일), changed, flip_EI/flip_SN/flip_TF/flip_JP, n_flips.
+    유형 코드가 유효하지 않은 행은 전이에서 제외합니다.
+    """
+    keys = list(keys)
+    columns = [c for c in columns if c not in keys]
+    empty = pd.DataFrame(columns=keys + columns + ["from_mbti", "to_mbti", "from_code", "to_code", "from_timestamp",
+                                         "timestamp", "interval_days", "changed", *FLIP_COLUMNS, "n_flips"])
+    if df.empty or len(df) < 2:
+        return empty
+
+    ordered = df[keys + columns].reset_index(drop=True)
+    ordered["timestamp"] = pd.to_datetime(df["timestamp"], utc=True, errors="coerce").reset_index(drop=True)
+    ordered["code"] = encode_types(df["mbti"].to_numpy())
+    ordered = ordered.sort_values(keys + ["timestamp"], kind="mergesort").reset_index(drop=True)
+
+    # 바로 앞 행이 같은 조합이면 그 행에서 이어지는 전이
+    same_pair = np.ones(len(ordered), dtype=bool)
+    for key in keys:
+        values = ordered[key].to_numpy()
+        same_pair[1:] &= values[1:] == values[:-1]
+    same_pair[0] = False
+    codes = ordered["code"].to_numpy()
+    prev_codes = np.roll(codes, 1)
+    valid = same_pair & (codes >= 0) & (prev_codes >= 0)
+    if not valid.any():
+        return empty
+
+    idx = np.flatnonzero(valid)
+    from_codes, to_codes = prev_codes[idx], codes[idx]
+    timestamps = ordered["timestamp"]
+    transitions = ordered.loc[idx, keys + columns].reset_index(drop=True)
+    transitions["from_mbti"] = np.asarray(TYPES, dtype=object)[from_codes]
+    transitions["to_mbti"] = np.asarray(TYPES, dtype=object)[to_codes]
+    transitions["from_code"] = from_codes
+    transitions["to_code"] = to_codes
+    transitions["from_timestamp"] = timestamps.iloc[idx - 1].reset_index(drop=True)
+    transitions["timestamp"] = timestamps.iloc[idx].reset_index(drop=True)
+    transitions["interval_days"] = (transitions["timestamp"] - transitions["from_timestamp"]).dt.days
+    flips = axis_flips(from_codes, to_codes)
+    for k, column in enumerate(FLIP_COLUMNS):
+        transitions[column] = flips[:, k]
+    transitions["n_flips"] = flips.sum(axis=1)
+    transitions["changed"] = transitions["n_flips"] > 0
+    return transitions
+
+
+def transition_matrix(transitions):
+    """(from × to) 16 × 16 전이 건수 행렬 (TYPES 순서, 유형 유지 포함)"""
+    flat = transitions["from_code"].to_numpy(dtype=np.int64) * 16 + transitions["to_code"].to_numpy(dtype=np.int64)
+    return np.bincount(flat, minlength=256).reshape(16, 16)
+
+
+def axis_flip_rates(transitions):
+    """축별 뒤집힘 건수와 비율 (전체 전이 대비, 유형이 바뀐 전이 대비)"""
+    flips = transitions[list(FLIP_COLUMNS)].to_numpy(dtype=bool)
+    changed = int(transitions["changed"].sum()) if len(transitions) else 0
+    counts = flips.sum(axis=0)
+    return pd.DataFrame({
+        "axis": AXIS_LABELS,
+        "flips": counts,
+        "rate": counts / len(transitions) if len(transitions) else np.zeros(len(AXES)),
+        "share_of_changes": counts / changed if changed else np.zeros(len(AXES)),
+    })
+
+
+def build_transition_tables(df, keys=PAIR_KEYS):
+    """전이 목록, 전체 전이 행렬, 축별 뒤집힘 비율 표를 한 번에 계산"""
+    transitions = build_transitions(df, keys)
+    return {
+        "transitions": transitions,
+        "matrix": transition_matrix(transitions),
+        "axis_flip_rates": axis_flip_rates(transitions),
+    }
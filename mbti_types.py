@@ -0,0 +1,97 @@
+"""MBTI 유형 4비트 인코딩과 축 연산 표 (Streamlit 비의존)
+
+16개 유형을 0~15 정수로 표현합니다. 비트 3..0이 각각 E/I, S/N, T/F, J/P 축이며
+비트가 1이면 두 번째 극(I, N, F, P)입니다. 축·극·기질 판별은 모두 미리 만든
+(… × 16) 마스크와 16 × 16 표를 쓰므로, 분석 함수는 유형별 건수 벡터(또는 그룹 × 16
+건수 행렬)에 대한 행렬 곱·마스크 연산만 하면 됩니다.
+"""
+import numpy as np
+
+AXES = ("EI", "SN", "TF", "JP")
+AXIS_LABELS = ("E/I", "S/N", "T/F", "J/P")
+AXIS_BITS = np.array([8, 4, 2, 1], dtype=np.int8)
+POLES = ("E", "I", "S", "N", "T", "F", "J", "P")
+
+# 코드 순서의 16개 유형 (TYPES[code])
+TYPES = tuple(
+    "".join(axis[(code >> (3 - k)) & 1] for k, axis in enumerate(AXES))
+    for code in range(16)
+)
+TYPE_CODES = {mbti: code for code, mbti in enumerate(TYPES)}
+INVALID = -1
+
+_codes = np.arange(16)
+
+# (4 × 16) 축별 비트: AXIS_BITS_MATRIX[k, code] = 1이면 k번째 축이 두 번째 극
+AXIS_BITS_MATRIX = ((_codes[None, :] >> (3 - np.arange(4))[:, None]) & 1).astype(np.int8)
+
+# (8 × 16) 극 마스크: POLE_MASKS[POLES.index("T"), code] = T를 가진 유형이면 1
+POLE_MASKS = np.empty((8, 16), dtype=np.int8)
+POLE_MASKS[0::2] = 1 - AXIS_BITS_MATRIX
+POLE_MASKS[1::2] = AXIS_BITS_MATRIX
+POLE_INDEX = {pole: i for i, pole in enumerate(POLES)}
+
+# 극별 유형 목록: TYPES_WITH["E"] = E를 가진 8개 유형
+TYPES_WITH = {pole: tuple(TYPES[c] for c in np.flatnonzero(POLE_MASKS[i])) for i, pole in enumerate(POLES)}
+
+# 기질 그룹 (S/N × T/F 가운데 두 글자)
+TEMPERAMENTS = ("NT", "NF", "ST", "SF")
+TEMPERAMENT_MASKS = np.array(
+    [POLE_MASKS[POLE_INDEX[t[0]]] & POLE_MASKS[POLE_INDEX[t[1]]] for t in TEMPERAMENTS], dtype=np.int8
+)
+
+# 16 × 16 유형 간 차이: XOR 비트, 달라진 축 수(해밍 거리), 공유 글자 수
+XOR_TABLE = (_codes[:, None] ^ _codes[None, :]).astype(np.int8)
+HAMMING = ((XOR_TABLE[..., None] >> (3 - np.arange(4))) & 1).sum(axis=-1).astype(np.int8)
+SHARED_LETTERS = (4 - HAMMING).astype(np.int8)
+
+for _table in (AXIS_BITS_MATRIX, POLE_MASKS, TEMPERAMENT_MASKS, XOR_TABLE, HAMMING, SHARED_LETTERS):
+    _table.setflags(write=False)
+
+
+def encode_types(values):
+    """MBTI 문자열 배열을 유형 코드 배열로 변환 (알 수 없는 값은 -1)
+
+    고유 값만 사전 조회한 뒤 역인덱스로 펼치므로 행 수가 많아도 파이썬 루프는 고유 값 수만큼만 돕니다.
+    """
+    values = np.asarray(values, dtype=object)
+    if values.size == 0:
+        return np.empty(0, dtype=np.int8)
+    uniques, inverse = np.unique(values.astype(str), return_inverse=True)
+    lookup = np.array([TYPE_CODES.get(u, INVALID) for u in uniques], dtype=np.int8)
+    return lookup[inverse.reshape(values.shape)]
+
+
+def type_counts(codes):
+    """유형 코드 배열의 16칸 건수 벡터"""
+    codes = np.asarray(codes)
+    return np.bincount(codes[codes >= 0], minlength=16)
+
+
+def count_matrix(table):
+    """MBTI 열을 가진 교차표(DataFrame)를 TYPES 순서의 (행 수 × 16) 건수 행렬로 정렬"""
+    return table.reindex(columns=list(TYPES), fill_value=0).to_numpy(dtype=np.int64)
+
+
+def pole_counts(counts):
+    """건수 벡터(16) 또는 행렬(G × 16)의 극별 건수 (… × 8, POLES 순서)"""
+    return np.asarray(counts) @ POLE_MASKS.T
+
+
+def pole_ratio(counts, pole):
+    """극 비율(%) = 해당 극 건수 / 같은 축 건수 합 (축 건수가 0이면 0)"""
+    poles = pole_counts(counts)
+    i = POLE_INDEX[pole]
+    pair = poles[..., i & ~1] + poles[..., i | 1]
+    return np.divide(poles[..., i] * 100.0, pair, out=np.zeros(np.shape(pair), dtype=float), where=pair > 0)
+
+
+def temperament_counts(counts):
+    """건수 벡터(16) 또는 행렬(G × 16)의 기질별 건수 (… × 4, TEMPERAMENTS 순서)"""
+    return np.asarray(counts) @ TEMPERAMENT_MASKS.T
+
+
+def axis_flips(from_codes, to_codes):
+    """유형 쌍 배열의 축별 변화 여부 (n × 4 bool, AXES 순서)"""
+    xor = XOR_TABLE[np.asarray(from_codes), np.asarray(to_codes)]
+    return ((xor[..., None] >> (3 - np.arange(4))) & 1).astype(bool)
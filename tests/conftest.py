@@ -0,0 +1,200 @@
+"""테스트 공용 픽스처 (샘플 진단 행, 메모리 PostgREST 클라이언트, 앱 모듈)"""
+import importlib
+import os
+import sys
+import tempfile
+from types import SimpleNamespace
+
+import numpy as np
+import pandas as pd
+import pytest
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+# 스냅샷·큐브·전이 모델 파일은 작업 디렉터리의 .snapshot 대신 임시 디렉터리에 기록
+os.environ["MBTI_SNAPSHOT_DIR"] = tempfile.mkdtemp(prefix="mbti-test-snapshot-")
+
+from mbti_types import TYPES  # noqa: E402
+
+
+def make_responses(n=400, seed=0, start_id=1, users=40, robots=3):
+    """analytics 프로필 컬럼을 가진 샘플 진단 행 (timestamp는 Supabase 형식의 UTC ISO 문자열)"""
+    rng = np.random.default_rng(seed)
+    timestamps = (pd.Timestamp("2025-01-01", tz="UTC")
+                  + pd.to_timedelta(np.sort(rng.integers(0, 60 * 24 * 3600, n)), unit="s"))
+    return pd.DataFrame({
+        "id": np.arange(start_id, start_id + n),
+        "user_id": [f"user{i}" for i in rng.integers(0, users, n)],
+        "robot_id": [f"로봇{chr(65 + i)}" for i in rng.integers(0, robots, n)],
+        "mbti": rng.choice(TYPES, n),
+        "gender": rng.choice(["남", "여", None], n),
+        "age_group": rng.choice(["10대", "20대", "30대"], n),
+        "job": rng.choice(["학생", "직장인"], n),
+        "location": rng.choice(["일반", "병원", "도서관", None], n),
+        "timestamp": [t.isoformat() for t in timestamps],
+    })
+
+
+@pytest.fixture
+def responses():
+    return make_responses()
+
+
+def _timestamp(value):
+    return None if value is None else pd.Timestamp(value)
+
+
+class _Query:
+    """supabase-py 쿼리 빌더 중 mbti_db가 쓰는 부분만 흉내 냄"""
+
+    _OPS = {
+        "eq": lambda a, b: a == b,
+        "gt": lambda a, b: a is not None and a > b,
+        "gte": lambda a, b: a is not None and a >= b,
+        "lt": lambda a, b: a is not None and a < b,
+        "lte": lambda a, b: a is not None and a <= b,
+        "ilike": lambda a, b: a is not None and b.strip("%").replace("\\", "").lower() in a.lower(),
+    }
+
+    _TIMESTAMP_COLUMNS = ("timestamp", "created_at", "updated_at")
+
+    def __init__(self, client, table):
+        self.client, self.table = client, table
+        self.columns, self.count, self.head = "*", None, False
+        self.conditions, self.order_by, self.desc = [], "id", False
+        self.row_limit, self.update_values, self.deleting, self.inserting = None, None, False, None
+
+    def select(self, columns="*", count=None, head=False):
+        self.columns, self.count, self.head = columns, count, head
+        return self
+
+    def update(self, values):
+        self.update_values = values
+        return self
+
+    def delete(self):
+        self.deleting = True
+        return self
+
+    def insert(self, rows):
+        self.inserting = [rows] if isinstance(rows, dict) else list(rows)
+        return self
+
+    def upsert(self, rows, on_conflict=None, ignore_duplicates=False):
+        if not self.client.unique_sessions:
+            raise RuntimeError("42P10 there is no unique or exclusion constraint matching the ON CONFLICT specification")
+        rows = [rows] if isinstance(rows, dict) else list(rows)
+        existing = {r.get(on_conflict) for r in self.client.tables[self.table]}
+        self.inserting = [r for r in rows if r.get(on_conflict) not in existing]
+        return self
+
+    def order(self, column, desc=False):
+        self.order_by, self.desc = column, desc
+        return self
+
+    def limit(self, n):
+        self.row_limit = n
+        return self
+
+    def in_(self, column, values):
+        self.conditions.append(lambda row: row.get(column) in set(values))
+        return self
+
+    def __getattr__(self, op):
+        if op not in self._OPS:
+            raise AttributeError(op)
+
+        def condition(column, value):
+            if column in self._TIMESTAMP_COLUMNS:
+                # PostgreSQL처럼 timestamptz 값으로 비교 (문자열 비교는 시간대가 다르면 틀림)
+                value = pd.Timestamp(value)
+                self.conditions.append(lambda row: self._OPS[op](_timestamp(row.get(column)), value))
+            else:
+                self.conditions.append(lambda row: self._OPS[op](row.get(column), value))
+            return self
+        return condition
+
+    def execute(self):
+        if self.inserting is not None:
+            table = self.client.tables[self.table]
+            next_id = max((r["id"] for r in table), default=0) + 1
+            inserted = [{"id": next_id + i, **row} for i, row in enumerate(self.inserting)]
+            table.extend(inserted)
+            self.client.inserts += 1
+            return SimpleNamespace(data=inserted, count=None)
+        rows = [r for r in self.client.tables[self.table] if all(c(r) for c in self.conditions)]
+        rows.sort(key=lambda r: r[self.order_by], reverse=self.desc)
+        if self.update_values is not None:
+            for row in rows:
+                row.update(self.update_values)
+                if self.client.track_updates:
+                    row["updated_at"] = self.client.stamp()
+            return SimpleNamespace(data=[dict(r) for r in rows], count=None)
+        if self.deleting:
+            self.client.tables[self.table] = [r for r in self.client.tables[self.table] if r not in rows]
+            return SimpleNamespace(data=rows, count=None)
+        count = len(rows) if self.count else None
+        if self.row_limit is not None:
+            rows = rows[:self.row_limit]
+        if self.columns != "*":
+            names = [c.strip() for c in self.columns.split(",")]
+            rows = [{c: r.get(c) for c in names} for r in rows]
+        return SimpleNamespace(data=[] if self.head else rows, count=count)
+
+
+class FakeClient:
+    """responses 테이블을 메모리에 둔 Supabase 클라이언트 대용 (RPC는 모두 미설치로 응답)
+
+    track_updates=True이면 add_updated_at_column.sql의 트리거처럼 UPDATE한 행의 updated_at을 기록하고,
+    unique_sessions=False이면 diagnosis_session_id 유니크 제약이 없는 스키마처럼 upsert가 42P10으로 실패합니다.
+    """
+
+    def __init__(self, rows=(), track_updates=False, unique_sessions=True):
+        self.tables = {"responses": [], "user_robots": []}
+        self.track_updates = track_updates
+        self.unique_sessions = unique_sessions
+        self.inserts = 0
+        self._updates = 0
+        self.add(rows)
+
+    def stamp(self):
+        self._updates += 1
+        return (pd.Timestamp("2025-06-01", tz="UTC") + pd.Timedelta(seconds=self._updates)).isoformat()
+
+    def add(self, rows):
+        if isinstance(rows, pd.DataFrame):
+            rows = rows.astype(object).where(rows.notna(), None).to_dict("records")
+        self.tables["responses"].extend(dict(r) for r in rows)
+
+    def table(self, name):
+        return _Query(self, name)
+
+    def rpc(self, name, params=None):
+        raise RuntimeError(f"PGRST202 Could not find the function public.{name}")
+
+
+@pytest.fixture
+def fake_client():
+    return FakeClient
+
+
+@pytest.fixture
+def app(monkeypatch):
+    """메모리 클라이언트(make_responses 400행)에 연결된 Streamlit 앱 모듈
+
+    .env의 실제 Supabase 설정으로 연결하지 않도록 빈 값으로 가린 뒤 가져오며,
+    공유 캐시와 스냅샷 파일은 테스트마다 비웁니다.
+    """
+    pytest.importorskip("streamlit")
+    monkeypatch.setenv("SUPABASE_URL", "")
+    monkeypatch.setenv("SUPABASE_KEY", "")
+    module = importlib.import_module("mbti_16_analysis_250812")
+    from mbti_db import SCHEMA_PROBES
+    from mbti_snapshot import remove_snapshots
+
+    monkeypatch.setattr(module, "supabase", FakeClient(make_responses()))
+    monkeypatch.setattr(module, "SCHEMA_CAPABILITIES", dict.fromkeys(SCHEMA_PROBES, True))
+    module.invalidate_response_cache()
+    remove_snapshots()
+    yield module
+    module.invalidate_response_cache()
+    remove_snapshots()
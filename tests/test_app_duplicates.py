@@ -0,0 +1,51 @@
+"""관리자 중복 데이터 정리 탭의 중복 탐지"""
+import pandas as pd
+import pytest
+
+from conftest import make_responses
+from mbti_frame import prepare_analytics_frame
+
+
+def _loop_duplicates(df):
+    """조합마다 시간순으로 정렬해 요약과 레코드를 만드는 기존 방식"""
+    info, records = [], []
+    for (user_id, robot_id), group in df.groupby(["user_id", "robot_id"], sort=True, observed=True):
+        if len(group) < 2:
+            continue
+        group = group.sort_values("timestamp", kind="mergesort")
+        info.append({"user_id": user_id, "robot_id": robot_id, "count": len(group),
+                     "first_date": group["timestamp"].iloc[0], "last_date": group["timestamp"].iloc[-1],
+                     "mbti_changes": " → ".join(group["mbti"].astype(str))})
+        for i, (index, row) in enumerate(group.iterrows()):
+            records.append({"index": index, "id": row["id"], "is_latest": i == len(group) - 1})
+    return info, records
+
+
+@pytest.fixture
+def df():
+    df = make_responses(300, seed=22, users=20, robots=2)
+    return df.sample(frac=1, random_state=2).reset_index(drop=True)
+
+
+@pytest.mark.parametrize("prepare", [False, True])
+def test_find_duplicate_records_matches_loop(app, df, prepare):
+    frame = prepare_analytics_frame(df) if prepare else df
+    info, records = app.find_duplicate_records(frame)
+    expected_info, expected_records = _loop_duplicates(frame)
+
+    actual_info = info.astype({"user_id": str, "robot_id": str}).to_dict("records")
+    assert sorted(actual_info, key=lambda r: (r["user_id"], r["robot_id"])) == [
+        dict(r, user_id=str(r["user_id"]), robot_id=str(r["robot_id"])) for r in expected_info]
+    assert sorted(records[["index", "id", "is_latest"]].to_dict("records"), key=lambda r: r["index"]) == sorted(
+        expected_records, key=lambda r: r["index"])
+    assert records["is_latest"].sum() == len(info)
+
+
+def test_find_duplicate_records_without_duplicates(app):
+    df = make_responses(5, users=5, robots=1)
+    df["user_id"] = [f"only{i}" for i in range(5)]
+    info, records = app.find_duplicate_records(df)
+    assert info.empty and records.empty
+    info, records = app.find_duplicate_records(pd.concat([df, df.iloc[[0]].assign(id=99)], ignore_index=True))
+    assert info["count"].tolist() == [2]
+    assert records.loc[records["is_latest"], "id"].tolist() == [99]
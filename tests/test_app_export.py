@@ -0,0 +1,16 @@
+"""앱의 사용자 데이터 내보내기"""
+
+
+def test_user_export_is_limited_to_user_and_cached_by_version(app):
+    export = app.load_user_export("user1")
+    assert set(export["user_id"]) == {"user1"}
+    assert "responses" in export.columns
+
+    row_id = int(export["id"].iloc[0])
+    next(r for r in app.supabase.tables["responses"] if r["id"] == row_id)["mbti"] = "XXXX"
+    app.get_data_version.clear()
+    # 데이터 버전이 그대로면 다시 조회하지 않음
+    assert "XXXX" not in set(app.load_user_export("user1")["mbti"])
+
+    app.invalidate_response_cache()
+    assert "XXXX" in set(app.load_user_export("user1")["mbti"])
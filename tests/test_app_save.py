@@ -0,0 +1,42 @@
+"""앱의 진단 저장"""
+
+
+def _responses(n=17):
+    return {f"q{i}": {"question": f"문항 {i}", "score": i % 5, "dimension": "EI"} for i in range(n)}
+
+
+def test_save_to_database_inserts_all_question_rows_at_once(app):
+    client = app.supabase
+    before = len(client.tables["responses"])
+    ok, _ = app.save_to_database("user1", "로봇A", "ENFJ", _responses(), "병원", {"gender": "여", "age_group": "20대"})
+    assert ok
+    assert client.inserts == 1
+    rows = client.tables["responses"][before:]
+    assert [r["question_id"] for r in rows] == [f"q{i}" for i in range(17)]
+    assert len({r["created_at"] for r in rows}) == 1
+    assert len({r["diagnosis_session_id"] for r in rows}) == 1
+    assert {r["location"] for r in rows} == {"병원"}
+
+
+def test_build_question_rows_share_session_and_profile(app):
+    rows = app.build_question_rows("user1", "로봇A", "ISTJ", _responses(3), "일반", {"job": "학생"}, "session-1")
+    assert [r["response_score"] for r in rows] == [0, 1, 2]
+    assert {(r["mbti_result"], r["job"], r["gender"], r["diagnosis_session_id"]) for r in rows} == {
+        ("ISTJ", "학생", "", "session-1")}
+
+
+def test_save_response_stores_answer_codes(app):
+    bank = app.QUESTION_REGISTRY["병원"]
+    responses = {q["id"]: q["choices"][i % 2] for i, q in enumerate(bank.questions)}
+    diagnosis = {"user_id": "user1", "gender": "여", "age_group": "20대", "job": "학생", "robot_id": "로봇A",
+                 "responses": responses, "mbti": "ENFJ", "scores": bank.score(responses),
+                 "timestamp": "2025-06-01T09:00:00+00:00", "location": "병원", "diagnosis_session_id": "s-17"}
+    assert app.save_response_with_session(diagnosis)
+    row = app.supabase.tables["responses"][-1]
+    assert "responses" not in row
+    assert (row["answer_codes"], row["question_bank_version"]) == (bank.encode_answers(responses), bank.bank_version)
+
+    # 관리자 전체 조회는 복원하지 않고, 내보내기·백업 경로에서만 응답 원문을 복원
+    assert app.load_responses("export").loc[lambda d: d["diagnosis_session_id"] == "s-17", "responses"].isna().all()
+    for exported in (app.load_user_export("user1"), app.load_shared_responses("export")):
+        assert exported.loc[exported["diagnosis_session_id"] == "s-17", "responses"].tolist() == [responses]
@@ -0,0 +1,96 @@
+"""분석 화면의 섹션별 실행 (선택한 섹션만 실행되어도 각 섹션이 오류 없이 그려지는지)"""
+import os
+
+import pytest
+
+import mbti_db
+from conftest import FakeClient, make_responses
+from mbti_snapshot import remove_snapshots
+
+st = pytest.importorskip("streamlit")
+from streamlit.testing.v1 import AppTest  # noqa: E402
+
+APP_PATH = os.path.join(os.path.dirname(os.path.dirname(os.path.abspath(__file__))), "mbti_16_analysis_250812.py")
+
+SECTIONS = ["📊 전체 트렌드", "📈 집단별 분석", "🤖 로봇 이력", "🧠 고급 분석",
+            "🔁 유형 전이 모델", "📋 데이터 관리", "🔧 관리자 관리"]
+
+
+@pytest.fixture
+def analytics_app(monkeypatch):
+    client = FakeClient(make_responses(300))
+    monkeypatch.setattr(mbti_db, "create_compressed_client", lambda url, key: client)
+    monkeypatch.setenv("SUPABASE_URL", "http://localhost:54321")
+    monkeypatch.setenv("SUPABASE_KEY", "fake")
+    st.cache_data.clear()
+    remove_snapshots()
+    yield
+    st.cache_data.clear()
+    remove_snapshots()
+
+
+def _open_section(section):
+    """관리자로 로그인한 분석 화면을 section이 선택된 상태로 실행
+
+    라디오를 같은 AppTest에서 바꾸면 위젯 상태가 어긋나므로 섹션마다 새로 실행합니다.
+    """
+    at = AppTest.from_file(APP_PATH, default_timeout=120)
+    at.session_state["user_id"] = "user1"
+    at.session_state["page"] = 3
+    at.session_state["admin_logged_in"] = True
+    at.session_state["analytics_section"] = section
+    return at.run()
+
+
+def _selectbox(at, label):
+    return next(s for s in at.selectbox if s.label == label)
+
+
+@pytest.mark.parametrize("section", SECTIONS)
+def test_analytics_section_renders(analytics_app, section):
+    at = _open_section(section)
+    assert not at.exception, [e.value for e in at.exception]
+    assert at.radio(key="analytics_section").value == section
+
+
+def test_trend_fragment_widgets_rerun(analytics_app):
+    at = _open_section("📊 전체 트렌드")
+    for chart_type in ["바", "영역", "라인"]:
+        _selectbox(at, "차트 유형").set_value(chart_type).run()
+        assert not at.exception, [e.value for e in at.exception]
+
+
+@pytest.mark.parametrize("chart_style", ["바 차트", "파이 차트", "히트맵"])
+def test_group_fragment_widgets_rerun(analytics_app, chart_style):
+    at = _open_section("📈 집단별 분석")
+    for group_col in ["gender", "age_group", "job", "robot_id"]:
+        _selectbox(at, "분포 분석 기준").set_value(group_col)
+        _selectbox(at, "차트 스타일").set_value(chart_style)
+        at.run()
+        assert not at.exception, [e.value for e in at.exception]
+
+
+def _page_ids(at):
+    """전체 데이터 탭에 표시된 페이지의 id 목록 (앞선 표들은 사용자·로봇 요약)"""
+    return at.dataframe[-1].value["id"].tolist()
+
+
+def test_admin_data_pages_with_server_filters(analytics_app):
+    at = _open_section("🔧 관리자 관리")
+    at.selectbox(key="admin_page_size").set_value(100).run()
+    first = _page_ids(at)
+    assert first == list(range(1, 101))
+
+    next(b for b in at.button if b.label == "다음 페이지 ▶").click().run()
+    assert not at.exception, [e.value for e in at.exception]
+    assert _page_ids(at) == list(range(101, 201))
+    next(b for b in at.button if b.label == "◀ 이전 페이지").click().run()
+    assert _page_ids(at) == first
+
+    # 조건이 바뀌면 첫 페이지부터 서버 필터 결과를 보여 줌
+    next(t for t in at.text_input if t.label == "사용자 ID 필터").set_value("USER1").run()
+    ids = _page_ids(at)
+    expected = make_responses(300)
+    expected = expected[expected["user_id"].str.contains("user1")]["id"].tolist()
+    assert ids == expected[:100]
+    assert any(f"필터링된 결과: {len(expected)}건" in i.value for i in at.info)
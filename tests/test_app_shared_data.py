@@ -0,0 +1,23 @@
+"""앱의 데이터 버전별 공유 응답 캐시"""
+from conftest import make_responses
+
+
+def _set_mbti_silently(client, row_id, mbti):
+    """데이터 버전(max(id), 행 수)이 바뀌지 않는 변경"""
+    next(r for r in client.tables["responses"] if r["id"] == row_id)["mbti"] = mbti
+
+
+def test_shared_responses_reload_only_when_version_changes(app):
+    first = app.load_shared_responses()
+    assert len(first) == 400
+    original = first.loc[first["id"] == 1, "mbti"].iloc[0]
+
+    _set_mbti_silently(app.supabase, 1, "XXXX")
+    app.get_data_version.clear()
+    cached = app.load_shared_responses()
+    assert cached.loc[cached["id"] == 1, "mbti"].iloc[0] == original
+
+    app.supabase.add(make_responses(n=5, start_id=401))
+    app.get_data_version.clear()
+    assert len(app.load_shared_responses()) == 405
+
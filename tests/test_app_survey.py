@@ -0,0 +1,77 @@
+"""설문 폼 제출과 타이브레이커 처리"""
+import os
+
+import pytest
+
+import mbti_db
+from conftest import FakeClient
+from mbti_questions import load_registry
+
+APP_PATH = os.path.join(os.path.dirname(os.path.dirname(os.path.abspath(__file__))), "mbti_16_analysis_250812.py")
+LOCATION = "공항"
+
+
+def _tied_answers(bank, axis):
+    """axis 문항은 첫 번째·두 번째 선택지를 반씩, 나머지는 첫 번째 선택지로 고른 응답"""
+    answers, flip = {}, False
+    for q in bank.questions:
+        if "".join(q["axes"]) == axis:
+            answers[q["id"]] = q["choices"][int(flip)]
+            flip = not flip
+        else:
+            answers[q["id"]] = q["choices"][0]
+    return answers
+
+
+def _submit(at):
+    next(b for b in at.button if b.label == "🎯 결과 보기").click().run()
+
+
+def test_resolve_ties_uses_submitted_tie_answers(app):
+    bank = load_registry()[LOCATION]
+    assert bank.tie_prone_axes == app.tie_prone_axes(LOCATION) == ("TF",)
+    scores = app.compute_scores(_tied_answers(bank, "TF"), LOCATION)
+    assert scores["T"] == scores["F"]
+
+    choices = bank.tie_questions["TF"]["choices"]
+    assert app.resolve_ties(scores, {}, LOCATION) is None
+    assert app.predict_type(app.resolve_ties(scores, {"TF": choices[0]}, LOCATION))[2] == "F"
+    assert app.predict_type(app.resolve_ties(scores, {"TF": choices[1]}, LOCATION))[2] == "T"
+
+    untied = dict(scores, T=scores["T"] + 1)
+    assert app.resolve_ties(untied, {}, LOCATION) == untied
+
+
+def test_survey_form_requires_tie_answer(monkeypatch):
+    st = pytest.importorskip("streamlit")
+    from streamlit.testing.v1 import AppTest
+
+    client = FakeClient()
+    monkeypatch.setattr(mbti_db, "create_compressed_client", lambda url, key: client)
+    monkeypatch.setenv("SUPABASE_URL", "http://localhost:54321")
+    monkeypatch.setenv("SUPABASE_KEY", "fake")
+    st.cache_data.clear()
+
+    at = AppTest.from_file(APP_PATH, default_timeout=120)
+    at.session_state["user_id"] = "user1"
+    at.session_state["page"] = 1
+    at.run()
+    next(s for s in at.selectbox if s.label == "진단할 장소를 선택하세요").set_value(LOCATION).run()
+
+    bank = load_registry()[LOCATION]
+    answers = _tied_answers(bank, "TF")
+    for qid, choice in answers.items():
+        at.radio(key=f"radio_{qid}").set_value(choice)
+    assert at.radio(key="tie_TF").value is None
+    _submit(at)
+    assert not at.exception
+    assert at.session_state["page"] == 1
+    assert any("동점" in w.value for w in at.warning)
+
+    at.radio(key="tie_TF").set_value(bank.tie_questions["TF"]["choices"][1])
+    _submit(at)
+    assert not at.exception, [e.value for e in at.exception]
+    assert at.session_state["page"] == 2
+    assert at.session_state["responses"] == answers
+    assert at.session_state["tie_responses"] == {"TF": bank.tie_questions["TF"]["choices"][1]}
+    st.cache_data.clear()
@@ -0,0 +1,19 @@
+"""대시보드 시간대 패턴 분석 (Streamlit 캐시 인자)"""
+from mbti_cube import build_cube
+
+
+def test_analyze_time_patterns_with_real_cube(app, responses):
+    cube = build_cube(responses)
+    first = app.analyze_time_patterns(cube.hour_weekday(), cube.date_range())
+    assert first[0] == "**⏰ 시간대별 진단 패턴:**"
+    assert not any("오류" in line for line in first)
+    # 두 번째 호출은 캐시에서 같은 결과
+    assert app.analyze_time_patterns(cube.hour_weekday(), cube.date_range()) == first
+
+
+def test_analyze_time_patterns_with_filtered_cube(app, responses):
+    cube = build_cube(responses)
+    start, end = cube.date_range()
+    period = cube.filter(start_date=start, end_date=start)
+    lines = app.analyze_time_patterns(period.hour_weekday(), period.date_range())
+    assert not any("오류" in line for line in lines)
@@ -0,0 +1,43 @@
+"""bench_startup 모듈 목록과 앱의 지연 import"""
+import ast
+import os
+import subprocess
+import sys
+
+import pytest
+
+from bench_startup import DEFERRED_MODULES, REMOVED_MODULES, STARTUP_MODULES
+
+ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+APP_PATH = os.path.join(ROOT, "mbti_16_analysis_250812.py")
+
+
+def _top_level_imports(path):
+    with open(path, encoding="utf-8") as f:
+        tree = ast.parse(f.read())
+    modules = set()
+    for node in tree.body:
+        if isinstance(node, ast.Import):
+            modules.update(alias.name for alias in node.names)
+        elif isinstance(node, ast.ImportFrom):
+            modules.add(node.module)
+    return {m for m in modules if m.split(".")[0] not in sys.stdlib_module_names}
+
+
+def test_startup_modules_cover_app_imports():
+    assert _top_level_imports(APP_PATH) <= set(STARTUP_MODULES)
+    assert not set(STARTUP_MODULES) & set(DEFERRED_MODULES + REMOVED_MODULES)
+
+
+def test_app_import_skips_deferred_modules(tmp_path):
+    pytest.importorskip("streamlit")
+    heavy = [m for m in DEFERRED_MODULES + REMOVED_MODULES if not m.startswith("pyarrow")]
+    code = (
+        "import sys, mbti_16_analysis_250812\n"
+        f"print('loaded:', ','.join(m for m in {heavy!r} if m in sys.modules))\n"
+    )
+    env = dict(os.environ, SUPABASE_URL="", SUPABASE_KEY="", MBTI_SNAPSHOT_DIR=str(tmp_path))
+    proc = subprocess.run([sys.executable, "-c", code], cwd=ROOT, env=env, capture_output=True, text=True,
+                          timeout=300)
+    assert proc.returncode == 0, proc.stderr
+    assert proc.stdout.strip().splitlines()[-1] == "loaded:"
@@ -0,0 +1,183 @@
+"""mbti_cube 진단 건수 큐브"""
+from datetime import date
+from functools import partial
+from types import SimpleNamespace
+
+import numpy as np
+import pandas as pd
+
+from conftest import FakeClient, make_responses
+import mbti_db
+from mbti_cube import TIMEZONE, ServerCube, build_cube, fetch_aggregate, read_cube, server_cube, sync_cube, write_cube
+from mbti_db import apply_rescored_responses, fetch_data_version
+from mbti_frame import prepare_analytics_frame
+
+
+def test_sync_cube_rebuilds_after_rescore(tmp_path):
+    client = FakeClient(make_responses(n=300, seed=2), track_updates=True)
+    cube = sync_cube(client, snapshot_dir=tmp_path, data_version=fetch_data_version(client, track_updates=True))
+    before = cube.mbti_counts()
+
+    rows = client.tables["responses"]
+    apply_rescored_responses(client, [{"id": r["id"], "mbti": "ENFJ", "scores": {}} for r in rows[:100]])
+    version = fetch_data_version(client, track_updates=True)
+    cube = sync_cube(client, snapshot_dir=tmp_path, data_version=version)
+
+    expected = build_cube(pd.DataFrame(client.tables["responses"]))
+    pd.testing.assert_series_equal(cube.mbti_counts().sort_index(), expected.mbti_counts().sort_index())
+    assert not cube.mbti_counts().sort_index().equals(before.sort_index())
+    assert read_cube(tmp_path).last_updated == version[2]
+
+
+def _local(df):
+    return pd.to_datetime(df["timestamp"], utc=True).dt.tz_convert(TIMEZONE)
+
+
+def _assert_counts(actual, expected):
+    pd.testing.assert_series_equal(actual.sort_index(), expected.sort_index().astype(np.int64),
+                                   check_names=False, check_index_type=False)
+
+
+def test_cube_queries_match_pandas(responses):
+    cube = build_cube(responses)
+    assert cube.total() == len(responses)
+    for dim in ("location", "gender", "age_group", "job", "robot_id", "mbti"):
+        _assert_counts(cube.counts(dim), responses.groupby(dim).size())
+    pd.testing.assert_frame_equal(cube.crosstab("gender").sort_index(axis=1),
+                                  pd.crosstab(responses["gender"], responses["mbti"]).sort_index(axis=1),
+                                  check_names=False, check_dtype=False)
+
+    local = _local(responses)
+    expected_hw = responses.groupby([local.dt.hour.rename("hour"), (local.dt.weekday + 1).rename("weekday")]).size()
+    _assert_counts(cube.hour_weekday().set_index(["hour", "weekday"])["count"], expected_hw)
+    daily = cube.daily_mbti().set_index(["date", "mbti"])["count"]
+    expected_daily = responses.groupby([local.dt.tz_localize(None).dt.normalize().rename("date"), "mbti"]).size()
+    _assert_counts(daily, expected_daily)
+    assert cube.date_range() == (local.min().date(), local.max().date())
+
+
+def test_cube_filter_matches_frame_filter(responses):
+    cube = build_cube(responses)
+    start, end = date(2025, 1, 10), date(2025, 1, 31)
+    days = _local(responses).dt.date
+    subset = responses[(days >= start) & (days <= end) & (responses["location"] == "병원")]
+    filtered = cube.filter(start, end, location="병원")
+    assert filtered.total() == len(subset)
+    _assert_counts(filtered.counts("mbti"), subset.groupby("mbti").size())
+    assert build_cube(prepare_analytics_frame(responses)).mbti_counts().sort_index().equals(
+        cube.mbti_counts().sort_index())
+
+
+def test_incremental_update_equals_full_build(responses):
+    cube = build_cube(responses.iloc[:150])
+    cube.update(responses.iloc[150:320])
+    cube.update(responses.iloc[320:])
+    expected = build_cube(responses)
+    _assert_counts(cube.cells, expected.cells)
+    assert (cube.last_id, cube.row_count) == (expected.last_id, expected.row_count)
+
+
+def test_cube_round_trips_through_npz(tmp_path, responses):
+    cube = build_cube(responses)
+    cube.last_updated = "2025-06-01T00:00:00+00:00"
+    write_cube(cube, tmp_path)
+    restored = read_cube(tmp_path)
+    _assert_counts(restored.cells, cube.cells)
+    assert (restored.last_id, restored.row_count, restored.last_updated) == (
+        cube.last_id, cube.row_count, cube.last_updated)
+    _assert_counts(restored.counts("gender"), cube.counts("gender"))
+
+
+def test_sync_cube_incremental_and_after_delete(tmp_path):
+    df = make_responses(n=400, seed=23)
+    client = FakeClient(df.iloc[:250])
+    sync_cube(client, snapshot_dir=tmp_path)
+    client.add(df.iloc[250:])
+    cube = sync_cube(client, snapshot_dir=tmp_path)
+    _assert_counts(cube.cells, build_cube(df).cells)
+
+    del client.tables["responses"][::5]
+    cube = sync_cube(client, snapshot_dir=tmp_path)
+    expected = build_cube(pd.DataFrame(client.tables["responses"]))
+    _assert_counts(cube.cells, expected.cells)
+    assert cube.row_count == len(client.tables["responses"])
+
+
+class _AggregateClient(FakeClient):
+    """create_analytics_rpc_functions.sql의 집계 RPC를 pandas로 흉내 내는 클라이언트"""
+
+    def __init__(self, rows):
+        super().__init__(rows)
+        self.rpc_calls = []
+        self.table_reads = 0
+
+    def table(self, name):
+        self.table_reads += 1
+        return super().table(name)
+
+    def rpc(self, name, params=None):
+        self.rpc_calls.append(name)
+        df = pd.DataFrame(self.tables["responses"])
+        local = _local(df)
+        days = local.dt.date
+        mask = pd.Series(True, index=df.index)
+        if params.get("start_date"):
+            mask &= days >= date.fromisoformat(params["start_date"])
+        if params.get("end_date"):
+            mask &= days <= date.fromisoformat(params["end_date"])
+        df, local, days = df[mask], local[mask], days[mask]
+        if name == "mbti_daily_counts":
+            rows = df.assign(day=days.astype(str)).groupby(["day", "mbti"]).size().rename("cnt").reset_index()
+        elif name == "mbti_hour_weekday_histogram":
+            rows = pd.DataFrame({"hour": local.dt.hour, "weekday": local.dt.weekday + 1})
+            rows = rows.groupby(["hour", "weekday"]).size().rename("cnt").reset_index()
+        else:
+            rows = df.rename(columns={params["group_col"]: "group_value"})
+            rows = rows.groupby(["group_value", "mbti"]).size().rename("cnt").reset_index()
+        return SimpleNamespace(execute=lambda: SimpleNamespace(data=rows.to_dict("records")))
+
+
+def test_server_cube_matches_local_cube(monkeypatch, responses):
+    monkeypatch.setattr(mbti_db, "_missing_rpcs", set())
+    client = _AggregateClient(responses)
+    cube = server_cube(partial(fetch_aggregate, client))
+    assert isinstance(cube, ServerCube)
+    expected = build_cube(responses)
+
+    assert cube.total() == expected.total() and cube.date_range() == expected.date_range()
+    pd.testing.assert_series_equal(cube.mbti_counts(), expected.mbti_counts(), check_names=False)
+    pd.testing.assert_frame_equal(cube.daily_mbti(), expected.daily_mbti(), check_dtype=False)
+    pd.testing.assert_frame_equal(cube.hour_weekday(), expected.hour_weekday(), check_dtype=False)
+    for dim in ("gender", "age_group", "job", "robot_id"):
+        pd.testing.assert_frame_equal(cube.crosstab(dim), expected.crosstab(dim),
+                                      check_dtype=False, check_names=False)
+
+    start, end = date(2025, 1, 10), date(2025, 1, 31)
+    period, local_period = cube.filter(start, end), expected.filter(start, end)
+    assert period.total() == local_period.total() and period.date_range() == local_period.date_range()
+    pd.testing.assert_frame_equal(period.hour_weekday(), local_period.hour_weekday(), check_dtype=False)
+    pd.testing.assert_frame_equal(period.crosstab("gender"), local_period.crosstab("gender"),
+                                  check_dtype=False, check_names=False)
+    assert period.filter(end_date=date(2025, 1, 20)).date_range()[1] <= date(2025, 1, 20)
+    # 원본 행은 내려받지 않음
+    assert client.table_reads == 0 and set(client.rpc_calls) == {
+        "mbti_daily_counts", "mbti_hour_weekday_histogram", "mbti_group_crosstab"}
+
+
+def test_server_cube_falls_back_without_rpc(monkeypatch, responses):
+    monkeypatch.setattr(mbti_db, "_missing_rpcs", set())
+    assert server_cube(partial(fetch_aggregate, FakeClient(responses))) is None
+
+
+def test_app_full_data_cube_uses_server_aggregates(monkeypatch, app):
+    monkeypatch.setattr(mbti_db, "_missing_rpcs", set())
+    df = app.load_shared_responses()
+    assert not isinstance(app.load_count_cube(df), ServerCube)
+
+    client = _AggregateClient(make_responses())
+    monkeypatch.setattr(app, "supabase", client)
+    monkeypatch.setattr(mbti_db, "_missing_rpcs", set())
+    app.invalidate_response_cache()
+    cube = app.load_count_cube(df)
+    assert isinstance(cube, ServerCube) and cube.total() == len(df)
+    assert isinstance(app.load_count_cube(df, full_data=False), type(build_cube(df)))
@@ -0,0 +1,285 @@
+"""mbti_db 조회 헬퍼"""
+from datetime import date
+from types import SimpleNamespace
+
+import pandas as pd
+
+import mbti_db
+from conftest import FakeClient, make_responses
+from mbti_db import (
+    OPTIONAL_RESPONSE_COLUMNS, SCHEMA_PROBES, apply_rescored_responses, call_rpc, count_rows,
+    create_compressed_client, delete_responses_by_id, fetch_data_version, fetch_response_page, fetch_table_stats,
+    ilike_pattern, iter_response_chunks, iter_response_pages, load_all_responses, probe_schema_capabilities,
+    projection_columns, response_filters, rpc_dedup_responses, unavailable_columns, upsert_response,
+)
+
+
+def test_fetch_data_version_tracks_updates():
+    client = FakeClient(make_responses(n=50), track_updates=True)
+    assert fetch_data_version(client) == (50, 50, None)
+    assert fetch_data_version(client, track_updates=True) == (50, 50, None)
+
+    apply_rescored_responses(client, [{"id": 7, "mbti": "ENFJ", "scores": {}}])
+    max_id, row_count, last_updated = fetch_data_version(client, track_updates=True)
+    assert (max_id, row_count) == (50, 50)
+    assert last_updated is not None
+    # id·행 수만으로는 UPDATE를 감지할 수 없음
+    assert fetch_data_version(client) == (50, 50, None)
+
+
+class _CappedClient(FakeClient):
+    """서버 max-rows가 page_size보다 작은 경우 (한 요청에 최대 cap행)"""
+
+    def __init__(self, rows, cap):
+        super().__init__(rows)
+        self.cap = cap
+        self.requests = 0
+
+    def table(self, name):
+        self.requests += 1
+        query = super().table(name)
+        limit = query.limit
+        query.limit = lambda n: limit(min(n, self.cap))
+        return query
+
+
+def test_iter_response_pages_walks_ids_in_order():
+    client = FakeClient(make_responses(n=25))
+    pages = list(iter_response_pages(client, "mbti", page_size=10))
+    assert [len(p) for p in pages] == [10, 10, 5]
+    assert [r["id"] for page in pages for r in page] == list(range(1, 26))
+    # select 컬럼에 id가 자동으로 포함됨
+    assert set(pages[0][0]) == {"id", "mbti"}
+
+
+def test_iter_response_pages_survives_server_row_cap():
+    client = _CappedClient(make_responses(n=25), cap=4)
+    ids = [r["id"] for page in iter_response_pages(client, "id", page_size=10) for r in page]
+    assert ids == list(range(1, 26))
+
+
+def test_iter_response_chunks_after_id_and_filters():
+    client = FakeClient(make_responses(n=30))
+    chunks = list(iter_response_chunks(client, "id,mbti", page_size=8, after_id=10, filters=[("lte", "id", 20)]))
+    assert all(isinstance(chunk, pd.DataFrame) for chunk in chunks)
+    assert pd.concat(chunks)["id"].tolist() == list(range(11, 21))
+
+
+def test_load_all_responses_matches_table():
+    df = make_responses(n=37)
+    loaded = load_all_responses(FakeClient(df), page_size=10)
+    assert list(loaded.columns) == list(df.columns)
+    assert loaded["id"].tolist() == df["id"].tolist()
+    assert loaded["mbti"].tolist() == df["mbti"].tolist()
+    assert load_all_responses(FakeClient()).empty
+
+
+def test_fetch_data_version_changes_on_insert_and_delete():
+    client = FakeClient(make_responses(n=20))
+    assert fetch_data_version(client)[:2] == (20, 20)
+    client.add(make_responses(n=2, start_id=21))
+    assert fetch_data_version(client)[:2] == (22, 22)
+    client.table("responses").delete().in_("id", [3, 4]).execute()
+    assert fetch_data_version(client)[:2] == (22, 20)
+    assert fetch_data_version(FakeClient()) == (0, 0, None)
+
+
+def test_projection_columns_skip_unavailable_columns():
+    analytics = projection_columns("analytics").split(",")
+    assert "responses" not in analytics and "scores" not in analytics
+    assert projection_columns("admin-full") == "*"
+    export = projection_columns("export", unavailable=("answer_codes", "location")).split(",")
+    assert "answer_codes" not in export and "location" not in export
+    assert {"responses", "scores", "question_bank_version"} <= set(export)
+
+
+def test_compressed_client_requests_gzip():
+    client = create_compressed_client("http://localhost:54321", "eyJhbGciOiJIUzI1NiJ9.eyJyb2xlIjoiYW5vbiJ9.x")
+    assert client.postgrest.session.headers["accept-encoding"] == "gzip"
+
+
+class _RpcClient:
+    """RPC 호출 수를 세고 정해진 결과나 예외를 돌려주는 클라이언트"""
+
+    def __init__(self, result):
+        self.result = result
+        self.calls = 0
+
+    def rpc(self, name, params=None):
+        self.calls += 1
+        if isinstance(self.result, Exception):
+            raise self.result
+        return SimpleNamespace(execute=lambda: SimpleNamespace(data=self.result))
+
+
+def test_call_rpc_remembers_missing_functions(monkeypatch):
+    monkeypatch.setattr(mbti_db, "_missing_rpcs", set())
+    client = _RpcClient(RuntimeError("PGRST202 Could not find the function public.f"))
+    assert call_rpc(client, "f") is None
+    assert call_rpc(client, "f") is None
+    assert client.calls == 1
+
+
+def test_call_rpc_retries_after_other_errors(monkeypatch):
+    monkeypatch.setattr(mbti_db, "_missing_rpcs", set())
+    client = _RpcClient(RuntimeError("connection reset"))
+    assert call_rpc(client, "f") is None
+    assert call_rpc(client, "f") is None
+    assert client.calls == 2
+    assert call_rpc(_RpcClient([{"n": 1}]), "f") == [{"n": 1}]
+    assert call_rpc(_RpcClient(None), "f") == []
+
+
+class _SchemaClient(FakeClient):
+    """지정한 (테이블, 컬럼)이 없는 스키마"""
+
+    def __init__(self, missing):
+        super().__init__()
+        self.missing = set(missing)
+
+    def table(self, name):
+        query = super().table(name)
+        select = query.select
+
+        def checked(columns="*", **kwargs):
+            if any((name, c.strip()) in self.missing for c in columns.split(",")):
+                raise RuntimeError(f"42703 column {columns} does not exist")
+            return select(columns, **kwargs)
+        query.select = checked
+        return query
+
+
+def test_probe_schema_capabilities_reports_missing_columns():
+    client = _SchemaClient({("responses", "location"), ("responses", "answer_codes"), ("user_robots", "id")})
+    capabilities = probe_schema_capabilities(client)
+    assert set(capabilities) == set(SCHEMA_PROBES)
+    assert capabilities["responses"] and capabilities["diagnosis_session_id"]
+    assert not capabilities["location"] and not capabilities["answer_codes"] and not capabilities["user_robots"]
+    assert unavailable_columns(capabilities) == ("location", "answer_codes")
+    assert unavailable_columns({}) == OPTIONAL_RESPONSE_COLUMNS
+
+
+def _record(session_id):
+    return {"user_id": "user1", "robot_id": "로봇A", "mbti": "ENFJ", "diagnosis_session_id": session_id}
+
+
+def test_upsert_response_saves_each_session_once(monkeypatch):
+    monkeypatch.setattr(mbti_db, "_session_upsert_supported", True)
+    client = FakeClient()
+    assert upsert_response(client, _record("s1")) is True
+    assert upsert_response(client, _record("s1")) is False
+    assert upsert_response(client, _record("s2")) is True
+    assert [r["diagnosis_session_id"] for r in client.tables["responses"]] == ["s1", "s2"]
+
+
+def test_upsert_response_without_unique_constraint(monkeypatch):
+    monkeypatch.setattr(mbti_db, "_session_upsert_supported", True)
+    client = FakeClient(unique_sessions=False)
+    assert upsert_response(client, _record("s1")) is True
+    assert mbti_db._session_upsert_supported is False
+    assert upsert_response(client, _record("s1")) is False
+    assert len(client.tables["responses"]) == 1
+
+
+def test_rpc_dedup_responses_returns_summary_row(monkeypatch):
+    monkeypatch.setattr(mbti_db, "_missing_rpcs", set())
+    summary = {"duplicate_groups": 2, "stale_rows": 3, "deleted_rows": 0}
+    assert rpc_dedup_responses(_RpcClient([summary])) == summary
+    assert rpc_dedup_responses(_RpcClient([])) is None
+    assert rpc_dedup_responses(FakeClient(make_responses(10))) is None
+
+
+def test_delete_responses_by_id_deletes_in_batches():
+    client = FakeClient(make_responses(10))
+    batches = []
+    table = client.table
+
+    def counting_table(name):
+        query = table(name)
+        in_ = query.in_
+
+        def recorded(column, values):
+            batches.append(list(values))
+            return in_(column, values)
+        query.in_ = recorded
+        return query
+    client.table = counting_table
+
+    assert delete_responses_by_id(client, [2, 4, 6, 8, 99], batch_size=2) == 4
+    assert batches == [[2, 4], [6, 8], [99]]
+    assert [r["id"] for r in client.tables["responses"]] == [1, 3, 5, 7, 9, 10]
+    assert delete_responses_by_id(client, []) == 0
+
+
+def test_count_rows_uses_head_request_with_filters():
+    df = make_responses(50)
+    client = FakeClient(df)
+    assert count_rows(client) == 50
+    assert count_rows(client, method="estimated") == 50
+    assert count_rows(client, filters=[("eq", "mbti", "ENFJ")]) == int((df["mbti"] == "ENFJ").sum())
+    assert count_rows(client, "user_robots") == 0
+    res = client.table("responses").select("id", count="exact", head=True).execute()
+    assert res.data == [] and res.count == 50
+
+
+def test_fetch_table_stats_falls_back_without_rpc(monkeypatch):
+    monkeypatch.setattr(mbti_db, "_missing_rpcs", set())
+    df = make_responses(120)
+    client = FakeClient(df)
+    client.tables["user_robots"] = [{"id": 1}, {"id": 2}]
+    assert fetch_table_stats(client) == {
+        "total_responses": 120,
+        "total_robots": 2,
+        "total_users": df["user_id"].nunique(),
+        "distinct_robots": df["robot_id"].nunique(),
+    }
+    assert "mbti_distinct_counts" in mbti_db._missing_rpcs
+
+
+def test_fetch_table_stats_uses_distinct_rpc(monkeypatch):
+    monkeypatch.setattr(mbti_db, "_missing_rpcs", set())
+    client = FakeClient(make_responses(20))
+    client.rpc = _RpcClient([{"distinct_users": 7, "distinct_robots": 3}]).rpc
+    stats = fetch_table_stats(client)
+    assert (stats["total_users"], stats["distinct_robots"]) == (7, 3)
+    assert stats["total_responses"] == 20
+
+
+def test_response_filters_use_local_day_bounds():
+    filters = response_filters(date(2025, 1, 10), date(2025, 1, 12), "user", "로봇", "ENFJ")
+    assert filters == [
+        ("gte", "timestamp", "2025-01-10T00:00:00+09:00"),
+        ("lt", "timestamp", "2025-01-13T00:00:00+09:00"),
+        ("ilike", "user_id", "%user%"),
+        ("ilike", "robot_id", "%로봇%"),
+        ("eq", "mbti", "ENFJ"),
+    ]
+    assert response_filters() == []
+    assert response_filters(user_id="", robot_id=None) == []
+
+
+def test_ilike_pattern_escapes_wildcards():
+    assert ilike_pattern("50%_off\\") == "%50\\%\\_off\\\\%"
+    assert ilike_pattern("user1") == "%user1%"
+
+
+def test_fetch_response_page_matches_local_filter():
+    df = make_responses(300, seed=25)
+    client = FakeClient(df)
+    start, end = date(2025, 1, 5), date(2025, 2, 5)
+    filters = response_filters(start, end, "USER1", None, None)
+
+    local_dates = pd.to_datetime(df["timestamp"], utc=True).dt.tz_convert("Asia/Seoul").dt.date
+    expected = df[(local_dates >= start) & (local_dates <= end)
+                  & df["user_id"].str.contains("user1", case=False)]["id"].tolist()
+    assert count_rows(client, filters=filters) == len(expected)
+
+    ids, after_id = [], 0
+    while True:
+        page = fetch_response_page(client, "id,user_id", page_size=7, after_id=after_id, filters=filters)
+        if page.empty:
+            break
+        assert len(page) <= 7
+        ids.extend(page["id"])
+        after_id = int(page["id"].max())
+    assert ids == expected
@@ -0,0 +1,55 @@
+"""mbti_frame 분석용 프레임 정규화"""
+import pandas as pd
+
+from conftest import make_responses
+from mbti_frame import AXIS_COLUMNS, CATEGORICAL_COLUMNS, observed_counts, observed_values, prepare_analytics_frame
+from mbti_types import TYPE_CODES
+
+
+def test_prepare_analytics_frame_columns(responses):
+    original = responses.copy()
+    frame = prepare_analytics_frame(responses)
+    pd.testing.assert_frame_equal(responses, original)
+
+    assert str(frame["timestamp"].dt.tz) == "Asia/Seoul"
+    local = pd.to_datetime(responses["timestamp"], utc=True).dt.tz_convert("Asia/Seoul")
+    assert (frame["timestamp"] == local).all()
+    assert (frame["date"] == local.dt.normalize()).all()
+    assert frame["hour"].tolist() == local.dt.hour.tolist()
+    assert frame["weekday"].tolist() == (local.dt.weekday + 1).tolist()
+    assert frame["mbti_code"].tolist() == [TYPE_CODES[m] for m in responses["mbti"]]
+    for k, column in enumerate(AXIS_COLUMNS):
+        assert frame[column].astype(str).tolist() == [m[k] for m in responses["mbti"]]
+    for column in CATEGORICAL_COLUMNS:
+        assert isinstance(frame[column].dtype, pd.CategoricalDtype)
+        assert frame[column].astype(object).fillna("").tolist() == responses[column].astype(object).fillna("").tolist()
+
+
+def test_prepare_analytics_frame_marks_bad_values():
+    df = make_responses(3)
+    df.loc[0, "timestamp"] = "어제"
+    df.loc[1, "mbti"] = "XXXX"
+    frame = prepare_analytics_frame(df)
+    assert frame["timestamp"].isna().tolist() == [True, False, False]
+    assert pd.isna(frame.loc[0, "hour"])
+    assert frame.loc[1, "mbti_code"] == -1
+    assert frame.loc[1, list(AXIS_COLUMNS)].isna().all()
+    assert prepare_analytics_frame(pd.DataFrame()).empty
+
+
+def test_observed_counts_ignore_unused_categories(responses):
+    frame = prepare_analytics_frame(responses)
+    subset = frame[frame["job"] == "학생"]
+    assert set(subset["job"].value_counts().index) == set(frame["job"].cat.categories)
+    assert observed_counts(subset["job"]).to_dict() == {"학생": len(subset)}
+    assert list(observed_values(subset["job"]).cat.categories) == ["학생"]
+    assert observed_counts(responses["job"]).to_dict() == responses["job"].value_counts().to_dict()
+
+
+def test_shared_loader_returns_analytics_frame(app):
+    frame = app.load_shared_responses()
+    assert {"date", "hour", "weekday", "mbti_code", *AXIS_COLUMNS} <= set(frame.columns)
+    assert isinstance(frame["mbti"].dtype, pd.CategoricalDtype)
+    assert frame["hour"].notna().all() and len(frame) == 400
+    export = app.load_shared_responses("export")
+    assert "mbti_code" not in export.columns
@@ -0,0 +1,122 @@
+"""mbti_guides 가이드 콘텐츠·API"""
+import json
+import sys
+import threading
+from http.server import ThreadingHTTPServer
+from urllib.error import HTTPError
+from urllib.parse import quote
+from urllib.request import Request, urlopen
+
+import pytest
+
+from mbti_guides import GuideRequestHandler, guide_path, guide_payload, load_guides, main
+
+
+@pytest.fixture(scope="module")
+def content():
+    return load_guides()
+
+
+@pytest.fixture(scope="module")
+def server():
+    httpd = ThreadingHTTPServer(("127.0.0.1", 0), GuideRequestHandler)
+    thread = threading.Thread(target=httpd.serve_forever, daemon=True)
+    thread.start()
+    yield f"http://127.0.0.1:{httpd.server_port}"
+    httpd.shutdown()
+    httpd.server_close()
+
+
+def _get(url):
+    try:
+        with urlopen(url) as res:
+            return res.status, json.load(res)
+    except HTTPError as e:
+        return e.code, json.load(e)
+
+
+def test_guide_payload_reports_served_location(content):
+    location = content.locations[-1]
+    payload = guide_payload(content, location, "ENFJ")
+    assert payload["location"] == location
+    assert payload["content_version"] == content.content_version
+    assert guide_payload(content, "없는 장소", "ENFJ") is None
+    assert guide_payload(content, location, "XXXX") is None
+
+
+def test_app_lookup_falls_back_to_default_location(content):
+    assert content.guide("없는 장소", "ENFJ") == content.guide(content.default_location, "ENFJ")
+
+
+def test_api_rejects_unknown_location(server, content):
+    status, body = _get(f"{server}/guides/{quote('없는 장소')}")
+    assert status == 404
+    assert body["locations"] == list(content.locations)
+    status, _ = _get(f"{server}/guides/{quote('없는 장소')}/ENFJ")
+    assert status == 404
+
+
+def test_api_serves_known_location(server, content):
+    location = content.locations[-1]
+    status, body = _get(f"{server}/guides/{quote(location)}")
+    assert status == 200
+    assert body["location"] == location
+    assert set(body["hri_styles"]) == set(content.types)
+    status, body = _get(f"{server}/guides/{quote(location)}/enfj")
+    assert status == 200
+    assert (body["location"], body["mbti"]) == (location, "ENFJ")
+
+
+def test_guides_built_once_for_every_location_and_type(content):
+    assert load_guides() is content
+    for location in content.locations:
+        guides = content.guides_for(location)
+        assert set(guides) == set(content.types)
+        for mbti, guide in guides.items():
+            assert guide["description"] and guide["examples"]
+            assert bool(guide["location_advice"]) == (location != content.default_location)
+            if guide["location_advice"]:
+                assert mbti in guide["location_advice"]
+    with pytest.raises(TypeError):
+        content.guides_for(content.default_location)["ENFJ"]["hri_style"] = "변경"
+
+
+def test_load_guides_rejects_version_mismatch(tmp_path):
+    with open(guide_path(), encoding="utf-8") as f:
+        data = json.load(f)
+    (tmp_path / "v2.json").write_text(json.dumps(data, ensure_ascii=False), encoding="utf-8")
+    with pytest.raises(ValueError):
+        load_guides(2, str(tmp_path))
+
+
+def test_api_revalidates_with_etag(server, content):
+    request = Request(f"{server}/guides", headers={"If-None-Match": f'"{content.content_version}"'})
+    with pytest.raises(HTTPError) as excinfo:
+        urlopen(request)
+    assert excinfo.value.code == 304
+    status, body = _get(f"{server}/guides")
+    assert status == 200
+    assert body["locations"] == list(content.locations)
+
+    # 없는 장소·유형은 현재 ETag로 요청해도 304가 아니라 404
+    location = quote(content.locations[0])
+    for path in (f"/guides/{quote('없는 장소')}/XXXX", f"/guides/{location}/XXXX", f"/guides/{quote('없는 장소')}"):
+        request = Request(f"{server}{path}", headers={"If-None-Match": f'"{content.content_version}"'})
+        with pytest.raises(HTTPError) as excinfo:
+            urlopen(request)
+        assert excinfo.value.code == 404, path
+    request = Request(f"{server}/guides/{location}/ENFJ", headers={"If-None-Match": f'"{content.content_version}"'})
+    with pytest.raises(HTTPError) as excinfo:
+        urlopen(request)
+    assert excinfo.value.code == 304
+
+
+def test_cli_exit_codes(monkeypatch, capsys, content):
+    location = content.locations[-1]
+    monkeypatch.setattr(sys, "argv", ["mbti_guides.py", location, "enfj"])
+    assert main() == 0
+    assert json.loads(capsys.readouterr().out) == guide_payload(content, location, "ENFJ")
+    monkeypatch.setattr(sys, "argv", ["mbti_guides.py", "없는 장소"])
+    assert main() == 1
+    monkeypatch.setattr(sys, "argv", ["mbti_guides.py", location, "XXXX"])
+    assert main() == 1
@@ -0,0 +1,121 @@
+"""mbti_markov 전이 모델"""
+import numpy as np
+import pandas as pd
+import pytest
+
+from conftest import FakeClient, make_responses
+from mbti_db import apply_rescored_responses, fetch_data_version
+from mbti_frame import prepare_analytics_frame
+from mbti_markov import (
+    SPLITS, build_model, read_model, stationary_distribution, sync_model, transition_probabilities, write_model,
+)
+from mbti_transitions import build_transitions, transition_matrix
+from mbti_types import TYPES
+
+
+@pytest.mark.parametrize("split", SPLITS)
+def test_build_model_on_analytics_frame(responses, split):
+    """category 컬럼으로 정규화된 분석 프레임에서도 원본과 같은 모델"""
+    expected = build_model(responses, split)
+    model = build_model(prepare_analytics_frame(responses), split)
+    assert model.groups == expected.groups
+    np.testing.assert_array_equal(model.counts, expected.counts)
+    np.testing.assert_allclose(model.interval_sums, expected.interval_sums)
+
+
+@pytest.mark.parametrize("split", SPLITS)
+def test_incremental_update_on_analytics_frames(split):
+    df = make_responses(n=600, seed=3)
+    expected = build_model(df, split)
+    model = build_model(prepare_analytics_frame(df.iloc[:250]), split)
+    assert model.update(prepare_analytics_frame(df.iloc[250:]))
+    for group in expected.groups:
+        np.testing.assert_array_equal(model.counts_for(group), expected.counts_for(group))
+    assert (model.last_id, model.row_count) == (expected.last_id, expected.row_count)
+
+
+@pytest.mark.parametrize("split", SPLITS)
+def test_sync_model_rebuilds_after_rescore(tmp_path, split):
+    client = FakeClient(make_responses(n=300, seed=5), track_updates=True)
+    sync_model(client, split, tmp_path, data_version=fetch_data_version(client, track_updates=True))
+
+    rows = client.tables["responses"]
+    updates = [{"id": r["id"], "mbti": "ISTJ", "scores": {}} for r in rows[::3]]
+    apply_rescored_responses(client, updates)
+    model = sync_model(client, split, tmp_path, data_version=fetch_data_version(client, track_updates=True))
+
+    expected = build_model(pd.DataFrame(client.tables["responses"]), split)
+    np.testing.assert_array_equal(model.counts_for(), expected.counts_for())
+    assert read_model(tmp_path, split).last_updated == model.last_updated is not None
+
+
+@pytest.mark.parametrize("split", SPLITS)
+def test_build_model_counts_match_transitions(responses, split):
+    model = build_model(responses, split)
+    transitions = build_transitions(responses, columns=(split,) if split else ())
+    np.testing.assert_array_equal(model.counts_for(), transition_matrix(transitions))
+    if split:
+        for group in model.groups:
+            subset = transitions[transitions[split].astype(object).fillna("").astype(str) == group]
+            np.testing.assert_array_equal(model.counts_for(group), transition_matrix(subset))
+    assert model.row_count == len(responses) and model.last_id == responses["id"].max()
+
+
+def test_stationary_distribution_is_fixed_point(responses):
+    probs = transition_probabilities(build_model(responses).counts_for())
+    np.testing.assert_allclose(probs.sum(axis=1), 1)
+    pi = stationary_distribution(probs)
+    assert pi.sum() == pytest.approx(1) and (pi > 0).all()
+    np.testing.assert_allclose(pi @ probs, pi, atol=1e-12)
+    np.testing.assert_allclose(np.linalg.matrix_power(probs, 500)[0], pi, atol=1e-8)
+
+    summary = build_model(responses).summary()
+    assert list(summary["mbti"]) == list(TYPES)
+    np.testing.assert_allclose(summary["dwell_diagnoses"], 1 / (1 - np.diag(probs)))
+
+
+def test_update_rejects_out_of_order_rows():
+    df = make_responses(n=200, seed=7, users=5, robots=1)
+    model = build_model(df.iloc[:150])
+    late = df.iloc[[10]].assign(id=1000)
+    assert model.update(late) is False
+    assert model.last_id == df["id"].iloc[149]
+
+
+@pytest.mark.parametrize("split", SPLITS)
+def test_model_round_trips_through_npz(tmp_path, responses, split):
+    model = build_model(responses, split)
+    model.last_updated = "2025-06-01T00:00:00+00:00"
+    write_model(model, tmp_path)
+    restored = read_model(tmp_path, split)
+    assert (restored.split, restored.groups, restored.last_id, restored.row_count, restored.last_updated) == (
+        model.split, model.groups, model.last_id, model.row_count, model.last_updated)
+    np.testing.assert_array_equal(restored.counts, model.counts)
+    np.testing.assert_allclose(restored.interval_sums, model.interval_sums)
+    assert len(restored.states) == len(model.states)
+
+    # 저장된 상태에서 이어 갱신해도 한 번에 만든 모델과 같음
+    more = make_responses(n=100, seed=8, start_id=responses["id"].max() + 1)
+    more["timestamp"] = [(pd.Timestamp("2025-04-01", tz="UTC") + pd.Timedelta(hours=i)).isoformat()
+                         for i in range(len(more))]
+    assert restored.update(more)
+    np.testing.assert_array_equal(restored.counts_for(),
+                                  build_model(pd.concat([responses, more]), split).counts_for())
+
+
+def test_sync_model_handles_inserts_deletes_and_late_rows(tmp_path):
+    df = make_responses(n=300, seed=9)
+    client = FakeClient(df.iloc[:200])
+    sync_model(client, None, tmp_path)
+
+    client.add(df.iloc[200:])
+    model = sync_model(client, None, tmp_path)
+    np.testing.assert_array_equal(model.counts_for(), build_model(df).counts_for())
+
+    del client.tables["responses"][::4]
+    late = df.iloc[[5]].assign(id=10_000)
+    client.add(late)
+    model = sync_model(client, None, tmp_path)
+    expected = build_model(pd.DataFrame(client.tables["responses"]))
+    np.testing.assert_array_equal(model.counts_for(), expected.counts_for())
+    assert (model.last_id, model.row_count) == (10_000, len(client.tables["responses"]))
@@ -0,0 +1,134 @@
+"""질문 세트 레지스트리와 행렬 채점"""
+import json
+
+import numpy as np
+import pandas as pd
+import pytest
+
+from mbti_questions import (
+    AXES, MISSING, MISSING_CODE_CHAR, bank_path, fill_responses_from_codes, load_registry, predict_types,
+    registry_for,
+)
+
+
+def _loop_scores(questions, responses):
+    """기존 compute_scores의 문항별 반복 채점"""
+    scores = {axis: 0 for axis in AXES}
+    for q in questions:
+        choice = responses.get(q["id"])
+        if choice is None:
+            return None
+        pos, neg = q["axes"]
+        scores[pos if choice == q["choices"][0] else neg] += 1
+    return scores
+
+
+def _loop_type(scores):
+    return "".join([
+        "E" if scores["E"] >= scores["I"] else "I",
+        "S" if scores["S"] >= scores["N"] else "N",
+        "T" if scores["T"] >= scores["F"] else "F",
+        "J" if scores["J"] >= scores["P"] else "P",
+    ])
+
+
+def _random_responses(bank, rng, n):
+    return [{q["id"]: q["choices"][rng.integers(2)] for q in bank.questions} for _ in range(n)]
+
+
+@pytest.mark.parametrize("location", load_registry().locations)
+def test_matrix_scoring_matches_loop_scoring(location):
+    bank = load_registry()[location]
+    responses = _random_responses(bank, np.random.default_rng(15), 200)
+    expected = [_loop_scores(bank.questions, r) for r in responses]
+
+    assert [bank.score(r) for r in responses] == expected
+    matrix = bank.score_matrix(bank.encode_many(responses))
+    assert matrix.tolist() == [[s[axis] for axis in AXES] for s in expected]
+    assert predict_types(matrix).tolist() == [_loop_type(s) for s in expected]
+
+
+def test_score_requires_every_answer():
+    bank = load_registry()["일반"]
+    responses = _random_responses(bank, np.random.default_rng(0), 1)[0]
+    responses.pop(bank.question_ids[-1])
+    assert bank.score(responses) is None
+    responses[bank.question_ids[0]] = "알 수 없는 선택지"
+    assert bank.encode(responses)[0] == MISSING
+
+
+def test_registry_matches_bank_file():
+    registry = load_registry()
+    with open(bank_path(), encoding="utf-8") as f:
+        data = json.load(f)
+    default = registry[data["default_location"]]
+    assert [q["id"] for q in default.questions] == [q["id"] for q in data["base_questions"]]
+    for location, extra in data["location_questions"].items():
+        assert len(registry[location]) == len(data["base_questions"]) + len(extra)
+    assert registry["등록되지 않은 장소"] is default
+    assert registry.bank_version.startswith(f"v{data['version']}-")
+    assert registry_for(registry.bank_version) is registry
+
+
+def test_banks_are_immutable():
+    bank = load_registry()["병원"]
+    with pytest.raises(TypeError):
+        bank.questions[0]["text"] = "변경"
+    with pytest.raises(ValueError):
+        bank.axis_matrix[0, 0] = 5
+
+
+def test_load_registry_rejects_version_mismatch(tmp_path):
+    with open(bank_path(), encoding="utf-8") as f:
+        data = json.load(f)
+    (tmp_path / "v2.json").write_text(json.dumps(data, ensure_ascii=False), encoding="utf-8")
+    with pytest.raises(ValueError):
+        load_registry(2, str(tmp_path))
+
+
+@pytest.mark.parametrize("location", load_registry().locations)
+def test_answer_codes_round_trip(location):
+    bank = load_registry()[location]
+    responses = _random_responses(bank, np.random.default_rng(17), 1)[0]
+    answer_codes = bank.encode_answers(responses)
+    assert len(answer_codes) == len(bank) and set(answer_codes) <= {"0", "1"}
+    assert bank.decode_answers(answer_codes) == responses
+    assert bank.codes_from_answers(answer_codes).tolist() == bank.encode(responses).tolist()
+
+    partial = dict(responses)
+    partial.pop(bank.question_ids[1])
+    assert bank.encode_answers(partial)[1] == MISSING_CODE_CHAR
+    assert bank.decode_answers(bank.encode_answers(partial)) == partial
+    assert bank.decode_answers(None) == {}
+
+
+def test_corrupted_answer_codes_are_missing():
+    bank = load_registry()["병원"]
+    responses = _random_responses(bank, np.random.default_rng(5), 1)[0]
+    answer_codes = bank.encode_answers(responses)
+    corrupted = "x" + "9" + "٣" + answer_codes[3:] + "01"
+    codes = bank.codes_from_answers(corrupted)
+    assert codes[:3].tolist() == [MISSING] * 3
+    assert codes[3:].tolist() == bank.encode(responses)[3:].tolist()
+    assert bank.decode_answers(corrupted) == {qid: responses[qid] for qid in bank.question_ids[3:]}
+    assert (bank.score_matrix(codes) <= bank.score_matrix(bank.encode(responses))).all()
+    assert (bank.codes_from_answers(np.nan) == MISSING).all()
+
+
+def test_fill_responses_from_codes_restores_text():
+    registry = load_registry()
+    rng = np.random.default_rng(3)
+    hospital = _random_responses(registry["병원"], rng, 1)[0]
+    default = _random_responses(registry["일반"], rng, 1)[0]
+    df = pd.DataFrame({
+        "id": [1, 2, 3],
+        "location": ["병원", None, "병원"],
+        "responses": [None, None, {"Q1": "원문 유지"}],
+        "answer_codes": [registry["병원"].encode_answers(hospital), registry["일반"].encode_answers(default), None],
+        "question_bank_version": [registry.bank_version, None, None],
+    })
+    filled = fill_responses_from_codes(df)
+    assert filled["responses"].tolist() == [hospital, default, {"Q1": "원문 유지"}]
+    assert df["responses"].iloc[0] is None
+    analytics = df.drop(columns=["answer_codes"])
+    assert fill_responses_from_codes(analytics) is analytics
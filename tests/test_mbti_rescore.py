@@ -0,0 +1,105 @@
+"""저장된 진단의 일괄 재채점·압축 응답 채우기"""
+import numpy as np
+
+import mbti_db
+import mbti_rescore
+from conftest import FakeClient
+from mbti_questions import AXES, load_registry, predict_types
+from mbti_rescore import (
+    encode_rows, load_checkpoint, new_checkpoint, rescore_range, rescore_rows, save_checkpoint,
+)
+
+REGISTRY = load_registry()
+
+
+def _survey_row(row_id, location, rng, second_letters=""):
+    """앱에서 저장한 것과 같은 진단 행 (동점 축은 second_letters에 있는 축만 두 번째 극으로 해결)"""
+    bank = REGISTRY[location]
+    responses = {q["id"]: q["choices"][rng.integers(2)] for q in bank.questions}
+    scores = bank.score(responses)
+    for axis in bank.tie_prone_axes:
+        a, b = axis
+        if scores[a] == scores[b]:
+            scores[b if b in second_letters else a] += 1
+    mbti = str(predict_types([[scores[axis] for axis in AXES]])[0])
+    return {"id": row_id, "location": location, "responses": responses, "answer_codes": None,
+            "question_bank_version": None, "scores": scores, "mbti": mbti}
+
+
+def _rows(n=60, seed=16, second_letters=""):
+    rng = np.random.default_rng(seed)
+    locations = REGISTRY.locations
+    return [_survey_row(i + 1, locations[i % len(locations)], rng, second_letters) for i in range(n)]
+
+
+def test_rescore_rows_keeps_correct_rows():
+    for second_letters in ("", "INFP"):
+        changes, stats = rescore_rows(_rows(second_letters=second_letters), REGISTRY)
+        assert changes == []
+        assert stats == {"rows": 60, "changed": 0, "updated": 0, "incomplete": 0}
+
+
+def test_rescore_rows_fixes_stale_results():
+    rows = _rows()
+    expected = {rows[3]["id"]: dict(rows[3]), rows[10]["id"]: dict(rows[10])}
+    rows[3]["mbti"] = "XXXX"
+    rows[10]["scores"] = dict(rows[10]["scores"], E=99)
+    # location 컬럼이 없는 행은 응답 문항 id로 질문 세트를 찾음
+    rows[20]["location"] = None
+    rows[30]["responses"].pop(next(iter(rows[30]["responses"])))
+
+    changes, stats = rescore_rows(rows, REGISTRY)
+    assert stats["changed"] == 2 and stats["incomplete"] == 1
+    assert {c["id"]: (c["mbti"], c["scores"]) for c in changes} == {
+        row_id: (row["mbti"], row["scores"]) for row_id, row in expected.items()
+    }
+
+
+def test_encode_rows_round_trip():
+    rows = _rows()
+    rows[5]["answer_codes"] = "0" * len(REGISTRY[rows[5]["location"]])
+    changes, stats = encode_rows(rows, REGISTRY)
+    assert stats["changed"] == len(rows) - 1
+    by_id = {row["id"]: row for row in rows}
+    for change in changes:
+        row = by_id[change["id"]]
+        assert change["question_bank_version"] == REGISTRY.bank_version
+        assert REGISTRY[row["location"]].decode_answers(change["answer_codes"]) == row["responses"]
+
+    # 압축 응답만 남은 행도 같은 결과로 재채점
+    for change in changes:
+        by_id[change["id"]].update(change, responses=None)
+    assert rescore_rows([by_id[c["id"]] for c in changes], REGISTRY)[0] == []
+
+
+def test_rescore_range_applies_changes(monkeypatch):
+    monkeypatch.setattr(mbti_db, "_missing_rpcs", set())
+    rows = _rows()
+    stale = {row["id"] for row in rows[::7]}
+    for row in rows:
+        if row["id"] in stale:
+            row["mbti"] = "XXXX"
+    client = FakeClient(rows)
+    monkeypatch.setattr(mbti_rescore, "_worker_client", client)
+    monkeypatch.setattr(mbti_rescore, "_worker_registry", REGISTRY)
+    monkeypatch.setattr(mbti_rescore, "_worker_columns", ",".join(mbti_rescore.RESCORE_COLUMNS))
+
+    assert rescore_range(0, 30)[1] == {"rows": 30, "changed": len([i for i in stale if i <= 30]),
+                                       "updated": 0, "incomplete": 0}
+    lo, stats = rescore_range(0, 100, apply=True)
+    assert (lo, stats["changed"], stats["updated"]) == (0, len(stale), len(stale))
+    assert rescore_rows(client.tables["responses"], REGISTRY)[0] == []
+
+
+def test_checkpoint_resumes_only_matching_job(tmp_path):
+    path = str(tmp_path / "rescore_checkpoint.json")
+    checkpoint = new_checkpoint("rescore", REGISTRY.bank_version, 100)
+    checkpoint["done"] = [0, 200]
+    checkpoint["stats"]["rows"] = 150
+    save_checkpoint(path, checkpoint)
+
+    assert load_checkpoint(path, "rescore", REGISTRY.bank_version, 100) == checkpoint
+    for args in (("encode", REGISTRY.bank_version, 100), ("rescore", "v0-other", 100),
+                 ("rescore", REGISTRY.bank_version, 50)):
+        assert load_checkpoint(path, *args) == new_checkpoint(*args)
+    assert load_checkpoint(str(tmp_path / "missing.json"), "rescore", "v1", 10)["done"] == []
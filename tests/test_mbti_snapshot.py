@@ -0,0 +1,68 @@
+"""mbti_snapshot 로컬 스냅샷"""
+import pytest
+
+from conftest import FakeClient, make_responses
+from mbti_db import apply_rescored_responses, fetch_data_version, projection_columns
+from mbti_snapshot import read_snapshot, remove_snapshots, sync_snapshot
+
+
+def test_sync_snapshot_replaces_updated_rows(tmp_path):
+    pytest.importorskip("pyarrow")
+    client = FakeClient(make_responses(n=120), track_updates=True)
+    columns = projection_columns("analytics")
+    sync_snapshot(client, tmp_path, name="analytics", columns=columns)
+
+    apply_rescored_responses(client, [{"id": 5, "mbti": "INTP", "scores": {}}, {"id": 90, "mbti": "ESFP", "scores": {}}])
+    client.add(make_responses(n=3, start_id=121))
+    _, _, last_updated = fetch_data_version(client, track_updates=True)
+    df = sync_snapshot(client, tmp_path, name="analytics", columns=columns, last_updated=last_updated)
+
+    assert df["id"].tolist() == list(range(1, 124))
+    assert df.set_index("id").loc[[5, 90], "mbti"].tolist() == ["INTP", "ESFP"]
+
+
+def test_remove_snapshots_keeps_checkpoints(tmp_path):
+    for name in ("analytics.parquet", "analytics_meta.json", "cube.npz", "markov_all.npz", "rescore_checkpoint.json"):
+        (tmp_path / name).write_text("")
+    removed = remove_snapshots(tmp_path)
+    assert len(removed) == 4
+    assert [p.name for p in tmp_path.iterdir()] == ["rescore_checkpoint.json"]
+    assert remove_snapshots(tmp_path / "missing") == []
+
+
+def _ids(df):
+    return df["id"].tolist()
+
+
+def test_sync_snapshot_appends_new_rows_and_drops_deleted(tmp_path):
+    pytest.importorskip("pyarrow")
+    client = FakeClient(make_responses(n=50))
+    assert _ids(sync_snapshot(client, tmp_path)) == list(range(1, 51))
+
+    client.add(make_responses(n=5, start_id=51))
+    client.table("responses").delete().in_("id", [2, 30]).execute()
+    df = sync_snapshot(client, tmp_path)
+    assert _ids(df) == [i for i in range(1, 56) if i not in (2, 30)]
+
+    df, meta = read_snapshot(tmp_path)
+    assert (meta["last_id"], meta["row_count"]) == (55, 53)
+
+
+def test_sync_snapshot_refetches_when_columns_change(tmp_path):
+    pytest.importorskip("pyarrow")
+    client = FakeClient(make_responses(n=20))
+    sync_snapshot(client, tmp_path, columns="id,mbti")
+    df = sync_snapshot(client, tmp_path, columns="id,mbti,robot_id")
+    assert list(df.columns) == ["id", "mbti", "robot_id"]
+    assert len(df) == 20
+
+
+def test_snapshot_round_trips_json_columns(tmp_path):
+    pytest.importorskip("pyarrow")
+    rows = make_responses(n=3)
+    rows["responses"] = [{"q1": "예"}, None, {"q2": "아니오", "q3": "예"}]
+    rows["scores"] = [{"E": 3, "I": 1}, {"E": 0}, None]
+    sync_snapshot(FakeClient(rows), tmp_path)
+    df, _ = read_snapshot(tmp_path)
+    assert df["responses"].tolist() == [{"q1": "예"}, None, {"q2": "아니오", "q3": "예"}]
+    assert df["scores"].tolist() == [{"E": 3, "I": 1}, {"E": 0}, None]
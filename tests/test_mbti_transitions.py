@@ -0,0 +1,67 @@
+"""mbti_transitions 전체 조합 전이 계산"""
+import numpy as np
+import pandas as pd
+import pytest
+
+from conftest import make_responses
+from mbti_transitions import FLIP_COLUMNS, build_transition_tables, build_transitions
+from mbti_types import TYPE_CODES
+
+
+def _loop_transitions(df, keys):
+    """조합마다 시간순으로 정렬해 이웃한 두 진단을 비교하는 기존 방식"""
+    pairs = []
+    for _, group in df.groupby(list(keys), sort=True):
+        group = group.assign(ts=pd.to_datetime(group["timestamp"], utc=True)).sort_values("ts", kind="mergesort")
+        rows = group.to_dict("records")
+        for prev, cur in zip(rows, rows[1:]):
+            if prev["mbti"] in TYPE_CODES and cur["mbti"] in TYPE_CODES:
+                pairs.append((*(cur[k] for k in keys), prev["mbti"], cur["mbti"], (cur["ts"] - prev["ts"]).days))
+    return pairs
+
+
+@pytest.fixture
+def df():
+    df = make_responses(600, seed=20, users=30)
+    df.loc[df.sample(frac=0.05, random_state=20).index, "mbti"] = "XXXX"
+    # 같은 조합의 시각을 섞어 입력 순서와 시간 순서가 다르게 함
+    return df.sample(frac=1, random_state=1).reset_index(drop=True)
+
+
+@pytest.mark.parametrize("keys", [("user_id", "robot_id"), ("robot_id",), ("user_id",)])
+def test_build_transitions_matches_loop(df, keys):
+    transitions = build_transitions(df, keys)
+    actual = list(zip(*(transitions[k] for k in keys), transitions["from_mbti"], transitions["to_mbti"],
+                      transitions["interval_days"]))
+    assert actual == _loop_transitions(df, keys)
+
+    letters = np.array([[a != b for a, b in zip(f, t)] for f, t in zip(transitions["from_mbti"],
+                                                                        transitions["to_mbti"])])
+    assert (transitions[list(FLIP_COLUMNS)].to_numpy() == letters).all()
+    assert (transitions["n_flips"] == letters.sum(axis=1)).all()
+    assert (transitions["changed"] == (transitions["from_mbti"] != transitions["to_mbti"])).all()
+
+
+def test_build_transitions_carries_columns(df):
+    transitions = build_transitions(df, columns=("location", "user_id"))
+    assert list(transitions.columns[:3]) == ["user_id", "robot_id", "location"]
+
+
+def test_transition_tables_summarize_transitions(df):
+    tables = build_transition_tables(df)
+    transitions = tables["transitions"]
+    matrix = tables["matrix"]
+    assert matrix.sum() == len(transitions)
+    assert matrix[TYPE_CODES["ENFJ"], TYPE_CODES["INFJ"]] == (
+        (transitions["from_mbti"] == "ENFJ") & (transitions["to_mbti"] == "INFJ")).sum()
+    rates = tables["axis_flip_rates"]
+    assert rates["flips"].tolist() == transitions[list(FLIP_COLUMNS)].sum().tolist()
+    assert np.allclose(rates["rate"], rates["flips"] / len(transitions))
+
+
+def test_build_transitions_without_pairs():
+    assert build_transitions(pd.DataFrame()).empty
+    single = make_responses(1)
+    tables = build_transition_tables(single)
+    assert tables["transitions"].empty and tables["matrix"].sum() == 0
+    assert (tables["axis_flip_rates"]["rate"] == 0).all()
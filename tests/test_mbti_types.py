@@ -0,0 +1,58 @@
+"""mbti_types 4비트 유형 코드와 축 연산 표"""
+from itertools import product
+
+import numpy as np
+import pandas as pd
+
+from mbti_types import (
+    AXES, HAMMING, INVALID, POLES, SHARED_LETTERS, TEMPERAMENTS, TYPE_CODES, TYPES, TYPES_WITH, axis_flips,
+    count_matrix, encode_types, pole_counts, pole_ratio, temperament_counts, type_counts,
+)
+
+
+def test_types_are_all_sixteen_letter_combinations():
+    assert sorted(TYPES) == sorted("".join(p) for p in product("EI", "SN", "TF", "JP"))
+    assert TYPES[0] == "ESTJ" and TYPES[15] == "INFP"
+    assert all(TYPE_CODES[t] == code for code, t in enumerate(TYPES))
+    for pole in POLES:
+        assert TYPES_WITH[pole] == tuple(t for t in TYPES if pole in t)
+
+
+def test_encode_types_marks_unknown_values():
+    values = ["ENFJ", "enfj", None, np.nan, "XXXX", "ISTP", "ENFJ"]
+    assert encode_types(values).tolist() == [TYPE_CODES["ENFJ"], INVALID, INVALID, INVALID, INVALID,
+                                             TYPE_CODES["ISTP"], TYPE_CODES["ENFJ"]]
+    assert encode_types([]).size == 0
+    assert encode_types(pd.Series(TYPES)).tolist() == list(range(16))
+
+
+def test_count_operations_match_letter_counts():
+    rng = np.random.default_rng(19)
+    values = rng.choice(TYPES + ("XXXX",), 500)
+    valid = [v for v in values if v in TYPE_CODES]
+    counts = type_counts(encode_types(values))
+    assert counts.tolist() == [valid.count(t) for t in TYPES]
+
+    assert pole_counts(counts).tolist() == [sum(pole in v for v in valid) for pole in POLES]
+    assert temperament_counts(counts).tolist() == [sum(v[1:3] == t for v in valid) for t in TEMPERAMENTS]
+    for pole in POLES:
+        assert np.isclose(pole_ratio(counts, pole), 100 * sum(pole in v for v in valid) / len(valid))
+    assert pole_ratio(np.zeros(16), "E") == 0
+
+    # 그룹 × 16 행렬도 행마다 같은 결과
+    table = pd.DataFrame([{"ENFJ": 2, "ISTP": 1}, {"INTJ": 4}]).fillna(0)
+    matrix = count_matrix(table)
+    assert matrix.shape == (2, 16) and matrix.sum() == 7
+    assert pole_counts(matrix)[1, POLES.index("I")] == 4
+
+
+def test_pairwise_tables_match_letter_comparison():
+    for a, b in product(TYPES, repeat=2):
+        shared = sum(x == y for x, y in zip(a, b))
+        assert SHARED_LETTERS[TYPE_CODES[a], TYPE_CODES[b]] == shared
+        assert HAMMING[TYPE_CODES[a], TYPE_CODES[b]] == 4 - shared
+
+    pairs = [("ENFJ", "INFJ"), ("ISTP", "ENFJ"), ("ESTJ", "ESTJ")]
+    flips = axis_flips(encode_types([p[0] for p in pairs]), encode_types([p[1] for p in pairs]))
+    assert flips.tolist() == [[x != y for x, y in zip(a, b)] for a, b in pairs]
+    assert flips.shape == (3, len(AXES))